@@ -0,0 +1,196 @@
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from . import metrics
+
+# Batchers whose worker is restarted in forked children. Held weakly so a
+# batcher nobody references any more is collected and not restarted.
+_live_batchers = weakref.WeakSet()
+
+
+def _restart_after_fork():
+    for batcher in list(_live_batchers):
+        batcher._after_fork()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item requests into batched model calls
+
+    Request threads submit one item each and block on a Future. A background
+    worker waits until max_batch_size items have been queued, or until the
+    oldest one has waited max_wait_ms. It then calls batch_fn once on the whole
+    batch (e.g. a model's infer_batch) and hands each caller its own result.
+    The worker is restarted in forked children, so a batcher created in a
+    preloading gunicorn master works in every worker.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=2.0, name='batcher', history=10000,
+                 timeout=30.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Metrics: batch sizes by power-of-two bucket, recent queue waits in seconds
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.batch_size_buckets = {}
+        self._waits = deque(maxlen=history)
+
+        self._start()
+        _live_batchers.add(self)
+
+    def _start(self):
+        # The worker only holds a weak reference, and is woken with a stop
+        # marker once the batcher is collected
+        jobs = self._queue
+        weakref.finalize(self, jobs.put, None).atexit = False
+        self._worker = threading.Thread(target=MicroBatcher._run, args=(weakref.ref(self), jobs),
+                                        name=f'{self.name}-worker', daemon=True)
+        self._worker.start()
+
+    def _after_fork(self):
+        # Only the forking thread survives in the child. Items queued in the
+        # parent belong to its callers, so the child starts from a fresh queue.
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        if not self._closed:
+            self._start()
+
+    def submit(self, item):
+        """Queue one item and return a Future for its result"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f'{self.name} is closed')
+            self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Submit one item and wait for its result, at most `timeout` seconds (default self.timeout)"""
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(item)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f'{self.name} returned no result within {timeout} s') from None
+
+    def close(self, timeout=None):
+        """Stop accepting items, finish the queued ones and stop the worker"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        _live_batchers.discard(self)
+        self._worker.join(timeout)
+
+    def _collect(self, first, jobs):
+        """Gather the rest of the batch started by `first`; returns (entries, stop)"""
+        entries = [first]
+        deadline = first[2] + self.max_wait
+        while len(entries) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = jobs.get(timeout=remaining) if remaining > 0 else jobs.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                return entries, True
+            entries.append(entry)
+        return entries, False
+
+    @staticmethod
+    def _run(ref, jobs):
+        stop = False
+        while not stop:
+            first = jobs.get()
+            batcher = ref()
+            if first is None or batcher is None:
+                return
+            entries, stop = batcher._collect(first, jobs)
+            batcher._process(entries)
+            del batcher
+
+    def _process(self, entries):
+        started = time.monotonic()
+        # Futures cancelled by their caller are dropped before the model runs
+        entries = [entry for entry in entries if entry[1].set_running_or_notify_cancel()]
+        if not entries:
+            return
+
+        try:
+            results = self.batch_fn([item for item, _, _ in entries])
+        except Exception as e:
+            self.errors += 1
+            if len(entries) == 1:
+                entries[0][1].set_exception(e)
+            else:
+                # One bad item must not fail the other callers' requests:
+                # score each item alone so only the failing ones get the error
+                for item, future, _ in entries:
+                    self._process_one(item, future)
+        else:
+            for (_, future, _), result in zip(entries, results):
+                future.set_result(result)
+        self._record(len(entries), [started - enqueued_at for _, _, enqueued_at in entries])
+
+    def _process_one(self, item, future):
+        try:
+            result, = self.batch_fn([item])
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _record(self, size, waits):
+        metrics.MICROBATCH_SIZE.labels(self.name).observe(size)
+        wait_histogram = metrics.MICROBATCH_WAIT.labels(self.name)
+        for wait in waits:
+            wait_histogram.observe(wait)
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            bucket = 1 << (size - 1).bit_length()
+            self.batch_size_buckets[bucket] = self.batch_size_buckets.get(bucket, 0) + 1
+            self._waits.extend(waits)
+
+    def stats(self):
+        with self._lock:
+            waits = np.array(self._waits) * 1000
+            buckets = dict(sorted(self.batch_size_buckets.items()))
+            batches, items = self.batches, self.items
+
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'items': items,
+            'errors': self.errors,
+            'queued': self._queue.qsize(),
+            'mean_batch_size': items / batches if batches else 0.0,
+            # Batch counts keyed by the smallest power of two >= the batch size
+            'batch_size_distribution': {f'<={bucket}': count for bucket, count in buckets.items()},
+            'queue_wait_ms': {
+                'mean': float(waits.mean()) if waits.size else 0.0,
+                'p50': float(np.percentile(waits, 50)) if waits.size else 0.0,
+                'p99': float(np.percentile(waits, 99)) if waits.size else 0.0,
+                'max': float(waits.max()) if waits.size else 0.0,
+            },
+        }
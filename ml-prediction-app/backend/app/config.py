@@ -0,0 +1,70 @@
+import os
+
+# Root of the ml-prediction-app project (holds data/, models/, static/ ...)
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def env_flag(name, default):
+    return os.environ.get(name, '1' if default else '0').lower() in ('1', 'true', 'yes', 'on')
+
+
+class Config:
+    # Model artifacts
+    MODEL_DIR = os.environ.get('MODEL_DIR', os.path.join(BASE_DIR, 'models'))
+    USE_MODEL_REGISTRY = env_flag('USE_MODEL_REGISTRY', True)
+
+    # Training data (falls back to synthetic data when the file is missing)
+    DIABETES_DATA_PATH = os.environ.get('DIABETES_DATA_PATH', os.path.join(BASE_DIR, 'data', 'diabetes.csv'))
+    DATA_CHUNK_SIZE = int(os.environ.get('DATA_CHUNK_SIZE', 100000))
+    # 'compiled' serves small diabetes batches from the flat-array forest in forest_engine.py
+    DIABETES_ENGINE = os.environ.get('DIABETES_ENGINE', 'sklearn')
+
+    # 'batch' trains TF-IDF + LogisticRegression on the seed sentences;
+    # 'online' streams HATE_SPEECH_DATA_PATH through a hashing + SGD model
+    HATE_SPEECH_TRAINING_MODE = os.environ.get('HATE_SPEECH_TRAINING_MODE', 'batch')
+    HATE_SPEECH_DATA_PATH = os.environ.get('HATE_SPEECH_DATA_PATH', os.path.join(BASE_DIR, 'data', 'hate_speech.csv'))
+    ONLINE_BATCH_SIZE = int(os.environ.get('ONLINE_BATCH_SIZE', 1000))
+    # 'compiled' scores the batch-mode TF-IDF model with the sparse-dot scorer in text_scorer.py
+    HATE_SPEECH_ENGINE = os.environ.get('HATE_SPEECH_ENGINE', 'sklearn')
+
+    # Batch prediction endpoints
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 10000))
+    BATCH_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', 1000))
+
+    # Micro-batching of concurrent single-item requests: a batch is run once it
+    # holds MICROBATCH_MAX_SIZE items or its oldest item has waited MICROBATCH_MAX_WAIT_MS
+    MICROBATCH_ENABLED = env_flag('MICROBATCH_ENABLED', False)
+    MICROBATCH_MAX_SIZE = int(os.environ.get('MICROBATCH_MAX_SIZE', 32))
+    MICROBATCH_MAX_WAIT_MS = float(os.environ.get('MICROBATCH_MAX_WAIT_MS', 2))
+    # Seconds a request waits for its micro-batched result before failing
+    MICROBATCH_TIMEOUT = float(os.environ.get('MICROBATCH_TIMEOUT', 30))
+
+    # Prometheus metrics on /metrics (request latency, inference stages, cache, batching, training)
+    METRICS_ENABLED = env_flag('METRICS_ENABLED', True)
+
+    # Hot model reload (POST /api/admin/reload): a new artifact is only swapped in if it
+    # reaches RELOAD_MIN_ACCURACY on the hold-out set. With MODEL_RELOAD_WATCH_INTERVAL > 0
+    # artifact files, and artifacts published by admin reloads in other workers, are
+    # checked for changes every that many seconds (gunicorn.conf.py defaults it to 2)
+    RELOAD_MIN_ACCURACY = float(os.environ.get('RELOAD_MIN_ACCURACY', 0.6))
+    MODEL_RELOAD_WATCH_INTERVAL = float(os.environ.get('MODEL_RELOAD_WATCH_INTERVAL', 0))
+    # /api/admin/* requests must send it in the X-Admin-Token header; the admin
+    # API is disabled while it is empty
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+    # Process pool size of the ASGI entry point (backend/asgi.py); 0 means one per CPU
+    ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', 0))
+
+    # Hate speech prediction cache (size 0 disables it, TTL 0 means no expiry)
+    HATE_SPEECH_CACHE_SIZE = int(os.environ.get('HATE_SPEECH_CACHE_SIZE', 4096))
+    HATE_SPEECH_CACHE_TTL = float(os.environ.get('HATE_SPEECH_CACHE_TTL', 0))
+
+    # Render dashboard charts at startup instead of on the first request
+    VISUALIZATIONS_PRERENDER = env_flag('VISUALIZATIONS_PRERENDER', False)
+    # Charts are drawn from incremental statistics of DIABETES_DATA_PATH; when enabled,
+    # every diabetes prediction request also adds its inputs (with the predicted outcome)
+    VISUALIZATIONS_LIVE_UPDATES = env_flag('VISUALIZATIONS_LIVE_UPDATES', False)
+    # Charts are rendered in a pool of this many processes (0 renders in the request thread);
+    # a render not done within VISUALIZATIONS_RENDER_TIMEOUT seconds fails with a 504
+    VISUALIZATIONS_RENDER_WORKERS = int(os.environ.get('VISUALIZATIONS_RENDER_WORKERS', 2))
+    VISUALIZATIONS_RENDER_TIMEOUT = float(os.environ.get('VISUALIZATIONS_RENDER_TIMEOUT', 30))
@@ -0,0 +1,70 @@
+import os
+
+# smaps_rollup fields reported per process (values in kB)
+MEMORY_FIELDS = {
+    'Rss': 'rss_kb',
+    'Pss': 'pss_kb',
+    'Shared_Clean': 'shared_clean_kb',
+    'Shared_Dirty': 'shared_dirty_kb',
+    'Private_Clean': 'private_clean_kb',
+    'Private_Dirty': 'private_dirty_kb',
+    'Swap': 'swap_kb',
+}
+
+
+def process_memory(pid='self'):
+    """RSS, PSS and shared/private memory of a process from /proc/<pid>/smaps_rollup
+
+    Returns None where the file is not available (non-Linux, or the process is gone).
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    memory = {'pid': os.getpid() if pid == 'self' else int(pid)}
+    for line in lines:
+        key, _, value = line.partition(':')
+        if key in MEMORY_FIELDS:
+            memory[MEMORY_FIELDS[key]] = int(value.split()[0])
+    memory['shared_kb'] = memory.get('shared_clean_kb', 0) + memory.get('shared_dirty_kb', 0)
+    memory['private_kb'] = memory.get('private_clean_kb', 0) + memory.get('private_dirty_kb', 0)
+    return memory
+
+
+def child_pids(parent_pid):
+    """PIDs of the direct children of a process (e.g. the workers of a gunicorn master)"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def memory_report(include_siblings=False):
+    """Memory of this process, plus its parent and sibling workers when pre-forked
+
+    PSS (proportional set size) splits shared pages between the processes mapping
+    them, so summing it over the master and workers gives the real footprint.
+    """
+    report = {'process': process_memory()}
+    if report['process'] is None:
+        return report
+
+    if include_siblings:
+        master_pid = os.getppid()
+        workers = [memory for memory in map(process_memory, child_pids(master_pid)) if memory]
+        master = process_memory(master_pid)
+        report['master'] = master
+        report['workers'] = workers
+        report['total_pss_kb'] = sum(memory['pss_kb'] for memory in workers + [master] if memory)
+    return report
@@ -0,0 +1,219 @@
+"""Minimal Prometheus metrics (counters, gauges, histograms) in the text exposition format
+
+Recording a sample is a dictionary lookup, a bisect and a short locked update,
+cheap enough for the inference hot path. set_enabled(False) turns every
+recording call into a no-op.
+"""
+import bisect
+import math
+import threading
+import time
+
+_enabled = True
+
+# Seconds; inference stages run from microseconds to a few hundred milliseconds
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                   0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    escaped = (
+        str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        for value in values
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if _enabled:
+            with self._lock:
+                self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value):
+        if _enabled:
+            self.value = float(value)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        if _enabled:
+            index = bisect.bisect_left(self.buckets, value)
+            with self._lock:
+                self.counts[index] += 1
+                self.sum += value
+
+
+class Metric:
+    TYPE = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The time series for one combination of label values"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}, got {values}')
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self, values, child):
+        yield self.name, _format_labels(self.labelnames, values), child.value
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+        for values, child in sorted(self._children.items()):
+            for name, labels, value in self._samples(values, child):
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    TYPE = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    TYPE = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    TYPE = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _samples(self, values, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames + ('le',), values + (_format_value(float(bound)),))
+            yield f'{self.name}_bucket', labels, cumulative
+        labels = _format_labels(self.labelnames, values)
+        yield f'{self.name}_sum', labels, total
+        yield f'{self.name}_count', labels, cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric, or return the one already registered under its name"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+REQUEST_LATENCY = histogram(
+    'http_request_duration_seconds', 'HTTP request latency by endpoint', ('method', 'endpoint', 'status')
+)
+STAGE_LATENCY = histogram(
+    'model_stage_duration_seconds',
+    'Inference time per model and stage (preprocess, vectorize, model, serialize)', ('model', 'stage')
+)
+BATCH_SIZE = histogram('model_batch_size', 'Items per infer_batch call', ('model',), SIZE_BUCKETS)
+CACHE_LOOKUPS = counter('prediction_cache_lookups_total', 'Prediction cache lookups by result', ('model', 'result'))
+MICROBATCH_SIZE = histogram(
+    'microbatch_batch_size', 'Requests merged into one micro-batch', ('batcher',), SIZE_BUCKETS
+)
+MICROBATCH_WAIT = histogram(
+    'microbatch_queue_wait_seconds', 'Time requests wait in the micro-batch queue', ('batcher',)
+)
+MODEL_LOAD_SECONDS = gauge('model_load_seconds', 'Duration of the last model artifact load', ('model',))
+MODEL_TRAIN_SECONDS = gauge('model_train_seconds', 'Duration of the last training run', ('model',))
+MODEL_ACCURACY = gauge('model_accuracy', 'Accuracy measured by the last training run', ('model',))
+MODEL_RELOADS = counter('model_reloads_total', 'Hot model reloads by result', ('model', 'result'))
+
+
+def observe_stage(model, stage, start):
+    """Record the time since `start` for one inference stage and return the current time"""
+    now = time.perf_counter()
+    if _enabled:
+        STAGE_LATENCY.labels(model, stage).observe(now - start)
+    return now
@@ -1,31 +1,61 @@
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
-import nltk
-import re
 import joblib
 import os
-
-# Download required NLTK data
-try:
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
-except:
-    pass
+import time
+from . import metrics
+from .cache import PredictionCache
+from .forest_engine import CompiledForest
+from .registry import ModelRegistry
+from .text_scorer import CompiledTextScorer
+from backend.utils.text_normalization import normalize_text, normalize_texts
+from backend.utils.data_loader import (
+    impute_missing_zeros, iter_text_chunks, load_diabetes_dataset, missing_value_fills
+)
 
 class HateSpeechDetector:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
-        self.model = LogisticRegression()
+    ARTIFACT_NAME = 'hate_speech'
+    ENGINES = ('sklearn', 'compiled')
+
+    def __init__(self, registry=None, cache_size=0, cache_ttl=None, engine='sklearn', artifact=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"engine must be one of {self.ENGINES}, got {engine!r}")
+        self.vectorizer = self._make_vectorizer()
+        self.model = self._make_model()
+        self.engine = engine
+        self.compiled = None
         self.is_trained = False
+        self.version = None
+        self.registry = registry
+        # Optional LRU cache of results keyed on the normalized text
+        self.cache = PredictionCache(cache_size, cache_ttl) if cache_size else None
         self._create_sample_data()
-        self.train()
+        if artifact is not None:
+            # Serve the given artifact as is (hot reload), without a fingerprint check
+            self.fingerprint = artifact.get('fingerprint')
+            self._apply_artifact(artifact)
+        else:
+            self.fingerprint = self._training_fingerprint()
+            if not self._load_from_registry():
+                self.train()
+    
+    def _make_vectorizer(self):
+        return TfidfVectorizer(max_features=5000, stop_words='english')
+    
+    def _make_model(self):
+        return LogisticRegression()
     
     def _create_sample_data(self):
+        self.X, self.y = self.sample_data()
+    
+    @staticmethod
+    def sample_data():
+        """The labelled seed sentences as (texts, labels), each sentence repeated 10 times"""
         # Sample hate speech data for demonstration
         hate_speech_data = [
     # Hateful / Offensive (label: )
@@ -344,21 +374,21 @@ class HateSpeechDetector:
         expanded_data = hate_speech_data * 10  # Repeat for more training data
         
         texts, labels = zip(*expanded_data)
-        self.X = list(texts)
-        self.y = list(labels)
+        return list(texts), list(labels)
     
     def preprocess_text(self, text):
-        # Convert to lowercase
-        text = text.lower()
-        # Remove special characters and digits
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        return text
+        # Lowercase, remove special characters and digits, collapse whitespace
+        return normalize_text(text)
+    
+    def preprocess_texts(self, texts):
+        # Same as preprocess_text, for a whole batch at once
+        return normalize_texts(texts)
     
     def train(self):
+        start = time.perf_counter()
+        
         # Preprocess texts
-        processed_texts = [self.preprocess_text(text) for text in self.X]
+        processed_texts = self.preprocess_texts(self.X)
         
         # Vectorize texts
         X_vectorized = self.vectorizer.fit_transform(processed_texts)
@@ -375,16 +405,21 @@ class HateSpeechDetector:
         y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         print(f"Hate Speech Model Accuracy: {accuracy:.2f}")
+        metrics.MODEL_ACCURACY.labels(self.ARTIFACT_NAME).set(accuracy)
+        metrics.MODEL_TRAIN_SECONDS.labels(self.ARTIFACT_NAME).set(time.perf_counter() - start)
         
         self.is_trained = True
+        self._compile()
+        self._clear_cache()
+        self._save_to_registry()
     
     def predict(self, text):
         if not self.is_trained:
             return "Model not trained"
         
         processed_text = self.preprocess_text(text)
-        vectorized_text = self.vectorizer.transform([processed_text])
-        prediction = self.model.predict(vectorized_text)[0]
+        probabilities = self._predict_proba([processed_text])
+        prediction = self.model.classes_[probabilities.argmax(axis=1)][0]
         
         return "Hate Speech" if prediction == 1 else "Normal Speech"
     
@@ -393,17 +428,305 @@ class HateSpeechDetector:
             return 0.0
         
         processed_text = self.preprocess_text(text)
-        vectorized_text = self.vectorizer.transform([processed_text])
-        probabilities = self.model.predict_proba(vectorized_text)[0]
+        probabilities = self._predict_proba([processed_text])[0]
         
         return max(probabilities)
+    
+    def infer(self, text):
+        """Label, hate probability and confidence from a single predict_proba call"""
+        return self.infer_batch([text])[0]
+    
+    def infer_batch(self, texts, chunk_size=1000):
+        """Run infer() over many texts with one transform and predict_proba per chunk"""
+        if not self.is_trained:
+            return [{'prediction': "Model not trained", 'probability': 0.0, 'confidence': 0.0}
+                    for _ in texts]
+        
+        metrics.BATCH_SIZE.labels(self.ARTIFACT_NAME).observe(len(texts))
+        results = []
+        for start in range(0, len(texts), chunk_size):
+            stage_start = time.perf_counter()
+            processed_texts = self.preprocess_texts(texts[start:start + chunk_size])
+            metrics.observe_stage(self.ARTIFACT_NAME, 'preprocess', stage_start)
+            
+            # Only vectorize and score the texts the cache has not seen yet
+            chunk_results = [self._cache_get(text) for text in processed_texts]
+            missing = [i for i, result in enumerate(chunk_results) if result is None]
+            if missing:
+                probabilities = self._predict_proba([processed_texts[i] for i in missing])
+                stage_start = time.perf_counter()
+                for i, result in zip(missing, self._interpret(probabilities)):
+                    chunk_results[i] = result
+                    self._cache_put(processed_texts[i], result)
+                metrics.observe_stage(self.ARTIFACT_NAME, 'serialize', stage_start)
+            
+            results.extend(chunk_results)
+        
+        return results
+    
+    def _compile(self):
+        if self.engine == 'compiled':
+            self.compiled = CompiledTextScorer(self.vectorizer, self.model)
+        else:
+            self.compiled = None
+    
+    def _predict_proba(self, processed_texts):
+        """predict_proba for normalized texts, through the compiled scorer when enabled"""
+        stage_start = time.perf_counter()
+        if self.compiled is not None:
+            # The compiled scorer vectorizes and scores in one pass
+            probabilities = self.compiled.predict_proba(processed_texts)
+        else:
+            vectorized_texts = self.vectorizer.transform(processed_texts)
+            stage_start = metrics.observe_stage(self.ARTIFACT_NAME, 'vectorize', stage_start)
+            probabilities = self.model.predict_proba(vectorized_texts)
+        metrics.observe_stage(self.ARTIFACT_NAME, 'model', stage_start)
+        return probabilities
+    
+    def _cache_get(self, processed_text):
+        if self.cache is None:
+            return None
+        result = self.cache.get(processed_text)
+        metrics.CACHE_LOOKUPS.labels(self.ARTIFACT_NAME, 'miss' if result is None else 'hit').inc()
+        return dict(result) if result is not None else None
+    
+    def _cache_put(self, processed_text, result):
+        if self.cache is not None:
+            self.cache.put(processed_text, dict(result))
+    
+    def _clear_cache(self):
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def _interpret(self, probabilities):
+        labels = self.model.classes_[probabilities.argmax(axis=1)]
+        hate_index = list(self.model.classes_).index(1)
+        return [
+            {
+                'prediction': "Hate Speech" if label == 1 else "Normal Speech",
+                'probability': float(proba[hate_index]),
+                'confidence': float(proba.max())
+            }
+            for label, proba in zip(labels, probabilities)
+        ]
+    
+    def holdout_accuracy(self):
+        """Accuracy on the same 20% hold-out split of the seed sentences that train() reports"""
+        _, X_test, _, y_test = train_test_split(self.X, self.y, test_size=0.2, random_state=42)
+        probabilities = self._predict_proba(self.preprocess_texts(X_test))
+        return accuracy_score(y_test, self.model.classes_[probabilities.argmax(axis=1)])
+    
+    def _training_fingerprint(self):
+        return ModelRegistry.fingerprint(
+            self.ARTIFACT_NAME, self.X, self.y,
+            self.vectorizer.get_params(), self.model.get_params()
+        )
+    
+    def _load_from_registry(self):
+        if self.registry is None:
+            return False
+        
+        start = time.perf_counter()
+        artifact = self.registry.load(self.ARTIFACT_NAME, self.fingerprint)
+        if artifact is None:
+            return False
+        
+        self._apply_artifact(artifact)
+        metrics.MODEL_LOAD_SECONDS.labels(self.ARTIFACT_NAME).set(time.perf_counter() - start)
+        return True
+    
+    def _apply_artifact(self, artifact):
+        self.vectorizer = artifact['vectorizer']
+        self.model = artifact['model']
+        self.is_trained = True
+        self.version = ModelRegistry.version_of(artifact)
+        self._compile()
+        self._clear_cache()
+    
+    def _save_to_registry(self):
+        if self.registry is not None:
+            artifact = self.registry.save(self.ARTIFACT_NAME, self.fingerprint,
+                                          vectorizer=self.vectorizer, model=self.model)
+            self.version = ModelRegistry.version_of(artifact)
+        else:
+            self.version = self.fingerprint[:12]
+
+class StreamingHateSpeechDetector(HateSpeechDetector):
+    """Out-of-core hate speech model trained in mini-batches on a text corpus
+
+    Uses a stateless HashingVectorizer and an SGD logistic regression updated
+    with partial_fit, so memory stays flat however large the corpus grows.
+    Corpus lines without a label are labelled by the batch TF-IDF model (the
+    teacher), so agreement on those rows measures agreement with the teacher,
+    not accuracy. Accuracy is measured on seed sentences kept out of training.
+    """
+    ARTIFACT_NAME = 'hate_speech_online'
+    # Share of the distinct seed sentences held out of training for holdout_accuracy()
+    HOLDOUT_FRACTION = 0.2
+    
+    def __init__(self, corpus_path, registry=None, cache_size=0, cache_ttl=None,
+                 batch_size=1000, checkpoint_every=10, label_fn=None, artifact=None):
+        self.corpus_path = corpus_path
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.label_fn = label_fn
+        self.rows_seen = 0
+        self.teacher_agreement = None
+        self.accuracy = None
+        self.rows_per_second = None
+        super().__init__(registry=registry, cache_size=cache_size, cache_ttl=cache_ttl, artifact=artifact)
+    
+    def _make_vectorizer(self):
+        return HashingVectorizer(n_features=2 ** 18, alternate_sign=False, stop_words='english')
+    
+    def _make_model(self):
+        return SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+    
+    def _training_fingerprint(self):
+        return ModelRegistry.fingerprint(
+            super()._training_fingerprint(),
+            ModelRegistry.file_digest(self.corpus_path), self.batch_size, self.HOLDOUT_FRACTION
+        )
+    
+    def split_seed_sentences(self):
+        """(training, hold-out) lists of labelled seed (text, label) pairs
+
+        Each seed sentence appears 10 times, so the split is made by distinct
+        sentence: no copy of a held-out sentence is ever trained on.
+        """
+        sentences = sorted(set(zip(self.X, self.y)))
+        _, holdout = train_test_split(sentences, test_size=self.HOLDOUT_FRACTION, random_state=42,
+                                      stratify=[label for _, label in sentences])
+        held_out = set(holdout)
+        return [pair for pair in zip(self.X, self.y) if pair not in held_out], holdout
+    
+    def holdout_accuracy(self):
+        """Accuracy on the held-out seed sentences, which training never sees"""
+        _, holdout = self.split_seed_sentences()
+        texts = [text for text, _ in holdout]
+        probabilities = self._predict_proba(self.preprocess_texts(texts))
+        labels = [label for _, label in holdout]
+        return accuracy_score(labels, self.model.classes_[probabilities.argmax(axis=1)])
+    
+    def _teacher_labels(self, texts):
+        if self.label_fn is None:
+            teacher = HateSpeechDetector(registry=self.registry)
+            self.label_fn = lambda batch: [
+                1 if result['probability'] >= 0.5 else 0 for result in teacher.infer_batch(batch)
+            ]
+        return self.label_fn(texts)
+    
+    def iter_training_batches(self, skip=0):
+        """Yield (texts, labels, from_teacher): the training seed sentences, then the corpus
+
+        from_teacher flags the labels the teacher model produced. The held-out
+        seed sentences are never yielded. The first `skip` batches (already
+        trained on before a resume) are passed over without asking the teacher
+        for their labels.
+        """
+        seed, _ = self.split_seed_sentences()
+        order = np.random.RandomState(42).permutation(len(seed))
+        seed = [seed[i] for i in order]
+        batch_index = 0
+        for start in range(0, len(seed), self.batch_size):
+            if batch_index >= skip:
+                batch = seed[start:start + self.batch_size]
+                yield [text for text, _ in batch], [label for _, label in batch], [False] * len(batch)
+            batch_index += 1
+        
+        for texts, labels in iter_text_chunks(self.corpus_path, self.batch_size):
+            batch_index += 1
+            if batch_index <= skip:
+                continue
+            from_teacher = [label is None for label in labels]
+            missing = [i for i, unlabelled in enumerate(from_teacher) if unlabelled]
+            if missing:
+                for i, label in zip(missing, self._teacher_labels([texts[i] for i in missing])):
+                    labels[i] = label
+            yield texts, labels, from_teacher
+    
+    def train(self, resume=True):
+        checkpoint_name = f'{self.ARTIFACT_NAME}_checkpoint'
+        start_batch = agreed = compared = 0
+        
+        # Resume from the last checkpoint written for the same data and settings
+        checkpoint = None
+        if resume and self.registry is not None:
+            checkpoint = self.registry.load(checkpoint_name, self.fingerprint)
+        if checkpoint is not None:
+            self.model = checkpoint['model']
+            start_batch = checkpoint['batches_done']
+            self.rows_seen = checkpoint['rows_seen']
+            agreed, compared = checkpoint['agreed'], checkpoint['compared']
+        
+        rows_trained = 0
+        start = time.perf_counter()
+        batches = self.iter_training_batches(skip=start_batch)
+        for batch_index, (texts, labels, from_teacher) in enumerate(batches, start=start_batch):
+            X_batch = self.vectorizer.transform(self.preprocess_texts(texts))
+            y_batch = np.asarray(labels)
+            
+            # Test-then-train: compare each batch with the teacher's labels before the model learns from it
+            teacher_rows = np.asarray(from_teacher)
+            if self.rows_seen and teacher_rows.any():
+                predictions = self.model.predict(X_batch[teacher_rows])
+                agreed += int((predictions == y_batch[teacher_rows]).sum())
+                compared += int(teacher_rows.sum())
+            
+            self.model.partial_fit(X_batch, y_batch, classes=[0, 1])
+            self.rows_seen += len(y_batch)
+            rows_trained += len(y_batch)
+            
+            if self.registry is not None and (batch_index + 1) % self.checkpoint_every == 0:
+                self.registry.save(checkpoint_name, self.fingerprint, model=self.model,
+                                   batches_done=batch_index + 1, rows_seen=self.rows_seen,
+                                   agreed=agreed, compared=compared)
+        
+        elapsed = time.perf_counter() - start
+        self.rows_per_second = rows_trained / elapsed if elapsed else None
+        self.teacher_agreement = agreed / compared if compared else None
+        self.accuracy = self.holdout_accuracy()
+        agreement = f'{self.teacher_agreement:.2f}' if self.teacher_agreement is not None else 'n/a'
+        print(f"Hate Speech (online) Hold-out Accuracy: {self.accuracy:.2f}, "
+              f"Teacher Agreement: {agreement} ({self.rows_seen} rows, {self.rows_per_second or 0:.0f} rows/s)")
+        metrics.MODEL_ACCURACY.labels(self.ARTIFACT_NAME).set(self.accuracy)
+        metrics.MODEL_TRAIN_SECONDS.labels(self.ARTIFACT_NAME).set(elapsed)
+        
+        self.is_trained = True
+        self._clear_cache()
+        self._save_to_registry()
+        if self.registry is not None:
+            self.registry.delete(checkpoint_name)
 
 class DiabetesPredictor:
-    def __init__(self):
+    ARTIFACT_NAME = 'diabetes'
+    ENGINES = ('sklearn', 'compiled')
+    # Above this many rows scikit-learn's own tree traversal is faster than the compiled engine
+    ENGINE_MAX_ROWS = 512
+
+    def __init__(self, registry=None, data_path=None, chunk_size=100000, engine='sklearn', artifact=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"engine must be one of {self.ENGINES}, got {engine!r}")
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.engine = engine
+        self.compiled = None
         self.is_trained = False
-        self._create_sample_data()
-        self.train()
+        self.version = None
+        self.registry = registry
+        # Train on a CSV export when given one, otherwise on synthetic data
+        self.data_path = data_path
+        self.chunk_size = chunk_size
+        # Training medians used to impute "not measured" zeros at inference time
+        self.fill_values = {}
+        self.X = self.y = None
+        if artifact is not None:
+            # Serve the given artifact as is (hot reload), without a fingerprint check
+            self.fingerprint = artifact.get('fingerprint')
+            self._apply_artifact(artifact)
+        else:
+            self.fingerprint = self._training_fingerprint()
+            if not self._load_from_registry():
+                self.train()
     
     def _create_sample_data(self):
         # Create synthetic diabetes dataset
@@ -438,7 +761,20 @@ class DiabetesPredictor:
         ])
         self.y = outcome.astype(int)
     
+    def _load_training_data(self):
+        if self.data_path:
+            # Streamed in chunks with float32/int8 dtypes and zeros treated as missing
+            self.X, self.y = load_diabetes_dataset(self.data_path, self.chunk_size)
+            self.fill_values = missing_value_fills(self.X)
+        else:
+            self._create_sample_data()
+            self.fill_values = {}
+    
     def train(self):
+        start = time.perf_counter()
+        if self.X is None:
+            self._load_training_data()
+        
         X_train, X_test, y_train, y_test = train_test_split(
             self.X, self.y, test_size=0.2, random_state=42
         )
@@ -448,15 +784,87 @@ class DiabetesPredictor:
         y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         print(f"Diabetes Model Accuracy: {accuracy:.2f}")
+        metrics.MODEL_ACCURACY.labels(self.ARTIFACT_NAME).set(accuracy)
+        metrics.MODEL_TRAIN_SECONDS.labels(self.ARTIFACT_NAME).set(time.perf_counter() - start)
         
         self.is_trained = True
+        self._compile()
+        self._save_to_registry()
+    
+    def _training_fingerprint(self):
+        if self.data_path:
+            # Hash the file itself so a cached artifact can be used without parsing the CSV.
+            # Duplicates are dropped and gaps filled per chunk, so the training rows
+            # also depend on the chunk size.
+            data_digest = (ModelRegistry.file_digest(self.data_path), self.chunk_size)
+        else:
+            self._load_training_data()
+            data_digest = ModelRegistry.fingerprint(self.X, self.y)
+        
+        return ModelRegistry.fingerprint(
+            self.ARTIFACT_NAME, data_digest, self.model.get_params()
+        )
+    
+    def _load_from_registry(self):
+        if self.registry is None:
+            return False
+        
+        start = time.perf_counter()
+        artifact = self.registry.load(self.ARTIFACT_NAME, self.fingerprint)
+        if artifact is None:
+            return False
+        
+        self._apply_artifact(artifact)
+        metrics.MODEL_LOAD_SECONDS.labels(self.ARTIFACT_NAME).set(time.perf_counter() - start)
+        return True
+    
+    def _apply_artifact(self, artifact):
+        self.model = artifact['model']
+        self.fill_values = artifact.get('fill_values', {})
+        self.is_trained = True
+        self.version = ModelRegistry.version_of(artifact)
+        self._compile()
+    
+    def _save_to_registry(self):
+        if self.registry is not None:
+            artifact = self.registry.save(self.ARTIFACT_NAME, self.fingerprint,
+                                          model=self.model, fill_values=self.fill_values)
+            self.version = ModelRegistry.version_of(artifact)
+        else:
+            self.version = self.fingerprint[:12]
+    
+    def holdout_accuracy(self):
+        """Accuracy on the same 20% hold-out split that train() reports"""
+        if self.X is None:
+            # Models loaded from an artifact keep the artifact's imputation values
+            fill_values = self.fill_values
+            self._load_training_data()
+            self.fill_values = fill_values
+        
+        _, X_test, _, y_test = train_test_split(self.X, self.y, test_size=0.2, random_state=42)
+        probabilities = self._predict_proba(self._prepare_features(X_test))
+        return accuracy_score(y_test, self.model.classes_[probabilities.argmax(axis=1)])
+    
+    def _compile(self):
+        self.compiled = CompiledForest(self.model) if self.engine == 'compiled' else None
+    
+    def _prepare_features(self, rows):
+        return impute_missing_zeros(rows, self.fill_values)
+    
+    def _predict_proba(self, features_array):
+        """predict_proba through the compiled engine when enabled and applicable"""
+        if (self.compiled is not None and len(features_array) <= self.ENGINE_MAX_ROWS
+                and self.compiled.supports(features_array)):
+            return self.compiled.predict_proba(features_array)
+        return self.model.predict_proba(features_array)
     
     def predict(self, features):
         if not self.is_trained:
             return 0
         
-        features_array = np.array(features).reshape(1, -1)
-        prediction = self.model.predict(features_array)[0]
+        features_array = self._prepare_features(np.array(features).reshape(1, -1))
+        probabilities = self._predict_proba(features_array)
+        prediction = self.model.classes_[probabilities.argmax(axis=1)][0]
         
         return prediction
     
@@ -464,7 +872,40 @@ class DiabetesPredictor:
         if not self.is_trained:
             return 0.0
         
-        features_array = np.array(features).reshape(1, -1)
-        probability = self.model.predict_proba(features_array)[0][1]
+        features_array = self._prepare_features(np.array(features).reshape(1, -1))
+        probability = self._predict_proba(features_array)[0][1]
         
         return probability
+    
+    def infer(self, features):
+        """Label, diabetes probability and confidence from a single predict_proba call"""
+        return self.infer_batch([features])[0]
+    
+    def infer_batch(self, rows, chunk_size=1000):
+        """Run infer() over many feature rows with one predict_proba per chunk"""
+        if not self.is_trained:
+            return [{'prediction': 0, 'probability': 0.0, 'confidence': 0.0} for _ in rows]
+        
+        metrics.BATCH_SIZE.labels(self.ARTIFACT_NAME).observe(len(rows))
+        results = []
+        for start in range(0, len(rows), chunk_size):
+            stage_start = time.perf_counter()
+            features_array = self._prepare_features(rows[start:start + chunk_size])
+            stage_start = metrics.observe_stage(self.ARTIFACT_NAME, 'preprocess', stage_start)
+            probabilities = self._predict_proba(features_array)
+            stage_start = metrics.observe_stage(self.ARTIFACT_NAME, 'model', stage_start)
+            results.extend(self._interpret(probabilities))
+            metrics.observe_stage(self.ARTIFACT_NAME, 'serialize', stage_start)
+        
+        return results
+    
+    def _interpret(self, probabilities):
+        labels = self.model.classes_[probabilities.argmax(axis=1)]
+        return [
+            {
+                'prediction': int(label),
+                'probability': float(proba[1]),
+                'confidence': float(proba.max())
+            }
+            for label, proba in zip(labels, probabilities)
+        ]
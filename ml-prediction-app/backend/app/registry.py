@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import sklearn
+
+
+class ModelRegistry:
+    """Store fitted models on disk as versioned joblib artifacts"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(*parts):
+        """Content hash of training data and hyperparameters"""
+        digest = hashlib.sha256()
+        # Artifacts are only valid for the scikit-learn version that pickled them
+        digest.update(sklearn.__version__.encode())
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                digest.update(str(part.dtype).encode())
+                digest.update(str(part.shape).encode())
+                digest.update(np.ascontiguousarray(part).tobytes())
+            elif isinstance(part, dict):
+                digest.update(repr(sorted(part.items())).encode())
+            else:
+                digest.update(repr(part).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_digest(path, block_size=1 << 20):
+        """Hash a data file in blocks without loading it into memory"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def version_of(artifact):
+        """Short identifier of an artifact, reported as the model version"""
+        return artifact.get('version') or str(artifact.get('fingerprint', ''))[:12]
+
+    def path(self, name):
+        return os.path.join(self.root, f'{name}.joblib')
+
+    def load(self, name, fingerprint=None):
+        """Load an artifact, or return None if it is missing or stale
+
+        Artifacts are not memory-mapped: scikit-learn copies a forest's node
+        arrays into its own memory on unpickling, so mapping the file would not
+        share them between processes. Preload the app under gunicorn instead.
+        """
+        path = self.path(name)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            artifact = joblib.load(path)
+        except Exception:
+            return None
+
+        if fingerprint is not None and artifact.get('fingerprint') != fingerprint:
+            return None
+        return artifact
+
+    def published_path(self, name):
+        return os.path.join(self.root, f'{name}.published.json')
+
+    def publish(self, name, artifact_name, version):
+        """Record that model `name` now serves `artifact_name`, for other processes to follow"""
+        def write(path):
+            with open(path, 'w') as f:
+                json.dump({'artifact': artifact_name, 'version': version}, f)
+
+        self._write_atomically(self.published_path(name), write)
+
+    def published(self, name):
+        """{'artifact', 'version'} last published for model `name`, or None"""
+        try:
+            with open(self.published_path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, name):
+        if os.path.exists(self.path(name)):
+            os.remove(self.path(name))
+
+    def save(self, name, fingerprint, **components):
+        """Write an artifact atomically so concurrent workers never see a partial file"""
+        created_at = time.time()
+        artifact = {
+            'name': name,
+            'fingerprint': fingerprint,
+            'created_at': created_at,
+            # Changes on every save, even when retraining on the same data
+            'version': f'{fingerprint[:12]}-{int(created_at * 1000):x}',
+            'sklearn_version': sklearn.__version__,
+        }
+        artifact.update(components)
+        self._write_atomically(self.path(name), lambda path: joblib.dump(artifact, path))
+        return artifact
+
+    def _write_atomically(self, path, write):
+        """Call write(tmp_path) and move the result into place in one step"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
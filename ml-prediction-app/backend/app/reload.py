@@ -0,0 +1,210 @@
+"""Hot model reload: load, validate and atomically swap in a new model artifact"""
+import os
+import re
+import threading
+import time
+import weakref
+
+from . import metrics
+
+# Registry artifact names: a file name inside MODEL_DIR, never a path
+ARTIFACT_NAME_PATTERN = re.compile(r'\w[\w.-]*')
+
+# Watchers whose polling thread is restarted in forked children, held weakly
+# so a watcher nobody references any more is collected and not restarted
+_live_watchers = weakref.WeakSet()
+
+
+def _restart_after_fork():
+    for watcher in list(_live_watchers):
+        watcher._start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class ModelHolder:
+    """The model currently serving one endpoint family
+
+    Request handlers read `model` once and use that object for the whole
+    request. A reload builds and validates a new model in a background thread
+    and then replaces the attribute in a single assignment, so in-flight
+    requests finish on the old model, new requests get the new one, and the
+    old model is freed once its last request is done.
+    """
+
+    def __init__(self, name, model, factory, min_accuracy=0.0):
+        self.name = name
+        self.model = model
+        # factory(artifact) builds a model of this kind serving the given artifact
+        self.factory = factory
+        self.min_accuracy = min_accuracy
+        self.status = {'state': 'idle'}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.model.version
+
+    def infer(self, item):
+        """(result, model version) for one item"""
+        model = self.model
+        return model.infer(item), model.version
+
+    def infer_batch(self, items):
+        """(result, model version) pairs, all from the same model"""
+        model = self.model
+        return [(result, model.version) for result in model.infer_batch(items)]
+
+    def artifact_path(self, artifact_name=None):
+        """File of the artifact a reload would load, or None without a registry"""
+        registry = self.model.registry
+        if registry is None:
+            return None
+        return registry.path(artifact_name or self.model.ARTIFACT_NAME)
+
+    def published_path(self):
+        """File recording the artifact last published for this model, or None without a registry"""
+        registry = self.model.registry
+        return None if registry is None else registry.published_path(self.model.ARTIFACT_NAME)
+
+    def published(self):
+        """{'artifact', 'version'} last published for this model, or None"""
+        registry = self.model.registry
+        return None if registry is None else registry.published(self.model.ARTIFACT_NAME)
+
+    def reload(self, artifact_name=None, wait=False, publish=False):
+        """Load, validate and swap in a registry artifact in a background thread
+
+        artifact_name defaults to the model's own artifact. With publish, a
+        successful reload is also recorded in the registry, so the artifact
+        watchers of other processes (sibling gunicorn workers) switch to it too.
+        Returns False if a reload of this model is already running.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+
+        self.status = {'state': 'loading', 'artifact': artifact_name or self.model.ARTIFACT_NAME,
+                       'started_at': time.time()}
+        thread = threading.Thread(target=self._reload, args=(artifact_name, publish),
+                                  name=f'{self.name}-reload', daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def _reload(self, artifact_name, publish):
+        start = time.perf_counter()
+        previous = self.model
+        try:
+            candidate = self._load_candidate(artifact_name)
+            # Scoring the hold-out set also warms the candidate up before it takes traffic
+            accuracy = candidate.holdout_accuracy()
+            if accuracy < self.min_accuracy:
+                raise ValueError(f'hold-out accuracy {accuracy:.3f} is below the minimum {self.min_accuracy}')
+        except Exception as e:
+            metrics.MODEL_RELOADS.labels(self.name, 'failed').inc()
+            self.status = dict(self.status, state='failed', error=f'{type(e).__name__}: {e}',
+                               seconds=time.perf_counter() - start)
+        else:
+            self.model = candidate
+            metrics.MODEL_RELOADS.labels(self.name, 'success').inc()
+            self.status = dict(self.status, state='ready', version=candidate.version,
+                               previous_version=previous.version, holdout_accuracy=accuracy,
+                               seconds=time.perf_counter() - start)
+            if publish:
+                self._publish(candidate)
+        finally:
+            self._lock.release()
+
+    def _publish(self, model):
+        try:
+            model.registry.publish(model.ARTIFACT_NAME, self.status['artifact'], model.version)
+        except OSError as e:
+            self.status = dict(self.status, published=False, publish_error=str(e))
+        else:
+            self.status = dict(self.status, published=True)
+
+    def _load_candidate(self, artifact_name):
+        registry = self.model.registry
+        if registry is None:
+            raise ValueError('the model registry is disabled (USE_MODEL_REGISTRY)')
+
+        name = artifact_name or self.model.ARTIFACT_NAME
+        artifact = registry.load(name)
+        if artifact is None:
+            raise ValueError(f'no readable artifact {name!r} in {registry.root}')
+        return self.factory(artifact)
+
+    def describe(self):
+        return {'version': self.version, 'reload': self.status}
+
+
+class ArtifactWatcher:
+    """Reload models whenever their registry artifact or published artifact changes on disk
+
+    Registry saves replace files atomically, so a changed modification time
+    always means a complete new file. A model's own artifact file is reloaded
+    when it changes; a newly published artifact (an admin reload made in
+    another process) is loaded unless it is already serving. The polling
+    thread is restarted in forked children, so every pre-forked gunicorn
+    worker watches for itself.
+    """
+
+    def __init__(self, holders, interval):
+        self.holders = list(holders)
+        self.interval = interval
+        self._mtimes = {}
+        for holder in self.holders:
+            for path in (holder.artifact_path(), holder.published_path()):
+                self._mtimes[path] = self._mtime(path)
+        self._stop = threading.Event()
+        self._start()
+        _live_watchers.add(self)
+
+    def _start(self):
+        if self._stop.is_set():
+            return
+        # The thread only holds a weak reference and exits once the watcher is collected
+        self._thread = threading.Thread(target=ArtifactWatcher._run,
+                                        args=(weakref.ref(self), self.interval, self._stop),
+                                        name='artifact-watcher', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    @staticmethod
+    def _run(ref, interval, stop):
+        while not stop.wait(interval):
+            watcher = ref()
+            if watcher is None:
+                return
+            watcher.check()
+            del watcher
+
+    def check(self):
+        """Reload every holder whose artifact changed, or was published, since the last check"""
+        for holder in self.holders:
+            # A busy holder is retried on the next check
+            path = holder.published_path()
+            mtime = self._mtime(path)
+            if mtime is not None and mtime != self._mtimes.get(path):
+                published = holder.published()
+                if (published is None or published.get('version') == holder.version
+                        or holder.reload(published.get('artifact'))):
+                    self._mtimes[path] = mtime
+                continue
+
+            path = holder.artifact_path()
+            mtime = self._mtime(path)
+            if mtime is not None and mtime != self._mtimes.get(path) and holder.reload():
+                self._mtimes[path] = mtime
+
+    def close(self):
+        self._stop.set()
+        _live_watchers.discard(self)
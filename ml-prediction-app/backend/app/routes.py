@@ -1,20 +1,335 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, g, render_template, request, jsonify, stream_with_context, url_for
 from flask_cors import CORS
 import numpy as np
 import pandas as pd
-from .models import HateSpeechDetector, DiabetesPredictor
-from backend.utils.visualization import create_visualizations
+from . import metrics
+from .batching import MicroBatcher
+from .config import Config
+from .memory import memory_report
+from .models import HateSpeechDetector, DiabetesPredictor, StreamingHateSpeechDetector
+from .registry import ModelRegistry
+from .reload import ARTIFACT_NAME_PATTERN, ArtifactWatcher, ModelHolder
+from backend.utils.data_loader import impute_missing_zeros
+from backend.utils.visualization import ChartRenderer, RenderTimeout, VisualizationCache
+import hmac
+import io
+import itertools
+import json
+import math
 import os
+import time
 
-def create_app():
+# Response header naming the model version that served a prediction
+MODEL_VERSION_HEADER = 'X-Model-Version'
+
+DIABETES_FIELDS = [
+    'pregnancies', 'glucose', 'blood_pressure', 'skin_thickness',
+    'insulin', 'bmi', 'diabetes_pedigree', 'age'
+]
+
+def extract_diabetes_features(data):
+    """Build the model feature row from a request record; ValueError unless every field is a finite number"""
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    
+    features = []
+    for field in DIABETES_FIELDS:
+        value = data.get(field, 0)
+        # Form inputs arrive as numeric strings. float() would also take a bool,
+        # so true/false, null, lists and objects are refused before it
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f'{field} must be a number')
+        try:
+            value = float(value)
+        except (ValueError, OverflowError):
+            raise ValueError(f'{field} must be a number') from None
+        # The model rejects a whole batch that holds inf or NaN, so refuse the record here
+        if not math.isfinite(value):
+            raise ValueError(f'{field} must be a finite number')
+        features.append(value)
+    return features
+
+def risk_level(probability):
+    return 'High' if probability > 0.7 else 'Medium' if probability > 0.3 else 'Low'
+
+def check_batch_items(data, key, max_items):
+    """Validate a batch request body and return (items, error_message, status)"""
+    items = data.get(key) if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return None, f'Expected a non-empty "{key}" list', 400
+    if len(items) > max_items:
+        return None, f'Batch too large: {len(items)} items (max {max_items})', 413
+    return items, None, 200
+
+def get_batch_items(key, max_items):
+    """Validate a batch request body and return (items, error_response)"""
+    items, error, status = check_batch_items(request.get_json(silent=True) or {}, key, max_items)
+    if error:
+        return None, (jsonify({'error': error}), status)
+    return items, None
+
+def score_hate_speech_batch(texts, infer_batch, chunk_size):
+    """Per-item results for a hate speech batch request"""
+    # Items without text get the same error as the single-item endpoint
+    results = [{'error': 'No text provided'} for _ in texts]
+    valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text]
+    
+    predictions = infer_batch([texts[i] for i in valid], chunk_size=chunk_size)
+    for i, result in zip(valid, predictions):
+        results[i] = {
+            'prediction': result['prediction'],
+            'confidence': result['confidence'],
+            'text': texts[i]
+        }
+    return results
+
+def score_diabetes_batch(records, infer_batch, chunk_size):
+    """Per-item results for a diabetes batch request"""
+    results = [None] * len(records)
+    valid, rows = [], []
+    for i, record in enumerate(records):
+        try:
+            rows.append(extract_diabetes_features(record))
+            valid.append(i)
+        except ValueError as e:
+            results[i] = {'error': str(e)}
+    
+    predictions = infer_batch(rows, chunk_size=chunk_size)
+    for i, result in zip(valid, predictions):
+        results[i] = {
+            'prediction': result['prediction'],
+            'probability': result['probability'],
+            'risk_level': risk_level(result['probability'])
+        }
+    return results
+
+# Streaming endpoints score their first records in a small chunk, so results
+# start flowing at once, then double the chunk size up to BATCH_CHUNK_SIZE
+STREAM_FIRST_CHUNK = 16
+# Stands in for an NDJSON line that is not valid JSON
+INVALID_LINE = object()
+
+def iter_body_lines(stream):
+    """Lines of a WSGI input stream as they arrive
+
+    Werkzeug's own streams are unbuffered and would be read one byte per call,
+    so they go through a buffer. Other servers' streams (gunicorn's) buffer
+    their lines already and are read as they are.
+    """
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream)
+    return iter(stream.readline, b'')
+
+def parse_ndjson_line(line):
+    """The record on one NDJSON line: None for a blank line, INVALID_LINE if it is not JSON"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return INVALID_LINE
+
+def ndjson_texts(records):
+    """Hate speech texts of NDJSON records: a JSON string or an object with a "text" field"""
+    return [record.get('text') if isinstance(record, dict) else record for record in records]
+
+def format_ndjson_results(records, results, first_row):
+    """NDJSON block of results numbered from first_row, flagging the records that were not JSON"""
+    lines = []
+    for row, (record, result) in enumerate(zip(records, results), start=first_row):
+        if record is INVALID_LINE:
+            result = {'error': 'Invalid JSON'}
+        lines.append(json.dumps(dict(row=row, **result)))
+    return '\n'.join(lines) + '\n'
+
+def iter_ndjson_chunks(lines, first_chunk, max_chunk):
+    """Parse NDJSON lines into lists of records, growing from first_chunk to max_chunk records"""
+    chunk, size = [], first_chunk
+    for line in lines:
+        record = parse_ndjson_line(line)
+        if record is None:
+            continue
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk, size = [], min(size * 2, max_chunk)
+    if chunk:
+        yield chunk
+
+def stream_ndjson_results(chunks, score):
+    """Score chunks of records and yield one block of NDJSON result lines per chunk
+
+    Each result carries the 0-based `row` of its record among the non-empty
+    input lines. An error that stops the job is reported as a last line.
+    """
+    row = 0
+    try:
+        for records in chunks:
+            yield format_ndjson_results(records, score(records), row)
+            row += len(records)
+    except Exception as e:
+        yield json.dumps({'error': str(e), 'rows_done': row}) + '\n'
+
+def model_factories(config):
+    """Constructors of the hate speech and diabetes models described by a config mapping
+
+    Called without arguments, a constructor loads the fitted artifact from the
+    model registry, or trains the model if there is none. Called with a registry
+    artifact, it serves that artifact as is (used by hot reloads).
+    """
+    registry = None
+    if config['USE_MODEL_REGISTRY']:
+        registry = ModelRegistry(config['MODEL_DIR'])
+    
+    cache_options = {
+        'cache_size': config['HATE_SPEECH_CACHE_SIZE'],
+        'cache_ttl': config['HATE_SPEECH_CACHE_TTL']
+    }
+    
+    def hate_speech(artifact=None):
+        if config['HATE_SPEECH_TRAINING_MODE'] == 'online':
+            return StreamingHateSpeechDetector(
+                config['HATE_SPEECH_DATA_PATH'],
+                registry=registry,
+                batch_size=config['ONLINE_BATCH_SIZE'],
+                artifact=artifact,
+                **cache_options
+            )
+        return HateSpeechDetector(
+            registry=registry, engine=config['HATE_SPEECH_ENGINE'], artifact=artifact, **cache_options
+        )
+    
+    def diabetes(artifact=None):
+        diabetes_data_path = config['DIABETES_DATA_PATH']
+        return DiabetesPredictor(
+            registry=registry,
+            data_path=diabetes_data_path if diabetes_data_path and os.path.exists(diabetes_data_path) else None,
+            chunk_size=config['DATA_CHUNK_SIZE'],
+            engine=config['DIABETES_ENGINE'],
+            artifact=artifact
+        )
+    
+    return {'hate_speech': hate_speech, 'diabetes': diabetes}
+
+def load_models(config):
+    """Build the hate speech and diabetes models described by a config mapping
+
+    Fitted artifacts are loaded from the model registry instead of retraining when possible.
+    """
+    factories = model_factories(config)
+    return factories['hate_speech'](), factories['diabetes']()
+
+def with_model_version(response, version):
+    response.headers[MODEL_VERSION_HEADER] = str(version)
+    return response
+
+def create_app(config=None):
     app = Flask(__name__, 
                 template_folder='../../templates',
                 static_folder='../../static')
-    CORS(app)
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    # Any origin may call the prediction API, but not the admin endpoints
+    CORS(app, resources={r'^(?!/api/admin/).*': {}})
+    metrics.set_enabled(app.config['METRICS_ENABLED'])
+    
+    # Requests take the current model from its holder once, so a hot reload
+    # never switches models in the middle of a request
+    holders = {
+        name: ModelHolder(name, factory(), factory, app.config['RELOAD_MIN_ACCURACY'])
+        for name, factory in model_factories(app.config).items()
+    }
+    if app.config['MODEL_RELOAD_WATCH_INTERVAL'] > 0:
+        # The watcher lives as long as the app that owns it
+        app.extensions['artifact_watcher'] = ArtifactWatcher(holders.values(),
+                                                             app.config['MODEL_RELOAD_WATCH_INTERVAL'])
+    
+    # Single-item endpoints either call the model directly or go through a
+    # micro-batcher that merges concurrent requests into one infer_batch call.
+    # Both return (result, version of the model that produced it)
+    batchers = {}
+    if app.config['MICROBATCH_ENABLED']:
+        batch_options = {
+            'max_batch_size': app.config['MICROBATCH_MAX_SIZE'],
+            'max_wait_ms': app.config['MICROBATCH_MAX_WAIT_MS'],
+            'timeout': app.config['MICROBATCH_TIMEOUT']
+        }
+        batchers['hate_speech'] = MicroBatcher(holders['hate_speech'].infer_batch, name='hate_speech', **batch_options)
+        batchers['diabetes'] = MicroBatcher(holders['diabetes'].infer_batch, name='diabetes', **batch_options)
+    infer_hate_speech = batchers.get('hate_speech', holders['hate_speech'].infer)
+    infer_diabetes = batchers.get('diabetes', holders['diabetes'].infer)
+    
+    # Charts are rendered from incremental statistics of the diabetes data and
+    # served from memory until the statistics change
+    chart_renderer = ChartRenderer(
+        workers=app.config['VISUALIZATIONS_RENDER_WORKERS'],
+        timeout=app.config['VISUALIZATIONS_RENDER_TIMEOUT']
+    )
+    visualization_cache = VisualizationCache(data_path=app.config['DIABETES_DATA_PATH'], renderer=chart_renderer)
+    if app.config['VISUALIZATIONS_PRERENDER']:
+        visualization_cache.get()
+        # This may run in a preloading gunicorn master, which never renders again;
+        # every process starts its own render pool on its first render
+        chart_renderer.shutdown()
     
-    # Initialize models
-    hate_speech_model = HateSpeechDetector()
-    diabetes_model = DiabetesPredictor()
+    def record_diabetes_inputs(rows, results):
+        """Add scored inputs, imputed as the model saw them, to the dashboard statistics"""
+        if not app.config['VISUALIZATIONS_LIVE_UPDATES'] or not rows:
+            return
+        features = impute_missing_zeros(rows, holders['diabetes'].model.fill_values)
+        outcomes = [[result['prediction']] for result in results]
+        visualization_cache.store.update_many(np.hstack([features, outcomes]))
+    
+    def record_scored_records(records, results):
+        scored = [i for i, result in enumerate(results) if 'error' not in result]
+        record_diabetes_inputs([extract_diabetes_features(records[i]) for i in scored],
+                               [results[i] for i in scored])
+    
+    def ndjson_response(score, version):
+        """Stream the results of scoring the NDJSON request body, one chunk at a time
+
+        Records are parsed as they arrive and results are sent as soon as their
+        chunk is scored, so memory stays flat however long the job is.
+        """
+        # Waiting for the first line before answering turns an unreadable or
+        # empty body into a 400, which cannot be sent once streaming has begun
+        lines = iter_body_lines(request.stream)
+        try:
+            first = next(lines, None)
+        except Exception:
+            return jsonify({'error': 'Could not read the request body'}), 400
+        if first is None:
+            return jsonify({'error': 'Request body is empty'}), 400
+        
+        chunks = iter_ndjson_chunks(itertools.chain([first], lines),
+                                    STREAM_FIRST_CHUNK, app.config['BATCH_CHUNK_SIZE'])
+        response = app.response_class(
+            stream_with_context(stream_ndjson_results(chunks, score)), mimetype='application/x-ndjson'
+        )
+        return with_model_version(response, version)
+    
+    if app.config['METRICS_ENABLED']:
+        @app.before_request
+        def start_request_timer():
+            g.request_start = time.perf_counter()
+        
+        @app.after_request
+        def record_request_latency(response):
+            start = g.get('request_start')
+            if start is not None:
+                # Label by URL rule, not path, to keep the number of series bounded
+                endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+                metrics.REQUEST_LATENCY.labels(request.method, endpoint, str(response.status_code)).observe(
+                    time.perf_counter() - start
+                )
+            return response
+        
+        @app.route('/metrics')
+        def prometheus_metrics():
+            return app.response_class(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
     
     @app.route('/')
     def index():
@@ -26,53 +341,199 @@ def create_app():
             data = request.get_json()
             text = data.get('text', '')
             
-            if not text:
+            # Same check as the batch endpoint: the normalizer would turn a non-string into ""
+            if not isinstance(text, str) or not text:
                 return jsonify({'error': 'No text provided'}), 400
             
-            prediction = hate_speech_model.predict(text)
-            confidence = hate_speech_model.get_confidence(text)
+            result, version = infer_hate_speech(text)
             
-            return jsonify({
-                'prediction': prediction,
-                'confidence': float(confidence),
+            return with_model_version(jsonify({
+                'prediction': result['prediction'],
+                'confidence': result['confidence'],
                 'text': text
-            })
+            }), version)
+        except TimeoutError as e:
+            return jsonify({'error': str(e)}), 504
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @app.route('/api/predict/diabetes', methods=['POST'])
     def predict_diabetes():
         try:
-            data = request.get_json()
+            # A missing or malformed body is None here and refused like any non-object
+            data = request.get_json(silent=True)
             
             # Extract features
-            features = [
-                float(data.get('pregnancies', 0)),
-                float(data.get('glucose', 0)),
-                float(data.get('blood_pressure', 0)),
-                float(data.get('skin_thickness', 0)),
-                float(data.get('insulin', 0)),
-                float(data.get('bmi', 0)),
-                float(data.get('diabetes_pedigree', 0)),
-                float(data.get('age', 0))
-            ]
+            features = extract_diabetes_features(data)
+            
+            result, version = infer_diabetes(features)
+            record_diabetes_inputs([features], [result])
+            
+            return with_model_version(jsonify({
+                'prediction': result['prediction'],
+                'probability': result['probability'],
+                'risk_level': risk_level(result['probability'])
+            }), version)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except TimeoutError as e:
+            return jsonify({'error': str(e)}), 504
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/predict/hate-speech/batch', methods=['POST'])
+    def predict_hate_speech_batch():
+        try:
+            texts, error = get_batch_items('texts', app.config['BATCH_MAX_ITEMS'])
+            if error:
+                return error
+            
+            model = holders['hate_speech'].model
+            results = score_hate_speech_batch(
+                texts, model.infer_batch, app.config['BATCH_CHUNK_SIZE']
+            )
+            
+            return with_model_version(jsonify({'results': results}), model.version)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/predict/diabetes/batch', methods=['POST'])
+    def predict_diabetes_batch():
+        try:
+            records, error = get_batch_items('records', app.config['BATCH_MAX_ITEMS'])
+            if error:
+                return error
             
-            prediction = diabetes_model.predict(features)
-            probability = diabetes_model.get_probability(features)
+            model = holders['diabetes'].model
+            results = score_diabetes_batch(
+                records, model.infer_batch, app.config['BATCH_CHUNK_SIZE']
+            )
+            record_scored_records(records, results)
             
-            return jsonify({
-                'prediction': int(prediction),
-                'probability': float(probability),
-                'risk_level': 'High' if probability > 0.7 else 'Medium' if probability > 0.3 else 'Low'
-            })
+            return with_model_version(jsonify({'results': results}), model.version)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/predict/hate-speech/stream', methods=['POST'])
+    def predict_hate_speech_stream():
+        model = holders['hate_speech'].model
+        
+        def score(records):
+            return score_hate_speech_batch(
+                ndjson_texts(records), model.infer_batch, app.config['BATCH_CHUNK_SIZE']
+            )
+        
+        return ndjson_response(score, model.version)
+    
+    @app.route('/api/predict/diabetes/stream', methods=['POST'])
+    def predict_diabetes_stream():
+        model = holders['diabetes'].model
+        
+        def score(records):
+            results = score_diabetes_batch(records, model.infer_batch, app.config['BATCH_CHUNK_SIZE'])
+            record_scored_records(records, results)
+            return results
+        
+        return ndjson_response(score, model.version)
+    
+    @app.route('/api/cache/stats')
+    def cache_stats():
+        cache = holders['hate_speech'].model.cache
+        return jsonify({'hate_speech': cache.stats() if cache is not None else None})
+    
+    @app.route('/api/batching/stats')
+    def batching_stats():
+        return jsonify({
+            'enabled': bool(batchers),
+            'batchers': {name: batcher.stats() for name, batcher in batchers.items()}
+        })
+    
+    @app.route('/api/models')
+    def model_status():
+        # The worker process id tells gunicorn workers apart
+        return jsonify({'worker': os.getpid(),
+                        'models': {name: holder.describe() for name, holder in holders.items()}})
+    
+    @app.route('/api/admin/reload', methods=['POST'])
+    def reload_models():
+        token = app.config['ADMIN_TOKEN']
+        # Without a token the admin API is disabled, never open
+        if not token:
+            return jsonify({'error': 'Admin API disabled: set ADMIN_TOKEN to enable it'}), 403
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+            return jsonify({'error': 'Invalid admin token'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        model = data.get('model', 'all')
+        artifact = data.get('artifact')
+        wait = bool(data.get('wait')) or request.args.get('wait') in ('1', 'true')
+        if model != 'all' and model not in holders:
+            return jsonify({'error': f'Unknown model: {model}'}), 400
+        names = list(holders) if model == 'all' else [model]
+        if artifact is not None and (len(names) > 1 or not isinstance(artifact, str)
+                                     or not ARTIFACT_NAME_PATTERN.fullmatch(artifact)):
+            return jsonify({'error': 'Expected "artifact" to be an artifact name for a single model'}), 400
+        
+        # Models are loaded and validated in the background while the old ones keep serving.
+        # Once a model passes, it is published so every other worker's watcher loads it too
+        started = {name: holders[name].reload(artifact, wait=wait, publish=True) for name in names}
+        body = {
+            'started': started,
+            'models': {name: holders[name].describe() for name in names}
+        }
+        if not any(started.values()):
+            return jsonify(dict(body, error='A reload is already running')), 409
+        if wait:
+            failed = any(holders[name].status['state'] == 'failed' for name in names)
+            return jsonify(body), 422 if failed else 200
+        return jsonify(body), 202
+    
+    @app.route('/api/memory')
+    def memory():
+        # Under gunicorn also report the master and every sibling worker
+        pre_forked = request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn')
+        return jsonify(memory_report(include_siblings=pre_forked))
+    
+    def cached_response(resource):
+        response = app.response_class(resource.body, mimetype=resource.mimetype)
+        response.set_etag(resource.etag)
+        response.last_modified = resource.last_modified
+        # Let browsers keep the resource but revalidate it with a cheap 304
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    
     @app.route('/api/visualizations')
     def get_visualizations():
         try:
-            viz_data = create_visualizations()
-            return jsonify(viz_data)
+            return cached_response(visualization_cache.get())
+        except RenderTimeout as e:
+            return jsonify({'error': str(e)}), 504
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/visualizations/manifest')
+    def get_visualization_manifest():
+        charts = [
+            dict(chart, url=url_for('get_visualization_image', name=chart['name']))
+            for chart in visualization_cache.manifest()
+        ]
+        return jsonify({'charts': charts, 'data_url': url_for('get_visualization_data')})
+    
+    @app.route('/api/visualizations/data')
+    def get_visualization_data():
+        try:
+            return cached_response(visualization_cache.get_data())
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/visualizations/<name>.png')
+    def get_visualization_image(name):
+        try:
+            return cached_response(visualization_cache.get_chart(name))
+        except KeyError:
+            return jsonify({'error': f'Unknown visualization: {name}'}), 404
+        except RenderTimeout as e:
+            return jsonify({'error': str(e)}), 504
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+from scipy.special import expit
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+
+class CompiledTextScorer:
+    """A fitted TF-IDF + binary LogisticRegression pair as one sparse dot product
+
+    Tokens map straight to their (column, idf, coefficient), so scoring a text
+    is a dictionary walk and a sigmoid: no CSR matrix and no input validation
+    per call. The arithmetic follows TfidfTransformer, the l2 row normalization
+    and the CSR mat-vec step by step (same operations, same column order), so
+    probabilities are identical to predict_proba on vectorizer.transform.
+    idf and coefficient are kept apart rather than pre-multiplied, because the
+    fused product would round differently.
+    """
+
+    def __init__(self, vectorizer, model):
+        if not self.supports(vectorizer, model):
+            raise ValueError("Only a word-unigram TfidfVectorizer with a binary LogisticRegression can be compiled")
+
+        self.classes_ = model.classes_
+        self.analyzer = vectorizer.build_analyzer()
+        self.norm = vectorizer.norm
+        self.intercept = float(model.intercept_[0])
+
+        idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(vectorizer.vocabulary_))
+        coef = model.coef_[0]
+        self.weights = {
+            token: (int(index), float(idf[index]), float(coef[index]))
+            for token, index in vectorizer.vocabulary_.items()
+        }
+
+    @staticmethod
+    def supports(vectorizer, model):
+        return (
+            isinstance(vectorizer, TfidfVectorizer) and isinstance(model, LogisticRegression)
+            and vectorizer.analyzer == 'word' and vectorizer.ngram_range == (1, 1)
+            and not vectorizer.binary and not vectorizer.sublinear_tf
+            and vectorizer.norm in ('l2', None) and len(model.classes_) == 2
+        )
+
+    def decision_function(self, text):
+        counts = {}
+        weights = self.weights
+        for token in self.analyzer(text):
+            if token in weights:
+                counts[token] = counts.get(token, 0) + 1
+        if not counts:
+            return self.intercept
+
+        # Columns in index order, as in the sorted CSR row
+        terms = sorted((weights[token], count) for token, count in counts.items())
+        values = [count * idf for (_, idf, _), count in terms]
+        if self.norm == 'l2':
+            squares = 0.0
+            for value in values:
+                squares += value * value
+            norm = math.sqrt(squares)
+            values = [value / norm for value in values]
+
+        score = 0.0
+        for value, ((_, _, coef), _) in zip(values, terms):
+            score += value * coef
+        return score + self.intercept
+
+    def predict_proba(self, texts):
+        probability = expit(np.array([self.decision_function(text) for text in texts], dtype=np.float64))
+        return np.stack([1 - probability, probability], axis=1)
@@ -0,0 +1,384 @@
+"""Async ASGI entry point serving the prediction and visualization API
+
+Model inference and chart rendering run in a process pool whose workers each
+load the models once, so CPU-bound work neither blocks the event loop nor
+shares one GIL. Run it with uvicorn:
+
+    uvicorn asgi:app --app-dir backend --port 8000
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from email.utils import formatdate
+
+# Add the backend directory (for `app`) and the project directory (for `backend.utils`) to Python path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from app.config import Config
+from app.routes import (
+    MODEL_VERSION_HEADER, STREAM_FIRST_CHUNK, check_batch_items, extract_diabetes_features, format_ndjson_results, load_models,
+    ndjson_texts, parse_ndjson_line, risk_level, score_diabetes_batch, score_hate_speech_batch
+)
+from backend.utils.visualization import CHARTS, VisualizationCache
+
+# Models and chart cache of the current pool worker process
+_worker = {}
+
+
+def init_worker(config):
+    """Process pool initializer: load the models once per worker process"""
+    hate_speech_model, diabetes_model = load_models(config)
+    _worker.update(
+        hate_speech=hate_speech_model,
+        diabetes=diabetes_model,
+        # Already off the event loop: charts render in this worker process
+        visualizations=VisualizationCache(data_path=config['DIABETES_DATA_PATH'])
+    )
+
+
+def worker_ready():
+    return os.getpid()
+
+
+# Each inference returns (result, version of the model that produced it)
+def infer_hate_speech(text):
+    model = _worker['hate_speech']
+    return model.infer(text), model.version
+
+
+def infer_diabetes(features):
+    model = _worker['diabetes']
+    return model.infer(features), model.version
+
+
+def score_batch(model_name, items, chunk_size):
+    score = score_hate_speech_batch if model_name == 'hate_speech' else score_diabetes_batch
+    model = _worker[model_name]
+    return score(items, model.infer_batch, chunk_size), model.version
+
+
+def score_stream_chunk(model_name, records, chunk_size):
+    if model_name == 'hate_speech':
+        records = ndjson_texts(records)
+    return score_batch(model_name, records, chunk_size)
+
+
+def get_visualization(name=None):
+    """The JSON chart bundle, or one chart's PNG, as a CachedResource"""
+    cache = _worker['visualizations']
+    return cache.get() if name is None else cache.get_chart(name)
+
+
+def get_visualization_data():
+    """The JSON chart aggregates for client-side rendering, as a CachedResource"""
+    return _worker['visualizations'].get_data()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class PredictionASGIApp:
+    """The /api/predict/* and /api/visualizations routes as a raw ASGI application"""
+
+    def __init__(self, config=None):
+        self.config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+        self.config.update(config or {})
+        self.workers = self.config['ASGI_WORKERS'] or os.cpu_count() or 1
+        self.pool = None
+        self._restart_lock = asyncio.Lock()
+        self.routes = {
+            ('POST', '/api/predict/hate-speech'): self.predict_hate_speech,
+            ('POST', '/api/predict/diabetes'): self.predict_diabetes,
+            ('POST', '/api/predict/hate-speech/batch'): self.predict_hate_speech_batch,
+            ('POST', '/api/predict/diabetes/batch'): self.predict_diabetes_batch,
+            ('GET', '/api/visualizations'): self.get_visualizations,
+            ('GET', '/api/visualizations/manifest'): self.get_visualization_manifest,
+            ('GET', '/api/visualizations/data'): self.get_visualization_data,
+        }
+        # Streaming routes read the request body themselves, line by line
+        self.stream_routes = {
+            ('POST', '/api/predict/hate-speech/stream'): 'hate_speech',
+            ('POST', '/api/predict/diabetes/stream'): 'diabetes',
+        }
+
+    async def start(self):
+        if self.pool is not None:
+            return
+        # spawn: forking a process that already runs an event loop and threads is unsafe
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(self.config,)
+        )
+        # Wait until the workers have loaded their models before taking traffic
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, worker_ready) for _ in range(self.workers)))
+
+    async def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+
+    async def restart(self, broken):
+        """Replace a broken pool; concurrent callers share one restart"""
+        async with self._restart_lock:
+            if self.pool is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+                await self.start()
+
+    async def run(self, fn, *args):
+        if self.pool is None:
+            await self.start()
+        pool = self.pool
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory), which breaks the whole pool:
+            # start a fresh one and retry once
+            await self.restart(pool)
+            return await loop.run_in_executor(self.pool, fn, *args)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.handle(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.start()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle(self, scope, receive, send):
+        method, path = scope['method'], scope['path']
+        handler = self.routes.get((method, path))
+        args = ()
+        if handler is None and method == 'GET' and path.startswith('/api/visualizations/') and path.endswith('.png'):
+            handler, args = self.get_visualization_image, (path[len('/api/visualizations/'):-len('.png')],)
+
+        try:
+            if (method, path) in self.stream_routes:
+                await self.predict_stream(receive, send, self.stream_routes[method, path])
+                return
+            if handler is None:
+                raise HTTPError(404, f'Not found: {method} {path}')
+            body = await read_body(receive) if method == 'POST' else b''
+            await handler(scope, body, send, *args)
+        except HTTPError as e:
+            await send_json(send, {'error': str(e)}, e.status)
+        except Exception as e:
+            await send_json(send, {'error': str(e)}, 500)
+
+    async def predict_hate_speech(self, scope, body, send):
+        data = parse_json(body)
+        text = data.get('text', '')
+        # Same check as the batch endpoint: the normalizer would turn a non-string into ""
+        if not isinstance(text, str) or not text:
+            raise HTTPError(400, 'No text provided')
+
+        result, version = await self.run(infer_hate_speech, text)
+        await send_json(send, {
+            'prediction': result['prediction'],
+            'confidence': result['confidence'],
+            'text': text
+        }, headers=[model_version_header(version)])
+
+    async def predict_diabetes(self, scope, body, send):
+        try:
+            features = extract_diabetes_features(parse_json(body))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        result, version = await self.run(infer_diabetes, features)
+        await send_json(send, {
+            'prediction': result['prediction'],
+            'probability': result['probability'],
+            'risk_level': risk_level(result['probability'])
+        }, headers=[model_version_header(version)])
+
+    async def predict_hate_speech_batch(self, scope, body, send):
+        await self.predict_batch(body, send, 'hate_speech', 'texts')
+
+    async def predict_diabetes_batch(self, scope, body, send):
+        await self.predict_batch(body, send, 'diabetes', 'records')
+
+    async def predict_batch(self, body, send, model_name, key):
+        items, error, status = check_batch_items(parse_json(body, {}), key, self.config['BATCH_MAX_ITEMS'])
+        if error:
+            raise HTTPError(status, error)
+
+        results, version = await self.run(score_batch, model_name, items, self.config['BATCH_CHUNK_SIZE'])
+        await send_json(send, {'results': results}, headers=[model_version_header(version)])
+
+    async def predict_stream(self, receive, send, model_name):
+        """Score an NDJSON body as it arrives and stream NDJSON results back
+
+        Same protocol as the Flask streaming routes: chunks grow from
+        STREAM_FIRST_CHUNK to BATCH_CHUNK_SIZE records. The 200 goes out with
+        the first chunk's results, which carry the model version; an error
+        after that is sent as a last line.
+        """
+        chunks = receive_ndjson_chunks(receive, STREAM_FIRST_CHUNK, self.config['BATCH_CHUNK_SIZE'])
+        row, started = 0, False
+        try:
+            async for records in chunks:
+                results, version = await self.run(score_stream_chunk, model_name, records,
+                                                  self.config['BATCH_CHUNK_SIZE'])
+                if not started:
+                    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                        (b'content-type', b'application/x-ndjson'), model_version_header(version)
+                    ]})
+                    started = True
+                body = format_ndjson_results(records, results, row).encode()
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+                row += len(records)
+            if not started:
+                raise HTTPError(400, 'Request body is empty')
+            tail = b''
+        except Exception as e:
+            if not started:
+                raise
+            tail = (json.dumps({'error': str(e), 'rows_done': row}) + '\n').encode()
+        await send({'type': 'http.response.body', 'body': tail})
+
+    async def get_visualizations(self, scope, body, send):
+        await send_resource(scope, send, await self.run(get_visualization))
+
+    async def get_visualization_manifest(self, scope, body, send):
+        charts = [
+            {'name': name, 'title': title, 'url': f'/api/visualizations/{name}.png'}
+            for name, (title, _) in CHARTS.items()
+        ]
+        await send_json(send, {'charts': charts})
+
+    async def get_visualization_data(self, scope, body, send):
+        await send_resource(scope, send, await self.run(get_visualization_data))
+
+    async def get_visualization_image(self, scope, body, send, name):
+        if name not in CHARTS:
+            raise HTTPError(404, f'Unknown visualization: {name}')
+        await send_resource(scope, send, await self.run(get_visualization, name))
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def receive_lines(receive):
+    """Lines of the request body as its messages arrive"""
+    # Pieces of a line that has not ended yet
+    pending = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionError('client disconnected')
+        body = message.get('body', b'')
+        if b'\n' in body:
+            lines = (b''.join(pending) + body).split(b'\n')
+            pending = [lines.pop()]
+            for line in lines:
+                yield line
+        else:
+            pending.append(body)
+        if not message.get('more_body'):
+            break
+    if any(pending):
+        yield b''.join(pending)
+
+
+async def receive_ndjson_chunks(receive, first_chunk, max_chunk):
+    """Lists of NDJSON records from the request body, growing from first_chunk to max_chunk records"""
+    chunk, size = [], first_chunk
+    async for line in receive_lines(receive):
+        record = parse_ndjson_line(line)
+        if record is None:
+            continue
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk, size = [], min(size * 2, max_chunk)
+    if chunk:
+        yield chunk
+
+
+def parse_json(body, default=None):
+    try:
+        data = json.loads(body) if body else default
+    except ValueError:
+        raise HTTPError(400, 'Invalid JSON body')
+    if data is None:
+        raise HTTPError(400, 'Expected a JSON body')
+    return data
+
+
+async def send_response(send, status, body, headers):
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, payload, status=200, headers=()):
+    body = json.dumps(payload).encode()
+    await send_response(send, status, body, [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+        *headers,
+    ])
+
+
+def model_version_header(version):
+    return MODEL_VERSION_HEADER.lower().encode(), str(version).encode()
+
+
+async def send_resource(scope, send, resource):
+    """Send a CachedResource with ETag/Last-Modified, or a 304 if the client has it"""
+    etag = f'"{resource.etag}"'.encode()
+    headers = [
+        (b'etag', etag),
+        (b'last-modified', formatdate(resource.last_modified, usegmt=True).encode()),
+        (b'cache-control', b'no-cache'),
+    ]
+    request_headers = dict(scope.get('headers') or [])
+    if_none_match = request_headers.get(b'if-none-match', b'')
+    if etag in [tag.strip() for tag in if_none_match.split(b',')]:
+        await send_response(send, 304, b'', headers)
+        return
+
+    headers += [
+        (b'content-type', resource.mimetype.encode()),
+        (b'content-length', str(len(resource.body)).encode()),
+    ]
+    await send_response(send, 200, resource.body, headers)
+
+
+app = PredictionASGIApp()
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi:app', host='0.0.0.0', port=int(os.environ.get('PORT', 8000)))
@@ -3,8 +3,10 @@ from flask_cors import CORS
 import os
 import sys
 
-# Add the backend directory to Python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Add the backend directory (for `app`) and the project directory (for `backend.utils`) to Python path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.dirname(BACKEND_DIR))
 
 from app.routes import create_app
 
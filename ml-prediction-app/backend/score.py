@@ -0,0 +1,300 @@
+"""Bulk scoring of CSV, JSONL or plain-text files with the hate speech or diabetes model
+
+The input is streamed in fixed-size chunks that a pool of worker processes
+scores in parallel. Results are appended to the output in input order, so
+memory stays flat however large the file is. A checkpoint next to the output
+records how far the output is complete; an interrupted run started again
+with the same arguments resumes from there:
+
+    python backend/score.py hate_speech messages.jsonl predictions.jsonl --column text
+    python backend/score.py hate_speech data/hate_speech.csv out.csv --input-format lines
+    python backend/score.py diabetes data/diabetes.csv risk.csv --no-header --workers 4
+"""
+import argparse
+import collections
+import csv
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the backend directory (for `app`) and the project directory (for `backend.utils`) to Python path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import pandas as pd
+
+from app.config import Config
+from app.routes import DIABETES_FIELDS, model_factories, score_diabetes_batch, score_hate_speech_batch
+from backend.utils.data_loader import DIABETES_COLUMNS, DIABETES_FEATURES
+
+MODELS = ('hate_speech', 'diabetes')
+INPUT_FORMATS = ('csv', 'jsonl', 'lines')
+# Output columns per model; 'row' is the 0-based position of the record in the input
+OUTPUT_FIELDS = {
+    'hate_speech': ['row', 'prediction', 'confidence', 'error'],
+    'diabetes': ['row', 'prediction', 'probability', 'risk_level', 'error'],
+}
+# Pima CSV column names accepted as aliases of the API field names
+PIMA_TO_FIELD = dict(zip(DIABETES_FEATURES, DIABETES_FIELDS))
+
+# Model and output settings of the current worker process
+_worker = {}
+
+
+def init_worker(config, model_name, output_format, ignore_interrupts=False):
+    """Process pool initializer: load the model once per worker process"""
+    if ignore_interrupts:
+        # Ctrl-C reaches the whole process group; only the parent should stop the run
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker.update(
+        name=model_name,
+        model=model_factories(config)[model_name](),
+        output_format=output_format,
+        chunk_size=config['BATCH_CHUNK_SIZE']
+    )
+
+
+def score_chunk(first_row, items):
+    """Score one chunk of input items and return the serialized output block"""
+    name, model = _worker['name'], _worker['model']
+    score = score_hate_speech_batch if name == 'hate_speech' else score_diabetes_batch
+    results = score(items, model.infer_batch, _worker['chunk_size'])
+
+    rows = []
+    for row, result in enumerate(results, first_row):
+        result = {key: value for key, value in result.items() if key != 'text'}
+        rows.append(dict(row=row, **result))
+    if _worker['output_format'] == 'jsonl':
+        return ''.join(json.dumps(row) + '\n' for row in rows)
+
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, OUTPUT_FIELDS[name], lineterminator='\n').writerows(rows)
+    return buffer.getvalue()
+
+
+def detect_format(path, formats):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.txt' and 'lines' in formats:
+        return 'lines'
+    return 'csv'
+
+
+def iter_items(path, input_format, model_name, chunk_size, column='text', header=True):
+    """Yield lists of up to chunk_size items: texts, or diabetes records keyed by API field"""
+    if input_format == 'csv':
+        names = None if header else (DIABETES_COLUMNS if model_name == 'diabetes' else [column])
+        reader = pd.read_csv(path, chunksize=chunk_size, header=0 if header else None, names=names,
+                             dtype=str if model_name == 'hate_speech' else None, keep_default_na=False)
+        for chunk in reader:
+            if model_name == 'hate_speech':
+                yield chunk[column].tolist()
+            else:
+                yield chunk.rename(columns=PIMA_TO_FIELD).to_dict('records')
+        return
+
+    with open(path, encoding='utf-8', errors='replace') as f:
+        items = []
+        for line in f:
+            line = line.rstrip('\r\n')
+            if input_format == 'lines':
+                items.append(line)
+            else:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Scored as an invalid item, so output rows stay aligned with input lines
+                    record = None
+                if model_name == 'hate_speech' and isinstance(record, dict):
+                    record = record.get(column)
+                items.append(record)
+            if len(items) == chunk_size:
+                yield items
+                items = []
+        if items:
+            yield items
+
+
+class Checkpoint:
+    """Rows and output bytes known to be complete, saved atomically as JSON"""
+
+    def __init__(self, path, settings):
+        self.path = path
+        self.settings = settings
+        self.rows_done = 0
+        self.output_bytes = 0
+
+    def load(self):
+        """Restore progress if the checkpoint was written for the same input and settings"""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('settings') != self.settings:
+            return False
+        self.rows_done, self.output_bytes = state['rows_done'], state['output_bytes']
+        return True
+
+    def save(self, rows_done, output_bytes):
+        self.rows_done, self.output_bytes = rows_done, output_bytes
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'settings': self.settings, 'rows_done': rows_done, 'output_bytes': output_bytes}, f)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress:
+    """Rows/s since the start and over the last reporting interval, printed to stderr"""
+
+    def __init__(self, rows_done, interval=5.0):
+        self.interval = interval
+        self.start = self.last_time = time.perf_counter()
+        self.start_rows = self.last_rows = rows_done
+
+    def update(self, rows_done, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last_time < self.interval:
+            return
+        recent = (rows_done - self.last_rows) / (now - self.last_time) if now > self.last_time else 0.0
+        print(f'{rows_done} rows, {self.rate(rows_done, now):.0f} rows/s ({recent:.0f} rows/s recently)',
+              file=sys.stderr, flush=True)
+        self.last_time, self.last_rows = now, rows_done
+
+    def rate(self, rows_done, now=None):
+        elapsed = (now or time.perf_counter()) - self.start
+        return (rows_done - self.start_rows) / elapsed if elapsed else 0.0
+
+
+def score_file(model_name, input_path, output_path, input_format=None, column='text', header=True,
+               chunk_size=10000, workers=None, checkpoint_path=None, resume=True, config=None):
+    """Score input_path into output_path; returns a summary dict"""
+    input_format = input_format or detect_format(input_path, INPUT_FORMATS)
+    output_format = 'jsonl' if detect_format(output_path, ('csv', 'jsonl')) == 'jsonl' else 'csv'
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if config is None:
+        config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+
+    # A checkpoint only applies to the same input file, model and chunking
+    stat = os.stat(input_path)
+    checkpoint = Checkpoint(checkpoint_path or output_path + '.checkpoint', {
+        'model': model_name, 'input': os.path.abspath(input_path), 'input_size': stat.st_size,
+        'input_mtime_ns': stat.st_mtime_ns, 'input_format': input_format, 'column': column,
+        'header': header, 'chunk_size': chunk_size, 'output_format': output_format,
+    })
+    resumed = resume and checkpoint.load() and os.path.exists(output_path)
+    if not resumed:
+        checkpoint.rows_done = checkpoint.output_bytes = 0
+
+    # Load (or train and save) the model once here, so the workers only read the registry
+    init_worker(config, model_name, output_format)
+    pool = None
+    if workers > 0:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=init_worker, initargs=(config, model_name, output_format, True))
+
+    # Binary mode, so positions are byte offsets that the checkpoint can truncate to
+    output = open(output_path, 'r+b' if resumed else 'wb')
+    try:
+        if resumed:
+            # Drop anything written after the last checkpoint
+            output.truncate(checkpoint.output_bytes)
+            output.seek(checkpoint.output_bytes)
+        elif output_format == 'csv':
+            output.write((','.join(OUTPUT_FIELDS[model_name]) + '\n').encode('utf-8'))
+
+        rows_done = checkpoint.rows_done
+        progress = Progress(rows_done)
+        # At most two chunks per worker are in flight, which bounds memory
+        pending = collections.deque()
+
+        def write_oldest():
+            nonlocal rows_done
+            size, block = pending.popleft()
+            output.write((block.result() if pool is not None else block).encode('utf-8'))
+            output.flush()
+            rows_done += size
+            checkpoint.save(rows_done, output.tell())
+            progress.update(rows_done)
+
+        first_row = 0
+        for items in iter_items(input_path, input_format, model_name, chunk_size, column, header):
+            if first_row < checkpoint.rows_done:
+                first_row += len(items)
+                continue
+            if pool is None:
+                pending.append((len(items), score_chunk(first_row, items)))
+            else:
+                pending.append((len(items), pool.submit(score_chunk, first_row, items)))
+            first_row += len(items)
+            while len(pending) > 2 * max(workers, 0):
+                write_oldest()
+        while pending:
+            write_oldest()
+    finally:
+        output.close()
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    progress.update(rows_done, force=True)
+    checkpoint.delete()
+    return {
+        'rows': rows_done,
+        'rows_scored': rows_done - progress.start_rows,
+        'resumed_at_row': progress.start_rows,
+        'seconds': time.perf_counter() - progress.start,
+        'rows_per_s': progress.rate(rows_done),
+        'workers': workers,
+        'output': output_path,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('model', choices=MODELS)
+    parser.add_argument('input', help='CSV, JSONL (.jsonl/.ndjson) or plain-text (.txt) file')
+    parser.add_argument('output', help='CSV or JSONL (.jsonl/.ndjson) file for the predictions')
+    parser.add_argument('--input-format', choices=INPUT_FORMATS,
+                        help='override the format detected from the file extension')
+    parser.add_argument('--column', default='text', help='text column or JSON key for hate_speech (default text)')
+    parser.add_argument('--no-header', action='store_true',
+                        help='the CSV has no header row (diabetes: Pima column order)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows per chunk (default 10000)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default one per CPU; 0 scores in this process)')
+    parser.add_argument('--checkpoint', help='progress file (default <output>.checkpoint)')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    args = parser.parse_args(argv)
+
+    if args.input_format == 'lines' and args.model != 'hate_speech':
+        parser.error('--input-format lines only applies to hate_speech')
+
+    try:
+        summary = score_file(args.model, args.input, args.output, args.input_format, args.column,
+                             not args.no_header, args.chunk_size, args.workers, args.checkpoint,
+                             resume=not args.restart)
+    except KeyboardInterrupt:
+        print('Interrupted; run the same command again to resume from the checkpoint', file=sys.stderr)
+        return 130
+    if summary['resumed_at_row']:
+        print(f"Resumed at row {summary['resumed_at_row']}", file=sys.stderr)
+    print(f"Scored {summary['rows_scored']} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_s']:.0f} rows/s) into {summary['output']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Offline hyperparameter search for the diabetes and hate speech models
+
+Runs k-fold cross-validation with a grid or successive-halving search in a
+process pool, refits the best candidate on all the data and saves it to the
+model registry, ready for a hot reload:
+
+    python backend/train.py diabetes --search halving --cv 5
+    python backend/train.py hate_speech --search grid --report hate_speech_search.json
+    curl -X POST localhost:5000/api/admin/reload -H "X-Admin-Token: $ADMIN_TOKEN" \\
+         -H 'Content-Type: application/json' \\
+         -d '{"model": "diabetes", "artifact": "diabetes_tuned"}'
+
+TF-IDF features are cached on disk by the pipeline, so each vectorizer setting
+is fitted once per fold and shared by every classifier setting.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add the backend directory (for `app`) and the project directory (for `backend.utils`) to Python path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingGridSearchCV)
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import (
+    GridSearchCV, HalvingGridSearchCV, ParameterGrid, StratifiedKFold, train_test_split
+)
+from sklearn.pipeline import Pipeline
+
+from app.config import Config
+from app.models import DiabetesPredictor, HateSpeechDetector
+from app.registry import ModelRegistry
+from backend.utils.data_loader import iter_text_chunks, load_diabetes_dataset, missing_value_fills
+from backend.utils.text_normalization import normalize_texts
+
+MODELS = ('diabetes', 'hate_speech')
+
+# Only settings the compiled engines can serve: word unigrams, no sublinear tf
+HATE_SPEECH_GRID = {
+    'vectorizer__max_features': [2000, 5000, None],
+    'vectorizer__min_df': [1, 2],
+    'model__C': [0.1, 1.0, 10.0, 100.0],
+    'model__class_weight': [None, 'balanced'],
+}
+DIABETES_GRID = {
+    'model__n_estimators': [100, 200, 400],
+    'model__max_depth': [None, 6, 12],
+    'model__min_samples_leaf': [1, 4],
+    'model__max_features': ['sqrt', 0.5],
+}
+
+
+def hate_speech_task(data_path=None):
+    """(pipeline, grid, X, y, components) for the TF-IDF + LogisticRegression model
+
+    The seed sentences are deduplicated, since the app repeats each one ten times
+    and repeats would land in both sides of a fold. Lines of a corpus file that
+    carry a tab-separated 0/1 label are added to them.
+    """
+    texts, labels = HateSpeechDetector.sample_data()
+    if data_path:
+        for chunk_texts, chunk_labels in iter_text_chunks(data_path):
+            texts.extend(text for text, label in zip(chunk_texts, chunk_labels) if label is not None)
+            labels.extend(label for label in chunk_labels if label is not None)
+    pairs = list(dict.fromkeys(zip(normalize_texts(texts), labels)))
+    X, y = [text for text, _ in pairs], [label for _, label in pairs]
+
+    pipeline = Pipeline([
+        ('vectorizer', TfidfVectorizer(max_features=5000, stop_words='english')),
+        ('model', LogisticRegression(max_iter=1000)),
+    ])
+
+    def components(best):
+        return {'vectorizer': best.named_steps['vectorizer'], 'model': best.named_steps['model']}
+
+    return pipeline, HATE_SPEECH_GRID, X, y, components
+
+
+def diabetes_task(data_path=None):
+    """(pipeline, grid, X, y, components) for the random forest on the diabetes CSV
+
+    Only the training side of DiabetesPredictor's 80/20 split is searched, so
+    the hold-out check of a hot reload scores rows the model has never seen.
+    """
+    X, y = load_diabetes_dataset(data_path or Config.DIABETES_DATA_PATH)
+    fill_values = missing_value_fills(X)
+    X, _, y, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+    pipeline = Pipeline([('model', RandomForestClassifier(n_estimators=100, random_state=42))])
+
+    def components(best):
+        return {'model': best.named_steps['model'], 'fill_values': fill_values}
+
+    return pipeline, DIABETES_GRID, X, y, components
+
+
+TASKS = {'diabetes': diabetes_task, 'hate_speech': hate_speech_task}
+ARTIFACT_NAMES = {'diabetes': DiabetesPredictor.ARTIFACT_NAME, 'hate_speech': HateSpeechDetector.ARTIFACT_NAME}
+
+
+def make_search(pipeline, grid, search, cv, n_jobs, scoring):
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=42)
+    if search == 'halving':
+        # Every round keeps the best third of the candidates and triples their training rows
+        return HalvingGridSearchCV(pipeline, grid, cv=folds, factor=3, scoring=scoring,
+                                   n_jobs=n_jobs, random_state=42)
+    return GridSearchCV(pipeline, grid, cv=folds, scoring=scoring, n_jobs=n_jobs)
+
+
+def timing_report(search):
+    """One row per evaluated candidate, best first, with its fit and score times over all folds"""
+    results = search.cv_results_
+    n_splits = search.n_splits_
+    rows = []
+    for i, params in enumerate(results['params']):
+        fit_seconds = float(results['mean_fit_time'][i]) * n_splits
+        score_seconds = float(results['mean_score_time'][i]) * n_splits
+        rows.append({
+            'params': params,
+            'mean_score': float(results['mean_test_score'][i]),
+            'std_score': float(results['std_test_score'][i]),
+            # Halving search only: the round and the training rows it used
+            'iteration': int(results['iter'][i]) if 'iter' in results else 0,
+            'n_resources': int(results['n_resources'][i]) if 'n_resources' in results else None,
+            'fit_seconds': fit_seconds,
+            'score_seconds': score_seconds,
+            'candidate_seconds': fit_seconds + score_seconds,
+        })
+    # Halving reports a candidate once per round it survived and picks the
+    # winner from the last round, so later rounds rank first
+    rows.sort(key=lambda row: (-row['iteration'], -row['mean_score']))
+    for rank, row in enumerate(rows, 1):
+        row['rank'] = rank
+    return rows
+
+
+def train(name, search='halving', cv=5, n_jobs=-1, scoring='accuracy', data_path=None,
+          model_dir=None, artifact_name=None, cache=True):
+    """Search, refit and save one model; returns the report dict"""
+    pipeline, grid, X, y, components = TASKS[name](data_path)
+    cache_dir = tempfile.mkdtemp(prefix=f'{name}-features-') if cache else None
+    pipeline.set_params(memory=cache_dir)
+
+    searcher = make_search(pipeline, grid, search, cv, n_jobs, scoring)
+    start = time.perf_counter()
+    try:
+        searcher.fit(X, y)
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    wall_seconds = time.perf_counter() - start
+
+    registry = ModelRegistry(model_dir or Config.MODEL_DIR)
+    artifact_name = artifact_name or f'{ARTIFACT_NAMES[name]}_tuned'
+    fingerprint = ModelRegistry.fingerprint(name, X, y, searcher.best_params_, search, cv, scoring)
+    artifact = registry.save(
+        artifact_name, fingerprint,
+        params=searcher.best_params_, cv_score=float(searcher.best_score_), scoring=scoring,
+        **components(searcher.best_estimator_)
+    )
+
+    candidates = timing_report(searcher)
+    return {
+        'model': name,
+        'search': search,
+        'cv': cv,
+        'scoring': scoring,
+        'n_jobs': n_jobs,
+        'feature_cache': cache,
+        'rows': len(y),
+        'candidates': len(ParameterGrid(grid)),
+        'fits': len(candidates) * searcher.n_splits_,
+        'wall_seconds': wall_seconds,
+        'candidate_seconds_total': sum(row['candidate_seconds'] for row in candidates),
+        'refit_seconds': float(searcher.refit_time_),
+        'best_params': searcher.best_params_,
+        'best_score': float(searcher.best_score_),
+        'artifact': artifact_name,
+        'artifact_path': registry.path(artifact_name),
+        'version': ModelRegistry.version_of(artifact),
+        'results': candidates,
+    }
+
+
+def print_report(report, top=10):
+    print(f"\n== {report['model']}: {report['search']} search, {report['cv']}-fold CV, {report['scoring']} ==")
+    print(f"{report['candidates']} candidates, {report['fits']} fits on {report['rows']} rows "
+          f"in {report['wall_seconds']:.1f}s wall ({report['candidate_seconds_total']:.1f}s of fits and scoring), "
+          f"refit {report['refit_seconds']:.2f}s")
+    print(f"{'rank':>4} {'iter':>4} {'rows':>6} {'score':>13} {'seconds':>8}  params")
+    for row in report['results'][:top]:
+        params = ', '.join(f'{key.split("__", 1)[1]}={value}' for key, value in row['params'].items())
+        print(f"{row['rank']:>4} {row['iteration']:>4} {row['n_resources'] or report['rows']:>6} "
+              f"{row['mean_score']:.3f}±{row['std_score']:.3f} {row['candidate_seconds']:>8.2f}  {params}")
+    print(f"Best {report['best_score']:.3f}: saved {report['artifact']} (version {report['version']}) "
+          f"to {report['artifact_path']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('model', choices=MODELS + ('all',))
+    parser.add_argument('--search', choices=('grid', 'halving'), default='halving')
+    parser.add_argument('--cv', type=int, default=5, help='cross-validation folds (default 5)')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='worker processes (default -1: one per CPU)')
+    parser.add_argument('--scoring', default='accuracy', help='scikit-learn scorer name (default accuracy)')
+    parser.add_argument('--data', help='training data: the diabetes CSV, or a labelled hate speech corpus')
+    parser.add_argument('--model-dir', help=f'registry directory (default {Config.MODEL_DIR})')
+    parser.add_argument('--artifact', help='artifact name (default <model>_tuned)')
+    parser.add_argument('--report', help='write the full timing report to this JSON file')
+    parser.add_argument('--no-cache', action='store_true', help='refit TF-IDF for every candidate')
+    args = parser.parse_args(argv)
+
+    names = MODELS if args.model == 'all' else (args.model,)
+    if len(names) > 1 and (args.artifact or args.data):
+        parser.error('--artifact and --data need a single model')
+
+    reports = []
+    for name in names:
+        report = train(name, args.search, args.cv, args.n_jobs, args.scoring, args.data,
+                       args.model_dir, args.artifact, cache=not args.no_cache)
+        print_report(report)
+        reports.append(report)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports if len(reports) > 1 else reports[0], f, indent=2, default=str)
+        print(f'Timing report written to {args.report}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from .data_preprocessing import DataPreprocessor
+
+# Column layout of the headerless Pima Indians diabetes CSV
+DIABETES_FEATURES = [
+    'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
+    'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age'
+]
+DIABETES_COLUMNS = DIABETES_FEATURES + ['Outcome']
+
+# Compact dtypes: clinic exports can be far larger than the bundled file
+DIABETES_DTYPES = {
+    'Pregnancies': 'int8',
+    'Glucose': 'float32',
+    'BloodPressure': 'float32',
+    'SkinThickness': 'float32',
+    'Insulin': 'float32',
+    'BMI': 'float32',
+    'DiabetesPedigreeFunction': 'float32',
+    'Age': 'int16',
+    'Outcome': 'int8',
+}
+
+# A zero in these columns means "not measured", not a real value
+ZERO_AS_MISSING = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+
+
+def iter_diabetes_chunks(path, chunksize=100000, preprocessor=None):
+    """Yield cleaned (X float32, y int8) chunks of the diabetes CSV
+
+    Duplicates are dropped and missing values filled with medians within each
+    chunk, so the rows yielded depend on chunksize.
+    """
+    if preprocessor is None:
+        preprocessor = DataPreprocessor()
+    
+    reader = pd.read_csv(path, header=None, names=DIABETES_COLUMNS,
+                         dtype=DIABETES_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        chunk[ZERO_AS_MISSING] = chunk[ZERO_AS_MISSING].replace(0, np.nan)
+        chunk = preprocessor.clean_numerical_data(chunk)
+        yield (chunk[DIABETES_FEATURES].to_numpy(dtype=np.float32),
+               chunk['Outcome'].to_numpy(dtype=np.int8))
+
+
+def load_diabetes_dataset(path, chunksize=100000):
+    """Load the whole diabetes CSV as compact float32 features and int8 labels"""
+    X_chunks, y_chunks = [], []
+    for X, y in iter_diabetes_chunks(path, chunksize):
+        X_chunks.append(X)
+        y_chunks.append(y)
+    
+    if not X_chunks:
+        return (np.empty((0, len(DIABETES_FEATURES)), dtype=np.float32),
+                np.empty(0, dtype=np.int8))
+    return np.concatenate(X_chunks), np.concatenate(y_chunks)
+
+
+def missing_value_fills(X):
+    """Median of each zero-as-missing column, used to impute zeros at inference time"""
+    if len(X) == 0:
+        return {}
+    indices = [DIABETES_FEATURES.index(column) for column in ZERO_AS_MISSING]
+    return {index: float(np.median(X[:, index])) for index in indices}
+
+
+def impute_missing_zeros(X, fills):
+    """Replace zeros in the zero-as-missing columns with the training medians"""
+    X = np.array(X, dtype=np.float64)
+    for index, value in fills.items():
+        column = X[:, index]
+        column[column == 0] = value
+    return X
+
+
+def iter_text_chunks(path, chunksize=1000):
+    """Yield (texts, labels) chunks from a one-message-per-line text corpus
+
+    A line may end with a tab and a 0/1 label; unlabelled lines get a None label.
+    """
+    texts, labels = [], []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            
+            text, sep, label = line.rpartition('\t')
+            if sep and label in ('0', '1'):
+                texts.append(text)
+                labels.append(int(label))
+            else:
+                texts.append(line)
+                labels.append(None)
+            
+            if len(texts) == chunksize:
+                yield texts, labels
+                texts, labels = [], []
+    
+    if texts:
+        yield texts, labels
@@ -1,48 +1,26 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+from .quantile_sketch import KLLSketch
+from .stopwords import ENGLISH_STOP_WORDS
+from .text_normalization import TextNormalizer
 
 class DataPreprocessor:
     def __init__(self):
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
-        try:
-            nltk.download('stopwords', quiet=True)
-            nltk.download('punkt', quiet=True)
-            self.stop_words = set(stopwords.words('english'))
-        except:
-            self.stop_words = set()
+        # Bundled list: no nltk.download (and no network) needed
+        self.stop_words = set(ENGLISH_STOP_WORDS)
+        self.normalizer = TextNormalizer(self.stop_words)
     
     def clean_text(self, text):
         """Clean and preprocess text data"""
-        if not isinstance(text, str):
-            return ""
-        
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        
-        # Remove user mentions and hashtags
-        text = re.sub(r'@\w+|#\w+', '', text)
-        
-        # Remove special characters and digits
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        
-        # Remove stopwords
-        if self.stop_words:
-            words = word_tokenize(text)
-            text = ' '.join([word for word in words if word not in self.stop_words])
-        
-        return text
+        # Lowercase, strip URLs, mentions, hashtags, special characters and stopwords
+        return self.normalizer.clean(text)
+    
+    def clean_texts(self, texts):
+        """Clean a list or pandas Series of texts in one batch"""
+        return self.normalizer.clean_batch(texts)
     
     def clean_numerical_data(self, df):
         """Clean and preprocess numerical data"""
@@ -51,7 +29,7 @@ class DataPreprocessor:
         
         # Handle missing values
         for column in df.columns:
-            if df[column].dtype in ['int64', 'float64']:
+            if pd.api.types.is_numeric_dtype(df[column]):
                 # Fill numerical columns with median
                 df[column] = df[column].fillna(df[column].median())
             else:
@@ -68,19 +46,78 @@ class DataPreprocessor:
         """Encode categorical labels"""
         return self.label_encoder.fit_transform(y)
     
-    def detect_outliers(self, df, columns=None):
-        """Detect outliers using IQR method"""
+    def detect_outliers(self, df, columns=None, compact=False):
+        """Detect outliers using IQR method
+        
+        All column quartiles come from one quantile([0.25, 0.75]) call and the
+        bounds are checked on a single array. Returns index labels per column,
+        as lists or, with compact=True, as NumPy arrays.
+        """
         if columns is None:
             columns = df.select_dtypes(include=[np.number]).columns
+        columns = list(columns)
+        
+        quartiles = df[columns].quantile([0.25, 0.75])
+        lower, upper = iqr_bounds(quartiles.iloc[0].to_numpy(), quartiles.iloc[1].to_numpy())
+        
+        # NaN compares False on both sides, so missing values are never outliers
+        values = df[columns].to_numpy(dtype=np.float64)
+        mask = (values < lower) | (values > upper)
+        index = df.index.to_numpy()
         
         outliers = {}
-        for column in columns:
-            Q1 = df[column].quantile(0.25)
-            Q3 = df[column].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            outliers[column] = df[(df[column] < lower_bound) | (df[column] > upper_bound)].index.tolist()
+        for i, column in enumerate(columns):
+            labels = index[mask[:, i]]
+            outliers[column] = labels if compact else labels.tolist()
         
         return outliers
+    
+    def outlier_sketches(self, chunks, columns=None, k=200):
+        """One mergeable KLLSketch per column, built in a single pass over DataFrame chunks
+        
+        Sketches of different files or processes can be combined with merge().
+        """
+        sketches = None
+        for chunk in chunks:
+            if sketches is None:
+                if columns is None:
+                    columns = chunk.select_dtypes(include=[np.number]).columns
+                sketches = {column: KLLSketch(k, seed=i) for i, column in enumerate(columns)}
+            for column, sketch in sketches.items():
+                sketch.update(chunk[column].to_numpy(dtype=np.float64))
+        return sketches or {}
+    
+    def outlier_bounds(self, sketches):
+        """(lower, upper) IQR bounds per column from approximate quartiles"""
+        bounds = {}
+        for column, sketch in sketches.items():
+            q1, q3 = sketch.quantiles([0.25, 0.75])
+            bounds[column] = iqr_bounds(q1, q3)
+        return bounds
+    
+    def detect_outliers_streaming(self, make_chunks, columns=None, k=200):
+        """Detect IQR outliers in data too large for memory, e.g. a chunked read_csv
+        
+        make_chunks() must return a fresh iterable of DataFrame chunks: the first
+        pass estimates the quartiles with KLL sketches (O(k) memory per column),
+        the second collects the index labels outside the bounds. Returns
+        (outliers as arrays per column, bounds per column).
+        """
+        bounds = self.outlier_bounds(self.outlier_sketches(make_chunks(), columns, k))
+        found = {column: [] for column in bounds}
+        for chunk in make_chunks():
+            index = chunk.index.to_numpy()
+            for column, (lower, upper) in bounds.items():
+                values = chunk[column].to_numpy(dtype=np.float64)
+                found[column].append(index[(values < lower) | (values > upper)])
+        
+        outliers = {
+            column: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+            for column, parts in found.items()
+        }
+        return outliers, bounds
+
+def iqr_bounds(q1, q3):
+    """Tukey fences: 1.5 interquartile ranges below Q1 and above Q3"""
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
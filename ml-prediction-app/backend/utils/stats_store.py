@@ -0,0 +1,174 @@
+import threading
+
+import numpy as np
+
+from .data_loader import DIABETES_COLUMNS, iter_diabetes_chunks
+
+# Fixed histogram ranges (low, high, bins) of the Pima diabetes columns; values
+# outside a range are counted in its first or last bin
+DIABETES_HISTOGRAMS = {
+    'Pregnancies': (0, 18, 18),
+    'Glucose': (40, 200, 20),
+    'BloodPressure': (20, 125, 21),
+    'SkinThickness': (0, 100, 20),
+    'Insulin': (0, 850, 17),
+    'BMI': (15, 70, 22),
+    'DiabetesPedigreeFunction': (0, 2.5, 25),
+    'Age': (20, 85, 13),
+}
+
+
+class StatisticsStore:
+    """Dashboard statistics of a stream of records, updated in O(1) per record
+
+    Keeps fixed-bin histogram counts, running means and co-moments for the
+    correlation matrix (Welford's update, merged per batch with Chan's formula),
+    counts per class of the label column and a reservoir sample of whole
+    records for scatter plots. Memory and the cost of a snapshot do not grow
+    with the number of records seen.
+    """
+
+    def __init__(self, columns=DIABETES_COLUMNS, histograms=DIABETES_HISTOGRAMS, label='Outcome',
+                 sample_size=500, seed=42):
+        self.columns = list(columns)
+        self.label = label
+        self._label_index = self.columns.index(label)
+        self._histogram_ranges = dict(histograms)
+        self.histogram_edges = {
+            column: np.linspace(low, high, bins + 1) for column, (low, high, bins) in histograms.items()
+        }
+        self._histogram_indices = [(column, self.columns.index(column)) for column in self.histogram_edges]
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+        width = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(width)
+        # Sum of outer products of deviations from the mean
+        self.comoment = np.zeros((width, width))
+        self.histogram_counts = {column: np.zeros(len(edges) - 1, dtype=np.int64)
+                                 for column, edges in self.histogram_edges.items()}
+        self.class_counts = {}
+        self.sample = np.empty((0, width))
+        # Bumped on every update, so caches of rendered charts know when to refresh
+        self.version = 0
+
+    @classmethod
+    def from_csv(cls, path, chunksize=100000, **options):
+        """Store built from the (cleaned) diabetes CSV, one chunk at a time"""
+        store = cls(**options)
+        for X, y in iter_diabetes_chunks(path, chunksize):
+            store.update_many(np.column_stack([X, y]))
+        return store
+
+    def update(self, record):
+        """Add one record: a sequence of values in column order (Welford's update)"""
+        x = np.asarray(record, dtype=np.float64).ravel()
+        if len(x) != len(self.columns) or np.isnan(x).any():
+            return self.update_many([record])
+
+        values = x.tolist()
+        label = values[self._label_index]
+        key = int(label) if label.is_integer() else label
+        with self._lock:
+            self.count += 1
+            delta = x - self.mean
+            self.mean = self.mean + delta / self.count
+            self.comoment += np.outer(delta, x - self.mean)
+
+            for column, index in self._histogram_indices:
+                low, high, bins = self._histogram_ranges[column]
+                bin_index = int((values[index] - low) * bins / (high - low))
+                self.histogram_counts[column][min(max(bin_index, 0), bins - 1)] += 1
+
+            self.class_counts[key] = self.class_counts.get(key, 0) + 1
+            if len(self.sample) < self.sample_size:
+                self.sample = np.vstack([self.sample, x])
+            else:
+                slot = int(self._rng.random() * self.count)
+                if slot < self.sample_size:
+                    self.sample[slot] = x
+            self.version += 1
+
+    def update_many(self, rows):
+        """Add a 2-D array of records; rows with missing values are skipped"""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(self.columns))
+        rows = rows[~np.isnan(rows).any(axis=1)]
+        if not len(rows):
+            return
+
+        batch_mean = rows.mean(axis=0)
+        deviations = rows - batch_mean
+        batch_comoment = deviations.T @ deviations
+        labels, label_counts = np.unique(rows[:, self._label_index], return_counts=True)
+
+        with self._lock:
+            n_a, n_b = self.count, len(rows)
+            n = n_a + n_b
+            delta = batch_mean - self.mean
+            self.mean = self.mean + delta * (n_b / n)
+            self.comoment = self.comoment + batch_comoment + np.outer(delta, delta) * (n_a * n_b / n)
+            self.count = n
+
+            for column, index in self._histogram_indices:
+                edges = self.histogram_edges[column]
+                bins = np.clip(np.searchsorted(edges, rows[:, index], side='right') - 1, 0, len(edges) - 2)
+                self.histogram_counts[column] += np.bincount(bins, minlength=len(edges) - 1)
+
+            for label, label_count in zip(labels, label_counts):
+                key = int(label) if float(label).is_integer() else float(label)
+                self.class_counts[key] = self.class_counts.get(key, 0) + int(label_count)
+
+            self._sample(rows, n_a)
+            self.version += 1
+
+    def _sample(self, rows, seen):
+        """Reservoir sampling (algorithm R) of a batch of records following `seen` earlier ones"""
+        free = max(0, min(self.sample_size - len(self.sample), len(rows)))
+        if free:
+            self.sample = np.vstack([self.sample, rows[:free]])
+        rest = rows[free:]
+        if not len(rest):
+            return
+
+        # Record t (0-based over the stream) replaces a random slot with probability size / (t + 1)
+        positions = np.arange(seen + free, seen + len(rows)) + 1
+        slots = (self._rng.random(len(rest)) * positions).astype(np.int64)
+        kept = slots < self.sample_size
+        slots, rest = slots[kept], rest[kept]
+        # Later records win a slot, as when they are processed one by one
+        last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+        self.sample[slots[last]] = rest[last]
+
+    @staticmethod
+    def _correlation(comoment):
+        scale = np.sqrt(np.diag(comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return comoment / np.outer(scale, scale)
+
+    def correlation(self):
+        """Pearson correlation matrix of the columns (NaN for constant columns)"""
+        with self._lock:
+            comoment = self.comoment.copy()
+        return self._correlation(comoment)
+
+    def snapshot(self):
+        """Copy of the aggregated state that charts are rendered from"""
+        with self._lock:
+            comoment = self.comoment.copy()
+            state = {
+                'version': self.version,
+                'count': self.count,
+                'columns': list(self.columns),
+                'label': self.label,
+                'means': dict(zip(self.columns, self.mean.tolist())),
+                'histograms': {
+                    column: {'edges': self.histogram_edges[column], 'counts': counts.copy()}
+                    for column, counts in self.histogram_counts.items()
+                },
+                'class_counts': dict(sorted(self.class_counts.items())),
+                'sample': self.sample.copy(),
+            }
+        state['correlation'] = self._correlation(comoment)
+        return state
@@ -0,0 +1,133 @@
+import re
+import string
+
+import pandas as pd
+
+# Precompiled patterns (same semantics as the original per-call re.sub versions)
+NON_ALPHA = re.compile(r'[^a-zA-Z\s]')
+URLS = re.compile(r'http\S+|www\S+|https\S+')
+MENTIONS_HASHTAGS = re.compile(r'@\w+|#\w+')
+
+# NLTK's word_tokenize splits these even without apostrophes; on letters-only
+# text that is the only thing it does beyond splitting on whitespace
+CONTRACTIONS = re.compile(
+    rb'\b(can)(not)\b|\b(gim)(me)\b|\b(gon)(na)\b|\b(got)(ta)\b|\b(lem)(me)\b|\b(wan)(na)\b'
+)
+
+# Batch path: the whole batch is processed as one byte string, with texts separated by NUL
+SEPARATOR = '\x00'
+BATCH_SEPARATOR = '\n\x00\n'
+
+# Non-ASCII characters that survive normalization: unicode whitespace becomes a
+# space, and two capitals whose lowercase form starts with an ASCII letter
+SPECIAL_CHARS = re.compile(
+    rb'\xc2[\x85\xa0]|\xc4\xb0|\xe1\x9a\x80|\xe2(?:\x80[\x80-\x8a\xa8\xa9\xaf]|\x81\x9f|\x84\xaa)|\xe3\x80\x80'
+)
+SPECIAL_REPLACEMENTS = {b'\xc4\xb0': b'i', b'\xe2\x84\xaa': b'k'}
+
+# Lowercase ASCII, turn every ASCII whitespace character into a space, and
+# delete everything else except the NUL separator
+_WHITESPACE = b'\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f'
+BYTE_TABLE = bytes.maketrans(
+    string.ascii_uppercase.encode() + _WHITESPACE,
+    string.ascii_lowercase.encode() + b' ' * len(_WHITESPACE)
+)
+BYTE_DELETE = bytes(
+    b for b in range(1, 256)
+    if not (b < 128 and (chr(b) in string.ascii_letters or chr(b).isspace()))
+)
+SPACE_RUNS = re.compile(rb'  +')
+
+
+def _replace_special(match):
+    return SPECIAL_REPLACEMENTS.get(match.group(), b' ')
+
+
+def _split_contraction(match):
+    return b' '.join(group for group in match.groups() if group)
+
+
+class TextNormalizer:
+    """Text normalization shared by model training, inference and DataPreprocessor"""
+
+    def __init__(self, stop_words=None):
+        self.stop_words = frozenset(stop_words or ())
+
+    def normalize(self, text):
+        """Lowercase, keep only ASCII letters and collapse whitespace"""
+        return ' '.join(NON_ALPHA.sub('', text.lower()).split())
+
+    def normalize_batch(self, texts):
+        """normalize() over a list or pandas Series in a few whole-batch passes"""
+        return self._batch(texts, self._normalize_joined, self.normalize)
+
+    def clean(self, text):
+        """normalize() after stripping URLs, mentions and hashtags, then drop stopwords"""
+        if not isinstance(text, str):
+            return ""
+
+        text = text.lower()
+        text = URLS.sub('', text)
+        text = MENTIONS_HASHTAGS.sub('', text)
+        text = ' '.join(NON_ALPHA.sub('', text).split())
+        if self.stop_words:
+            text = CONTRACTIONS.sub(_split_contraction, text.encode()).decode()
+            text = self._remove_stop_words(text)
+        return text
+
+    def clean_batch(self, texts):
+        """clean() over a list or pandas Series in a few whole-batch passes"""
+        return self._batch(texts, self._clean_joined, self.clean)
+
+    def _remove_stop_words(self, text):
+        return ' '.join(word for word in text.split() if word not in self.stop_words)
+
+    def _batch(self, texts, joined_fn, single_fn):
+        index = texts.index if isinstance(texts, pd.Series) else None
+        texts = ['' if not isinstance(text, str) else text for text in texts]
+
+        joined = BATCH_SEPARATOR.join(texts)
+        if joined.count(SEPARATOR) == max(len(texts) - 1, 0):
+            results = joined_fn(joined) if texts else []
+        else:
+            # A text contains the separator itself: fall back to one call per text
+            results = [single_fn(text) for text in texts]
+
+        return pd.Series(results, index=index) if index is not None else results
+
+    def _collapse(self, joined):
+        """Byte-level equivalent of normalize() applied to each separated text"""
+        data = joined.encode('utf-8', 'surrogatepass')
+        if not data.isascii():
+            data = SPECIAL_CHARS.sub(_replace_special, data)
+        data = data.translate(BYTE_TABLE, BYTE_DELETE)
+        return SPACE_RUNS.sub(b' ', data)
+
+    def _split(self, data):
+        # Each text keeps at most one space on either side of its separator
+        return [text.strip(' ') for text in data.decode('ascii').split(SEPARATOR)]
+
+    def _normalize_joined(self, joined):
+        return self._split(self._collapse(joined))
+
+    def _clean_joined(self, joined):
+        # URLs and mentions stop at the newlines around each separator
+        joined = URLS.sub('', joined.lower())
+        joined = MENTIONS_HASHTAGS.sub('', joined)
+        data = self._collapse(joined)
+        if not self.stop_words:
+            return self._split(data)
+
+        data = CONTRACTIONS.sub(_split_contraction, data)
+        return [self._remove_stop_words(text) for text in data.decode('ascii').split(SEPARATOR)]
+
+
+_default_normalizer = TextNormalizer()
+
+
+def normalize_text(text):
+    return _default_normalizer.normalize(text)
+
+
+def normalize_texts(texts):
+    return _default_normalizer.normalize_batch(texts)
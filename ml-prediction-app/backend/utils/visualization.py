@@ -1,82 +1,382 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.graph_objs as go
-import plotly.express as px
 import numpy as np
 import pandas as pd
 import base64
+import hashlib
 import io
-from sklearn.utils import resample  # <-- Added for sampling
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from .stats_store import StatisticsStore
 
-def plot_to_base64():
-    """Convert matplotlib plot to base64 string"""
+# Data behind the dashboard when no statistics store is passed in
+DASHBOARD_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'diabetes.csv'
+)
+OUTCOME_LABELS = {0: 'No Diabetes', 1: 'Diabetes'}
+
+def new_figure(figsize):
+    """A standalone Figure drawn by the Agg backend, with one set of axes
+
+    Unlike pyplot, nothing here is global: every render owns its figure, so
+    charts can be drawn from several threads at once. matplotlib is imported
+    on the first chart render, not when the app starts.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure, figure.subplots()
+
+def figure_to_png(figure):
+    """Convert a matplotlib Figure to PNG bytes"""
     img = io.BytesIO()
-    plt.savefig(img, format='png', bbox_inches='tight')
-    img.seek(0)
-    plot_url = base64.b64encode(img.getvalue()).decode()
-    plt.close()
-    return plot_url
-
-def create_visualizations():
-    """Create sample visualizations for the dashboard"""
-    
-    # Sample data for diabetes analysis (imbalanced 70:30)
-    np.random.seed(42)
-    diabetes_data = pd.DataFrame({
-        'Age': np.random.randint(20, 80, 100),
-        'BMI': np.random.normal(28, 5, 100),
-        'Glucose': np.random.normal(120, 30, 100),
-        'Blood_Pressure': np.random.normal(80, 15, 100),
-        'Outcome': np.random.choice([0, 1], 100, p=[0.7, 0.3])
-    })
-    
-    # Balance the dataset by undersampling the majority class
-    majority_class = diabetes_data[diabetes_data.Outcome == 0]
-    minority_class = diabetes_data[diabetes_data.Outcome == 1]
-    
-    majority_downsampled = resample(majority_class,
-                                    replace=False,
-                                    n_samples=len(minority_class),
-                                    random_state=42)
-    
-    diabetes_data_balanced = pd.concat([majority_downsampled, minority_class])
-    diabetes_data_balanced = diabetes_data_balanced.sample(frac=1, random_state=42).reset_index(drop=True)
-    
-    # Create visualizations
-    visualizations = {}
-    
-    # 1. Age distribution
-    plt.figure(figsize=(10, 6))
-    plt.hist(diabetes_data_balanced['Age'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
-    plt.title('Age Distribution in Balanced Dataset', fontsize=16)
-    plt.xlabel('Age', fontsize=12)
-    plt.ylabel('Frequency', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    visualizations['age_distribution'] = plot_to_base64()
-    
-    # 2. BMI vs Glucose scatter plot
-    plt.figure(figsize=(10, 6))
-    colors = ['red' if x == 1 else 'blue' for x in diabetes_data_balanced['Outcome']]
-    plt.scatter(diabetes_data_balanced['BMI'], diabetes_data_balanced['Glucose'], c=colors, alpha=0.6)
-    plt.title('BMI vs Glucose Level (Balanced)', fontsize=16)
-    plt.xlabel('BMI', fontsize=12)
-    plt.ylabel('Glucose Level', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    visualizations['bmi_glucose_scatter'] = plot_to_base64()
-    
-    # 3. Outcome distribution pie chart
-    plt.figure(figsize=(8, 8))
-    outcome_counts = diabetes_data_balanced['Outcome'].value_counts()
-    plt.pie(outcome_counts.values, labels=['No Diabetes', 'Diabetes'], 
-            autopct='%1.1f%%', colors=['lightgreen', 'lightcoral'])
-    plt.title('Diabetes Outcome Distribution (Balanced)', fontsize=16)
-    visualizations['outcome_pie'] = plot_to_base64()
-    
-    # 4. Correlation heatmap
-    plt.figure(figsize=(10, 8))
-    correlation_matrix = diabetes_data_balanced.corr()
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0)
-    plt.title('Feature Correlation Heatmap (Balanced)', fontsize=16)
-    visualizations['correlation_heatmap'] = plot_to_base64()
-    
-    return visualizations
+    figure.savefig(img, format='png', bbox_inches='tight')
+    return img.getvalue()
+
+def figure_to_base64(figure):
+    """Convert a matplotlib Figure to a base64 PNG string"""
+    return base64.b64encode(figure_to_png(figure)).decode()
+
+def load_dashboard_store(data_path=DASHBOARD_DATA_PATH):
+    """Statistics store of the diabetes dataset shown on the dashboard (empty if the file is missing)"""
+    if data_path and os.path.exists(data_path):
+        return StatisticsStore.from_csv(data_path)
+    return StatisticsStore()
+
+def plot_no_data(ax, title):
+    ax.text(0.5, 0.5, 'No data yet', ha='center', va='center', fontsize=14)
+    ax.axis('off')
+    ax.set_title(title, fontsize=16)
+
+def plot_age_distribution(stats):
+    figure, ax = new_figure((10, 6))
+    # Pre-aggregated bin counts: one bar per bin, whatever the number of records
+    histogram = stats['histograms']['Age']
+    edges = histogram['edges']
+    ax.bar(edges[:-1], histogram['counts'], width=np.diff(edges), align='edge',
+           alpha=0.7, color='skyblue', edgecolor='black')
+    ax.set_title(f"Age Distribution (n={stats['count']})", fontsize=16)
+    ax.set_xlabel('Age', fontsize=12)
+    ax.set_ylabel('Frequency', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    return figure
+
+def plot_bmi_glucose_scatter(stats):
+    figure, ax = new_figure((10, 6))
+    # Reservoir sample: a bounded, uniformly drawn subset of all records
+    sample = pd.DataFrame(stats['sample'], columns=stats['columns'])
+    colors = ['red' if x == 1 else 'blue' for x in sample['Outcome']]
+    ax.scatter(sample['BMI'], sample['Glucose'], c=colors, alpha=0.6)
+    ax.set_title(f"BMI vs Glucose Level ({len(sample)} of {stats['count']} records)", fontsize=16)
+    ax.set_xlabel('BMI', fontsize=12)
+    ax.set_ylabel('Glucose Level', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    return figure
+
+def plot_outcome_pie(stats):
+    figure, ax = new_figure((8, 8))
+    title = 'Diabetes Outcome Distribution'
+    outcome_counts = stats['class_counts']
+    if not outcome_counts:
+        plot_no_data(ax, title)
+        return figure
+    ax.pie(list(outcome_counts.values()), labels=[OUTCOME_LABELS.get(label, str(label)) for label in outcome_counts],
+           autopct='%1.1f%%', colors=['lightgreen', 'lightcoral'])
+    ax.set_title(title, fontsize=16)
+    return figure
+
+def plot_correlation_heatmap(stats):
+    import seaborn as sns
+    figure, ax = new_figure((10, 8))
+    correlation_matrix = pd.DataFrame(stats['correlation'], index=stats['columns'], columns=stats['columns'])
+    sns.heatmap(correlation_matrix, annot=True, fmt='.2f', cmap='coolwarm', center=0, vmin=-1, vmax=1, ax=ax)
+    ax.set_title('Feature Correlation Heatmap', fontsize=16)
+    return figure
+
+# Dashboard charts in display order: name -> (title, plot function)
+CHARTS = {
+    'age_distribution': ('Age Distribution', plot_age_distribution),
+    'bmi_glucose_scatter': ('BMI vs Glucose Scatter Plot', plot_bmi_glucose_scatter),
+    'outcome_pie': ('Diabetes Outcome Distribution', plot_outcome_pie),
+    'correlation_heatmap': ('Feature Correlation Heatmap', plot_correlation_heatmap),
+}
+
+def render_chart(name, stats=None):
+    """Render a single dashboard chart to PNG bytes from a StatisticsStore snapshot"""
+    if stats is None:
+        stats = load_dashboard_store().snapshot()
+    
+    _, plot = CHARTS[name]
+    return figure_to_png(plot(stats))
+
+def create_visualizations(stats=None):
+    """Create the dashboard visualizations"""
+    if stats is None:
+        stats = load_dashboard_store().snapshot()
+    
+    return {
+        name: base64.b64encode(render_chart(name, stats)).decode()
+        for name in CHARTS
+    }
+
+
+def rounded(values, decimals):
+    """Nested lists of rounded floats for JSON, with None for NaN"""
+    values = np.round(np.asarray(values, dtype=np.float64), decimals)
+    return np.where(np.isnan(values), None, values).tolist()
+
+def chart_data(stats, decimals=3):
+    """Compact JSON-ready aggregates of every dashboard chart, for rendering in the browser
+    
+    Histograms are sent as bin edges and counts, the pie as class counts, the
+    heatmap as the correlation matrix and the scatter plot as the reservoir
+    sample, so the payload size does not depend on the number of records.
+    """
+    columns = stats['columns']
+    age = stats['histograms']['Age']
+    sample = stats['sample']
+    outcomes = list(stats['class_counts'])
+    
+    charts = {
+        'age_distribution': {
+            'type': 'histogram',
+            'column': 'Age',
+            'edges': rounded(age['edges'], decimals),
+            'counts': age['counts'].tolist(),
+        },
+        'bmi_glucose_scatter': {
+            'type': 'scatter',
+            'x': 'BMI',
+            'y': 'Glucose',
+            'group_labels': {str(label): name for label, name in OUTCOME_LABELS.items()},
+            # [x, y, outcome] per sampled record
+            'points': rounded(sample[:, [columns.index('BMI'), columns.index('Glucose'),
+                                         columns.index('Outcome')]], 1),
+        },
+        'outcome_pie': {
+            'type': 'pie',
+            'labels': [OUTCOME_LABELS.get(label, str(label)) for label in outcomes],
+            'counts': [stats['class_counts'][label] for label in outcomes],
+        },
+        'correlation_heatmap': {
+            'type': 'heatmap',
+            'columns': columns,
+            'matrix': rounded(stats['correlation'], decimals),
+        },
+    }
+    return {
+        'version': stats['version'],
+        'count': stats['count'],
+        'charts': [dict(chart, name=name, title=CHARTS[name][0]) for name, chart in charts.items()],
+    }
+
+
+class RenderTimeout(Exception):
+    """A chart was not rendered within the renderer's timeout"""
+
+
+class ChartRenderer:
+    """Render charts in a bounded pool of worker processes, with a timeout
+    
+    Request threads submit a render and wait for its PNG, so matplotlib's CPU
+    time is spent outside the web process and its GIL. At most max_pending
+    renders are queued or running; a render that cannot start and finish
+    within `timeout` seconds raises RenderTimeout. The pool is started on the
+    first render in each process, so a preloading gunicorn master never hands
+    its pool to forked workers. With workers=0 charts are rendered in the
+    calling thread, which is safe since every render owns its Figure.
+    """
+    
+    def __init__(self, workers=2, timeout=30.0, max_pending=None):
+        self.workers = workers
+        self.timeout = timeout
+        # Waiting renders queue in the pool in arrival order
+        self.max_pending = max_pending or 8 * max(workers, 1)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self.renders = 0
+        self.timeouts = 0
+    
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+                self._pid = os.getpid()
+            return self._pool
+    
+    def render(self, name, stats):
+        """PNG bytes of one chart of a StatisticsStore snapshot"""
+        if self.workers <= 0:
+            png = render_chart(name, stats)
+            self._count('renders')
+            return png
+        
+        deadline = time.monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count('timeouts')
+            raise RenderTimeout(f'Chart renderer busy: {self.max_pending} renders pending for {self.timeout:g}s')
+        pool = self._executor()
+        try:
+            future = pool.submit(render_chart, name, stats)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is freed when the worker is, even if this request gave up waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        
+        try:
+            png = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            self._count('timeouts')
+            raise RenderTimeout(f'Rendering {name} took longer than {self.timeout:g}s') from None
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+        self._count('renders')
+        return png
+    
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'timeout': self.timeout,
+            'max_pending': self.max_pending,
+            'renders': self.renders,
+            'timeouts': self.timeouts,
+        }
+    
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class CachedResource:
+    """Response body plus the validators browsers need to revalidate it"""
+    
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.last_modified = time.time()
+
+
+class VisualizationCache:
+    """Render each dashboard chart lazily and reuse it until the data changes"""
+    
+    def __init__(self, store=None, data_path=DASHBOARD_DATA_PATH, renderer=None):
+        self._store = store
+        self.data_path = data_path
+        # Renders in the calling thread unless given a pooled ChartRenderer
+        self.renderer = renderer or ChartRenderer(workers=0)
+        self._lock = threading.Lock()
+        # Different charts render in parallel; concurrent requests for the same one share its render
+        self._render_locks = {name: threading.Lock() for name in CHARTS}
+        self.fingerprint = None
+        # Bumped by every refresh; results built from an older generation are not cached
+        self.generation = 0
+        self.data = None
+        self._charts = {}
+        self._bundle = None
+        self._chart_data = None
+        self.renders = 0
+    
+    @property
+    def store(self):
+        """The StatisticsStore behind the charts, built from data_path on first use"""
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = load_dashboard_store(self.data_path)
+        return self._store
+    
+    def refresh(self):
+        """Drop cached charts if the statistics changed since they were rendered"""
+        store = self.store
+        if store.version == self.fingerprint:
+            return
+        
+        with self._lock:
+            if store.version != self.fingerprint:
+                # Charts render from a snapshot, so concurrent updates cannot tear them
+                self.data = store.snapshot()
+                self._charts = {}
+                self._bundle = None
+                self._chart_data = None
+                self.fingerprint = self.data['version']
+                self.generation += 1
+    
+    def get_chart(self, name):
+        """Cached PNG for one chart, rendering it on first use"""
+        if name not in CHARTS:
+            raise KeyError(name)
+        
+        self.refresh()
+        chart = self._charts.get(name)
+        if chart is None:
+            with self._render_locks[name]:
+                # Charts and the data they are drawn from must belong to the same version
+                with self._lock:
+                    charts, data = self._charts, self.data
+                chart = charts.get(name)
+                if chart is None:
+                    chart = CachedResource(self.renderer.render(name, data), 'image/png')
+                    charts[name] = chart
+                    self.renders += 1
+        return chart
+    
+    def get(self):
+        """Cached JSON bundle of all charts as base64 strings"""
+        self.refresh()
+        bundle = self._bundle
+        if bundle is None:
+            generation = self.generation
+            images = {
+                name: base64.b64encode(self.get_chart(name).body).decode()
+                for name in CHARTS
+            }
+            bundle = CachedResource(json.dumps(images).encode(), 'application/json')
+            self._store_if_current(generation, '_bundle', bundle)
+        return bundle
+    
+    def get_data(self):
+        """Cached JSON aggregates for client-side rendering (no matplotlib involved)"""
+        self.refresh()
+        resource = self._chart_data
+        if resource is None:
+            with self._lock:
+                generation, data = self.generation, self.data
+            body = json.dumps(chart_data(data), separators=(',', ':')).encode()
+            resource = CachedResource(body, 'application/json')
+            self._store_if_current(generation, '_chart_data', resource)
+        return resource
+    
+    def _store_if_current(self, generation, attribute, resource):
+        """Cache a resource built outside the lock, unless a refresh happened meanwhile"""
+        with self._lock:
+            if self.generation == generation:
+                setattr(self, attribute, resource)
+    
+    def manifest(self):
+        """Chart names and titles, in display order"""
+        return [{'name': name, 'title': title} for name, (title, _) in CHARTS.items()]
+    
+    def invalidate(self):
+        with self._lock:
+            self.fingerprint = None
@@ -0,0 +1,13 @@
+"""WSGI entry point for gunicorn (see gunicorn.conf.py in the project directory)"""
+import os
+import sys
+
+# Add the backend directory (for `app`) and the project directory (for `backend.utils`) to Python path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from app.routes import create_app
+
+app = create_app()
@@ -0,0 +1,65 @@
+"""Throughput: batch endpoints versus looping over the single-item endpoints"""
+import contextlib
+import io
+import os
+import time
+
+from common import DATA_DIR, print_results
+
+from app.routes import create_app
+
+DIABETES_FIELDS = ['pregnancies', 'glucose', 'blood_pressure', 'skin_thickness',
+                   'insulin', 'bmi', 'diabetes_pedigree', 'age']
+
+
+def load_samples(n_items):
+    with open(os.path.join(DATA_DIR, 'hate_speech.csv'), encoding='utf-8') as f:
+        texts = [line.strip() for line in f if line.strip()][:n_items]
+
+    records = []
+    with open(os.path.join(DATA_DIR, 'diabetes.csv')) as f:
+        for line in f:
+            values = line.strip().split(',')[:len(DIABETES_FIELDS)]
+            records.append(dict(zip(DIABETES_FIELDS, values)))
+    records = (records * (n_items // len(records) + 1))[:n_items]
+    return texts, records
+
+
+def throughput(fn, n_items):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {'items': n_items, 'seconds': elapsed, 'items_per_sec': n_items / elapsed}
+
+
+def run(n_items=500):
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = create_app().test_client()
+    texts, records = load_samples(n_items)
+
+    def loop(url, payloads):
+        for payload in payloads:
+            assert client.post(url, json=payload).status_code == 200
+
+    def batch(url, payload):
+        assert client.post(url, json=payload).status_code == 200
+
+    results = {
+        'hate_speech_single_loop': throughput(
+            lambda: loop('/api/predict/hate-speech', [{'text': t} for t in texts]), len(texts)),
+        'hate_speech_batch': throughput(
+            lambda: batch('/api/predict/hate-speech/batch', {'texts': texts}), len(texts)),
+        'diabetes_single_loop': throughput(
+            lambda: loop('/api/predict/diabetes', records), len(records)),
+        'diabetes_batch': throughput(
+            lambda: batch('/api/predict/diabetes/batch', {'records': records}), len(records)),
+    }
+    results['hate_speech_speedup'] = (results['hate_speech_batch']['items_per_sec'] /
+                                      results['hate_speech_single_loop']['items_per_sec'])
+    results['diabetes_speedup'] = (results['diabetes_batch']['items_per_sec'] /
+                                   results['diabetes_single_loop']['items_per_sec'])
+    return results
+
+
+if __name__ == '__main__':
+    print_results('batch prediction', run())
@@ -0,0 +1,94 @@
+"""Bulk scoring CLI throughput: in-process versus a worker pool, and resume after a partial run
+
+Scores a generated JSONL file of messages with backend/score.py. Every run
+must produce byte-identical output, including one that resumes from a
+checkpoint written halfway through.
+"""
+import argparse
+import filecmp
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import BACKEND_DIR, DATA_DIR, print_results
+
+from score import score_file
+
+
+def write_messages(path, rows):
+    with open(os.path.join(DATA_DIR, 'hate_speech.csv'), encoding='utf-8', errors='replace') as f:
+        texts = [line.strip() for line in f if line.strip()]
+    with open(path, 'w') as f:
+        for i in range(rows):
+            # A numbered suffix keeps every message distinct for the prediction cache
+            f.write(json.dumps({'text': f'{texts[i % len(texts)]} {i}'}) + '\n')
+
+
+def interrupt_halfway(input_path, output_path, rows, chunk_size, timeout=300):
+    """Run the CLI in a subprocess and send it Ctrl-C once half the rows are checkpointed"""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'score.py'), 'hate_speech', input_path, output_path,
+         '--workers', '0', '--chunk-size', str(chunk_size)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    checkpoint_path = output_path + '.checkpoint'
+    deadline = time.monotonic() + timeout
+    try:
+        while time.monotonic() < deadline and process.poll() is None:
+            if os.path.exists(checkpoint_path):
+                with open(checkpoint_path) as f:
+                    rows_done = json.load(f)['rows_done']
+                if rows_done >= rows // 2:
+                    process.send_signal(signal.SIGINT)
+                    break
+            time.sleep(0.05)
+        process.wait(timeout=60)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    with open(checkpoint_path) as f:
+        return json.load(f)['rows_done']
+
+
+def run(rows=200000, chunk_size=10000, workers=None):
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'messages.jsonl')
+        write_messages(input_path, rows)
+
+        outputs = {}
+        for name, pool_size in (('in_process', 0), (f'pool_{workers}', workers)):
+            outputs[name] = os.path.join(tmp, f'{name}.jsonl')
+            summary = score_file('hate_speech', input_path, outputs[name], chunk_size=chunk_size, workers=pool_size)
+            results[name] = {'rows_per_s': summary['rows_per_s'], 'seconds': summary['seconds']}
+
+        # Interrupt the CLI once half the rows are checkpointed, tear the last
+        # line as a crash mid-write would, then resume
+        resumed = os.path.join(tmp, 'resumed.jsonl')
+        interrupted_at = interrupt_halfway(input_path, resumed, rows, chunk_size)
+        with open(resumed, 'ab') as f:
+            f.write(b'{"row": partial line after the checkpoint')
+        summary = score_file('hate_speech', input_path, resumed, chunk_size=chunk_size, workers=0)
+        results['resume'] = {
+            'interrupted_at_row': interrupted_at,
+            'resumed_at_row': summary['resumed_at_row'],
+            'identical': filecmp.cmp(outputs['in_process'], resumed, shallow=False),
+        }
+        results['identical_outputs'] = all(
+            filecmp.cmp(outputs['in_process'], path, shallow=False) for path in outputs.values()
+        )
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    print_results('bulk scoring', run(args.rows, args.chunk_size, args.workers))
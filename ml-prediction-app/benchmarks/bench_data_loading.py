@@ -0,0 +1,62 @@
+"""Peak memory of loading an inflated diabetes CSV: naive read_csv versus the chunked loader"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from common import DATA_DIR, print_results
+
+from backend.utils.data_loader import DIABETES_COLUMNS, load_diabetes_dataset
+
+
+def inflate_csv(path, n_rows, seed=42):
+    """Write n_rows resampled rows of data/diabetes.csv with small jitter so they stay unique"""
+    source = pd.read_csv(os.path.join(DATA_DIR, 'diabetes.csv'), header=None)
+    rng = np.random.default_rng(seed)
+    inflated = source.sample(n=n_rows, replace=True, random_state=seed).reset_index(drop=True)
+    # Jitter the pedigree column (index 6) so clean_numerical_data does not drop duplicates
+    inflated[6] = (inflated[6] + rng.uniform(0, 0.5, n_rows)).round(6)
+    inflated.to_csv(path, header=False, index=False)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    X, y = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'rows': len(X),
+        'seconds': elapsed,
+        'peak_mb': peak / 2 ** 20,
+        'result_mb': (X.nbytes + y.nbytes) / 2 ** 20,
+    }
+
+
+def naive_load(path):
+    df = pd.read_csv(path, header=None, names=DIABETES_COLUMNS)
+    X = df[DIABETES_COLUMNS[:-1]].to_numpy(dtype=np.float64)
+    y = df['Outcome'].to_numpy()
+    return X, y
+
+
+def run(n_rows=1000000, chunksize=100000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'diabetes_inflated.csv')
+        inflate_csv(path, n_rows)
+        results = {
+            'file_mb': os.path.getsize(path) / 2 ** 20,
+            'naive_read_csv_float64': measure(lambda: naive_load(path)),
+            'chunked_float32_loader': measure(lambda: load_diabetes_dataset(path, chunksize)),
+        }
+    results['peak_memory_reduction'] = (results['naive_read_csv_float64']['peak_mb'] /
+                                        results['chunked_float32_loader']['peak_mb'])
+    return results
+
+
+if __name__ == '__main__':
+    print_results('diabetes CSV loading', run())
@@ -0,0 +1,60 @@
+"""Diabetes random forest: scikit-learn predict_proba versus the compiled flat-array engine"""
+import contextlib
+import io
+import os
+import time
+
+import numpy as np
+
+from common import DATA_DIR, print_results, summarize, time_call
+
+from app.forest_engine import CompiledForest
+from app.models import DiabetesPredictor
+
+SAMPLE_FEATURES = [6, 180, 95, 35, 200, 35.5, 1.2, 55]
+
+
+def identical(forest, compiled, X):
+    """Whether the compiled engine reproduces predict_proba (tests/test_forest_engine.py checks it in detail)"""
+    expected = forest.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    return bool(actual.dtype == expected.dtype and np.array_equal(actual, expected))
+
+
+def rows_per_second(fn, rows, repeat=3):
+    return len(rows) / min(time_call(lambda: fn(rows), repeat))
+
+
+def run(repeat=200, batch_sizes=(32, 512, 5000)):
+    data_path = os.path.join(DATA_DIR, 'diabetes.csv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        sklearn_model = DiabetesPredictor(data_path=data_path if os.path.exists(data_path) else None)
+        compiled_model = DiabetesPredictor(data_path=sklearn_model.data_path, engine='compiled')
+
+    # Perturbed training rows, so traversal reaches leaves the training data does not
+    rng = np.random.default_rng(0)
+    X = sklearn_model.X[rng.integers(0, len(sklearn_model.X), 5000)].astype(np.float64)
+    X *= rng.uniform(0.8, 1.2, X.shape)
+
+    start = time.perf_counter()
+    compiled = CompiledForest(sklearn_model.model)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    results = {
+        'identical': identical(sklearn_model.model, compiled, X),
+        'nodes': compiled.node_count,
+        'compile_ms': compile_ms,
+        'sklearn_single_row': summarize(time_call(lambda: sklearn_model.infer(SAMPLE_FEATURES), repeat // 4)),
+        'compiled_single_row': summarize(time_call(lambda: compiled_model.infer(SAMPLE_FEATURES), repeat)),
+    }
+    results['single_row_speedup'] = (results['sklearn_single_row']['median_ms'] /
+                                     results['compiled_single_row']['median_ms'])
+    for size in batch_sizes:
+        rows = X[:size].tolist()
+        results[f'sklearn_batch_{size}_rows_per_s'] = rows_per_second(sklearn_model.infer_batch, rows)
+        results[f'compiled_batch_{size}_rows_per_s'] = rows_per_second(compiled_model.infer_batch, rows)
+    return results
+
+
+if __name__ == '__main__':
+    print_results('forest engine', run())
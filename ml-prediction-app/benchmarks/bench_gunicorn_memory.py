@@ -0,0 +1,66 @@
+"""Memory of gunicorn as the worker count grows, with and without preloading the models"""
+import http.client
+import json
+import os
+import subprocess
+import sys
+
+from common import PROJECT_DIR, print_results
+
+from bench_servers import REQUESTS, free_port, wait_until_ready
+
+
+def fetch_json(port, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request(method, path, body, {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    data = json.loads(response.read())
+    connection.close()
+    return data
+
+
+def measure(workers, preload, requests_per_worker=20, startup_timeout=180):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY=str(workers),
+               GUNICORN_PRELOAD='1' if preload else '0')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--log-level', 'warning'],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(process, port, startup_timeout)
+        # Exercise the models so every worker has touched their memory
+        for i in range(requests_per_worker * workers):
+            path, body = REQUESTS[i % len(REQUESTS)]
+            fetch_json(port, 'POST', path, body)
+        report = fetch_json(port, 'GET', '/api/memory')
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    worker_reports = report['workers']
+    return {
+        'workers': len(worker_reports),
+        'total_pss_mb': report['total_pss_kb'] / 1024,
+        'master_pss_mb': report['master']['pss_kb'] / 1024,
+        'worker_rss_mb': sum(w['rss_kb'] for w in worker_reports) / len(worker_reports) / 1024,
+        'worker_shared_mb': sum(w['shared_kb'] for w in worker_reports) / len(worker_reports) / 1024,
+        'worker_private_mb': sum(w['private_kb'] for w in worker_reports) / len(worker_reports) / 1024,
+    }
+
+
+def run(worker_counts=(1, 2, 4)):
+    results = {}
+    for preload in (False, True):
+        mode = 'preload' if preload else 'per_worker'
+        for workers in worker_counts:
+            results[f'{mode}_{workers}_workers'] = measure(workers, preload)
+        # Memory added by each extra worker (the goal is a flat line)
+        first, last = results[f'{mode}_{worker_counts[0]}_workers'], results[f'{mode}_{worker_counts[-1]}_workers']
+        results[f'{mode}_mb_per_extra_worker'] = ((last['total_pss_mb'] - first['total_pss_mb']) /
+                                                  (worker_counts[-1] - worker_counts[0]))
+    return results
+
+
+if __name__ == '__main__':
+    print_results('gunicorn memory', run())
@@ -0,0 +1,158 @@
+"""Load test across hot model reloads: no dropped requests, no latency spike
+
+A server is started on a fresh model directory and hit by concurrent
+keep-alive clients. Meanwhile new versions of both artifacts are published to
+the registry and swapped in with POST /api/admin/reload. Latency of requests
+that overlap a reload is compared with the rest, and every response's
+X-Model-Version header is checked against the versions that were live.
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+from common import BACKEND_DIR, PROJECT_DIR, print_results, summarize
+
+from bench_servers import REQUESTS, free_port, server_command, wait_until_ready
+
+from app.registry import ModelRegistry
+
+MODELS = {'/api/predict/hate-speech': 'hate_speech', '/api/predict/diabetes': 'diabetes'}
+ARTIFACT_METADATA = ('name', 'fingerprint', 'created_at', 'version', 'sklearn_version')
+# The admin API is disabled unless the server has a token
+ADMIN_TOKEN = 'bench-hot-reload'
+
+
+def republish(registry, name):
+    """Save the current artifact again, which gives it a new version"""
+    artifact = registry.load(name)
+    components = {key: value for key, value in artifact.items() if key not in ARTIFACT_METADATA}
+    return registry.save(name, artifact['fingerprint'], **components)
+
+
+def post(port, path, payload):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    headers = {'Content-Type': 'application/json', 'X-Admin-Token': ADMIN_TOKEN}
+    connection.request('POST', path, json.dumps(payload), headers)
+    response = connection.getresponse()
+    data = json.loads(response.read())
+    connection.close()
+    return response.status, data
+
+
+def client_loop(port, index, stop, records):
+    """Closed-loop client; appends (start, end, path, ok, version) per request"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    i = index
+    while not stop.is_set():
+        path, body = REQUESTS[i % len(REQUESTS)]
+        i += 1
+        start = time.monotonic()
+        try:
+            connection.request('POST', path, body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            ok, version = response.status == 200, response.getheader('X-Model-Version')
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            ok, version = False, None
+        records.append((start, time.monotonic(), path, ok, version))
+    connection.close()
+
+
+def analyze(records, windows):
+    """Latency outside and during reloads, errors, and responses from a stale model"""
+    def overlaps(record):
+        return any(record[0] < end and record[1] > start for start, end, _ in windows)
+
+    during = [end - start for start, end, _, ok, _ in records if ok and overlaps((start, end))]
+    steady = [end - start for start, end, _, ok, _ in records if ok and not overlaps((start, end))]
+
+    # Requests sent after a reload finished (and before the next one started)
+    # must be served by the versions that reload swapped in
+    stale = 0
+    for k, (_, finished, versions) in enumerate(windows):
+        next_start = windows[k + 1][0] if k + 1 < len(windows) else float('inf')
+        for start, end, path, ok, version in records:
+            if ok and finished < start and end < next_start and version != versions[MODELS[path]]:
+                stale += 1
+
+    results = {
+        'requests': len(records),
+        'errors': sum(1 for record in records if not record[3]),
+        'stale_responses': stale,
+        'versions_served': len({record[4] for record in records if record[3]}),
+        'steady': summarize(steady) if steady else {'runs': 0},
+        'during_reload': summarize(during) if during else {'runs': 0},
+    }
+    if steady and during:
+        results['p99_ratio'] = results['during_reload']['p99_ms'] / results['steady']['p99_ms']
+        results['median_ratio'] = results['during_reload']['median_ms'] / results['steady']['median_ms']
+    return results
+
+
+def run(server=None, clients=8, duration=10.0, reloads=4, startup_timeout=180):
+    if server is None:
+        server = 'gunicorn_sync' if importlib.util.find_spec('gunicorn') else 'flask_sync'
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        port = free_port()
+        env = dict(os.environ, MODEL_DIR=model_dir, ADMIN_TOKEN=ADMIN_TOKEN,
+                   PYTHONPATH=os.pathsep.join([PROJECT_DIR, BACKEND_DIR]))
+        process = subprocess.Popen(server_command(server, port, workers=1), cwd=PROJECT_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_ready(process, port, startup_timeout)
+            registry = ModelRegistry(model_dir)
+
+            records, stop = [], threading.Event()
+            threads = [threading.Thread(target=client_loop, args=(port, index, stop, records))
+                       for index in range(clients)]
+            for thread in threads:
+                thread.start()
+
+            # Reloads spread evenly over the run, with steady traffic before and after
+            windows, reload_seconds = [], []
+            interval = duration / (reloads + 1)
+            for _ in range(reloads):
+                time.sleep(interval)
+                versions = {name: ModelRegistry.version_of(republish(registry, name))
+                            for name in ('hate_speech', 'diabetes')}
+                start = time.monotonic()
+                status, data = post(port, '/api/admin/reload?wait=1', {'model': 'all'})
+                windows.append((start, time.monotonic(), versions))
+                if status != 200:
+                    raise RuntimeError(f'reload failed with {status}: {data}')
+                reload_seconds.extend(model['reload']['seconds'] for model in data['models'].values())
+            time.sleep(interval)
+
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    results = {'server': server, 'reloads': len(windows)}
+    results.update(analyze(records, windows))
+    results['reload_seconds'] = sum(reload_seconds) / len(reload_seconds)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=('flask_sync', 'gunicorn_sync'), default=None)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--reloads', type=int, default=4)
+    args = parser.parse_args()
+    print_results('hot reload', run(args.server, args.clients, args.duration, args.reloads))
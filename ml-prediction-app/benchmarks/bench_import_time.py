@@ -0,0 +1,59 @@
+"""Startup profile: import-time breakdown of the prediction app (python -X importtime)"""
+import os
+import subprocess
+import sys
+
+from common import BACKEND_DIR, PROJECT_DIR, print_results
+
+# Modules a prediction-only worker should never import at startup
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'plotly', 'nltk')
+
+STARTUP_SCRIPT = (
+    'import sys; import app.routes; '
+    'print(",".join(m for m in %r if m in sys.modules))' % (HEAVY_MODULES,)
+)
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def profile_startup():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([PROJECT_DIR, BACKEND_DIR]))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+        capture_output=True, text=True, env=env, cwd=PROJECT_DIR, check=True
+    )
+    loaded = [name for name in result.stdout.strip().split(',') if name]
+    return parse_importtime(result.stderr), loaded
+
+
+def run(repeat=3, top=10):
+    # Keep the fastest run so disk-cache warmup does not skew the profile
+    profiles = [profile_startup() for _ in range(repeat)]
+    modules, heavy_loaded = min(profiles, key=lambda p: p[0]['app.routes'][1])
+    # A regression, not a slow number: fail the scenario, also under benchmarks/run.py
+    if heavy_loaded:
+        raise RuntimeError(f"plotting/NLTK modules imported at startup: {','.join(heavy_loaded)}")
+
+    results = {
+        'app_routes_import_ms': modules['app.routes'][1] / 1000,
+        'modules_imported': len(modules),
+        'heavy_modules_loaded': ','.join(heavy_loaded) or 'none',
+    }
+    # Largest top-level packages by cumulative import time
+    packages = {name: times for name, times in modules.items() if '.' not in name}
+    for name, (_, cumulative_us) in sorted(packages.items(), key=lambda item: -item[1][1])[:top]:
+        results[f'import_{name}_ms'] = cumulative_us / 1000
+    return results
+
+
+if __name__ == '__main__':
+    print_results('import time', run())
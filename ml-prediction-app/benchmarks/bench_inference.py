@@ -0,0 +1,40 @@
+"""Per-request latency: predict() + get_confidence() versus a single infer() call"""
+import contextlib
+import io
+
+from common import print_results, summarize, time_call
+
+from app.models import DiabetesPredictor, HateSpeechDetector
+
+SAMPLE_TEXT = "I hate all people from that country, they are the worst!"
+SAMPLE_FEATURES = [6, 180, 95, 35, 200, 35.5, 1.2, 55]
+
+
+def run(repeat=200):
+    with contextlib.redirect_stdout(io.StringIO()):
+        hate_speech_model = HateSpeechDetector()
+        diabetes_model = DiabetesPredictor()
+
+    def hate_speech_two_pass():
+        hate_speech_model.predict(SAMPLE_TEXT)
+        hate_speech_model.get_confidence(SAMPLE_TEXT)
+
+    def diabetes_two_pass():
+        diabetes_model.predict(SAMPLE_FEATURES)
+        diabetes_model.get_probability(SAMPLE_FEATURES)
+
+    results = {
+        'hate_speech_two_pass': summarize(time_call(hate_speech_two_pass, repeat)),
+        'hate_speech_infer': summarize(time_call(lambda: hate_speech_model.infer(SAMPLE_TEXT), repeat)),
+        'diabetes_two_pass': summarize(time_call(diabetes_two_pass, repeat // 4)),
+        'diabetes_infer': summarize(time_call(lambda: diabetes_model.infer(SAMPLE_FEATURES), repeat // 4)),
+    }
+    results['hate_speech_speedup'] = (results['hate_speech_two_pass']['median_ms'] /
+                                      results['hate_speech_infer']['median_ms'])
+    results['diabetes_speedup'] = (results['diabetes_two_pass']['median_ms'] /
+                                   results['diabetes_infer']['median_ms'])
+    return results
+
+
+if __name__ == '__main__':
+    print_results('single-request inference', run())
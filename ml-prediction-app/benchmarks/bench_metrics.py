@@ -0,0 +1,44 @@
+"""Overhead of the Prometheus instrumentation on the fastest inference paths"""
+import contextlib
+import io
+
+from common import print_results, summarize, time_call
+
+from app import metrics
+from app.models import DiabetesPredictor, HateSpeechDetector
+
+SAMPLE_TEXT = "I hate all people from that country, they are the worst!"
+SAMPLE_FEATURES = [6, 180, 95, 35, 200, 35.5, 1.2, 55]
+
+
+def run(repeat=5000):
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Compiled engines: the per-call work is smallest, so overhead shows most
+        hate_speech_model = HateSpeechDetector(engine='compiled')
+        diabetes_model = DiabetesPredictor(engine='compiled')
+
+    results = {}
+    for enabled in (False, True):
+        metrics.set_enabled(enabled)
+        mode = 'enabled' if enabled else 'disabled'
+        results[f'hate_speech_infer_{mode}'] = summarize(
+            time_call(lambda: hate_speech_model.infer(SAMPLE_TEXT), repeat)
+        )
+        results[f'diabetes_infer_{mode}'] = summarize(
+            time_call(lambda: diabetes_model.infer(SAMPLE_FEATURES), repeat // 5)
+        )
+    metrics.set_enabled(True)
+
+    for name in ('hate_speech', 'diabetes'):
+        overhead = (results[f'{name}_infer_enabled']['median_ms'] -
+                    results[f'{name}_infer_disabled']['median_ms'])
+        results[f'{name}_overhead_us'] = overhead * 1000
+    results['observe_us'] = min(time_call(
+        lambda: metrics.STAGE_LATENCY.labels('bench', 'stage').observe(0.001), repeat
+    )) * 1e6
+    results['render'] = summarize(time_call(metrics.REGISTRY.render, 100))
+    return results
+
+
+if __name__ == '__main__':
+    print_results('metrics overhead', run())
@@ -0,0 +1,81 @@
+"""Concurrent single-item traffic: direct model calls versus the micro-batcher"""
+import contextlib
+import io
+import threading
+import time
+
+from common import print_results, summarize
+
+from app.batching import MicroBatcher
+from app.models import DiabetesPredictor, HateSpeechDetector
+
+SAMPLE_TEXTS = [
+    "I hate all people from that country, they are the worst!",
+    "Thank you for your help, have a wonderful day",
+    "You are garbage and nobody wants you here",
+    "Let's work together on this project",
+]
+SAMPLE_FEATURES = [6, 180, 95, 35, 200, 35.5, 1.2, 55]
+
+
+def load_test(infer, make_item, clients, requests_per_client):
+    """Run `clients` threads that each send requests back to back"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(index):
+        timings = []
+        for i in range(requests_per_client):
+            item = make_item(index, i)
+            start = time.perf_counter()
+            infer(item)
+            timings.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(timings)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = summarize(latencies)
+    stats['requests_per_s'] = len(latencies) / elapsed
+    return stats
+
+
+def run(clients=32, requests_per_client=25, max_batch_size=32, max_wait_ms=2.0):
+    with contextlib.redirect_stdout(io.StringIO()):
+        # No prediction cache, so every request reaches the model
+        hate_speech_model = HateSpeechDetector()
+        diabetes_model = DiabetesPredictor()
+
+    scenarios = (
+        ('hate_speech', hate_speech_model,
+         lambda client, i: f'{SAMPLE_TEXTS[(client + i) % len(SAMPLE_TEXTS)]} {client} {i}'),
+        ('diabetes', diabetes_model,
+         lambda client, i: SAMPLE_FEATURES[:-1] + [20 + (client * requests_per_client + i) % 60]),
+    )
+
+    results = {}
+    for name, model, make_item in scenarios:
+        results[f'{name}_direct'] = load_test(model.infer, make_item, clients, requests_per_client)
+
+        batcher = MicroBatcher(model.infer_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        try:
+            results[f'{name}_batched'] = load_test(batcher, make_item, clients, requests_per_client)
+            stats = batcher.stats()
+        finally:
+            batcher.close()
+        results[f'{name}_mean_batch_size'] = stats['mean_batch_size']
+        results[f'{name}_batch_sizes'] = stats['batch_size_distribution']
+        results[f'{name}_queue_wait_ms'] = stats['queue_wait_ms']
+        results[f'{name}_throughput_gain'] = (results[f'{name}_batched']['requests_per_s'] /
+                                              results[f'{name}_direct']['requests_per_s'])
+    return results
+
+
+if __name__ == '__main__':
+    print_results('micro-batching', run())
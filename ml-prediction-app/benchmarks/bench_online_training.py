@@ -0,0 +1,71 @@
+"""Hate speech training: in-memory TF-IDF + LogisticRegression versus out-of-core hashing + SGD
+
+data/hate_speech.csv has no labels, so both pipelines learn labels produced by the
+seed TF-IDF model (the same teacher StreamingHateSpeechDetector uses) and are scored
+on a held-out tail of the corpus.
+"""
+import contextlib
+import io
+import os
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score
+
+from common import DATA_DIR, print_results
+
+from app.models import HateSpeechDetector
+from backend.utils.data_loader import iter_text_chunks
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    model, rows = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, {'rows': rows, 'seconds': elapsed, 'rows_per_sec': rows / elapsed,
+                   'peak_mb': peak / 2 ** 20}
+
+
+def run(holdout=1000, batch_size=1000):
+    with contextlib.redirect_stdout(io.StringIO()):
+        teacher = HateSpeechDetector()
+    preprocess = teacher.preprocess_text
+
+    texts = [text for chunk, _ in iter_text_chunks(os.path.join(DATA_DIR, 'hate_speech.csv'))
+             for text in chunk]
+    labels = np.array([1 if r['probability'] >= 0.5 else 0 for r in teacher.infer_batch(texts)])
+    train_texts, test_texts = texts[:-holdout], texts[-holdout:]
+    train_labels, test_labels = labels[:-holdout], labels[-holdout:]
+
+    def batch_pipeline():
+        vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
+        X = vectorizer.fit_transform([preprocess(t) for t in train_texts])
+        model = LogisticRegression().fit(X, train_labels)
+        return (vectorizer, model), len(train_texts)
+
+    def online_pipeline():
+        vectorizer = HashingVectorizer(n_features=2 ** 18, alternate_sign=False, stop_words='english')
+        model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+        for start in range(0, len(train_texts), batch_size):
+            X = vectorizer.transform([preprocess(t) for t in train_texts[start:start + batch_size]])
+            model.partial_fit(X, train_labels[start:start + batch_size], classes=[0, 1])
+        return (vectorizer, model), len(train_texts)
+
+    results = {}
+    for name, pipeline in (('tfidf_logreg_in_memory', batch_pipeline),
+                           ('hashing_sgd_out_of_core', online_pipeline)):
+        (vectorizer, model), stats = measure(pipeline)
+        predictions = model.predict(vectorizer.transform([preprocess(t) for t in test_texts]))
+        stats['holdout_accuracy'] = accuracy_score(test_labels, predictions)
+        results[name] = stats
+    return results
+
+
+if __name__ == '__main__':
+    print_results('hate speech training', run())
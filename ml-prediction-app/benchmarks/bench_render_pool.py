@@ -0,0 +1,163 @@
+"""Chart rendering under 50 concurrent requests: shared pyplot state, per-call Figures in threads, and the process pool
+
+Every render must produce exactly the PNG of a sequential reference render.
+The pyplot mode reproduces the old rendering code (one global current figure)
+without its lock, to show why it needed one. The HTTP check fires the
+concurrent requests at a threaded server with a cold chart cache.
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from common import print_results, summarize
+
+from werkzeug.serving import make_server
+
+from app.routes import create_app
+from backend.utils.visualization import CHARTS, ChartRenderer, RenderTimeout, load_dashboard_store, render_chart
+
+NAMES = list(CHARTS)
+
+
+def pyplot_render(name, stats):
+    """The charts as drawn before per-call Figures: on pyplot's global current figure"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 6))
+    if name == 'age_distribution':
+        histogram = stats['histograms']['Age']
+        plt.bar(histogram['edges'][:-1], histogram['counts'], width=5, align='edge')
+    elif name == 'bmi_glucose_scatter':
+        plt.scatter(stats['sample'][:, 5], stats['sample'][:, 1])
+    elif name == 'outcome_pie':
+        plt.pie(list(stats['class_counts'].values()))
+    else:
+        plt.imshow(stats['correlation'])
+    plt.title(name)
+    img = io.BytesIO()
+    plt.savefig(img, format='png')
+    plt.close()
+    return img.getvalue()
+
+
+def hammer(render, requests, concurrency, reference):
+    """Run `requests` renders from `concurrency` threads; count failures and wrong images"""
+    latencies, errors, wrong = [], 0, 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors, wrong
+        name = NAMES[i % len(NAMES)]
+        start = time.perf_counter()
+        try:
+            png = render(name)
+            bad = png != reference[name]
+        except Exception:
+            png, bad = None, None
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if png is None:
+                errors += 1
+            elif bad:
+                wrong += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    seconds = time.perf_counter() - start
+    latency = summarize(latencies)
+    return {
+        'errors': errors,
+        'wrong_images': wrong,
+        'renders_per_s': requests / seconds,
+        'median_ms': latency['median_ms'],
+        'p99_ms': latency['p99_ms'],
+    }
+
+
+def http_check(concurrency, workers):
+    """Concurrent requests for every chart against a threaded server with a cold cache"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app({'VISUALIZATIONS_RENDER_WORKERS': workers, 'METRICS_ENABLED': False})
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_port}/api/visualizations'
+    stats = load_dashboard_store().snapshot()
+    reference = {name: render_chart(name, stats) for name in NAMES}
+
+    def fetch(i):
+        name = NAMES[i % len(NAMES)]
+        with urllib.request.urlopen(f'{base}/{name}.png', timeout=120) as response:
+            return response.status, response.read() == reference[name]
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            responses = list(executor.map(fetch, range(concurrency)))
+        seconds = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    return {
+        'requests': len(responses),
+        'ok': sum(status == 200 for status, _ in responses),
+        'correct_images': sum(correct for _, correct in responses),
+        'seconds': seconds,
+    }
+
+
+def timeout_check():
+    """A render slower than the timeout fails fast with RenderTimeout (a 504 over HTTP)"""
+    renderer = ChartRenderer(workers=1, timeout=0.05)
+    stats = load_dashboard_store().snapshot()
+    start = time.perf_counter()
+    try:
+        renderer.render('correlation_heatmap', stats)
+        raised = False
+    except RenderTimeout:
+        raised = True
+    waited = time.perf_counter() - start
+    renderer.shutdown()
+    return {'raised': raised, 'waited_ms': waited * 1000}
+
+
+def run(requests=200, concurrency=50, workers=None):
+    workers = workers or min(4, os.cpu_count() or 1) + 1
+    stats = load_dashboard_store().snapshot()
+    reference = {name: render_chart(name, stats) for name in NAMES}
+    pyplot_reference = {name: pyplot_render(name, stats) for name in NAMES}
+
+    results = {
+        'pyplot_shared_state': hammer(lambda name: pyplot_render(name, stats), requests, concurrency,
+                                      pyplot_reference),
+        'figure_threads': hammer(lambda name: render_chart(name, stats), requests, concurrency, reference),
+    }
+
+    renderer = ChartRenderer(workers=workers, timeout=120)
+    # Start the workers and import matplotlib in them before timing
+    list(ThreadPoolExecutor(workers).map(lambda name: renderer.render(name, stats), NAMES * workers))
+    results[f'process_pool_{workers}'] = hammer(lambda name: renderer.render(name, stats), requests,
+                                                concurrency, reference)
+    renderer.shutdown()
+
+    results['http_cold_cache'] = http_check(concurrency, workers)
+    results['timeout'] = timeout_check()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=None, help='render processes (default CPUs + 1, at most 5)')
+    args = parser.parse_args()
+    print_results('chart rendering under concurrency', run(args.requests, args.concurrency, args.workers))
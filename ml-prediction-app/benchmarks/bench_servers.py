@@ -0,0 +1,165 @@
+"""Load test: the sync Flask server versus gunicorn and the ASGI entry point under uvicorn
+
+Each server is started as a local subprocess and hit by concurrent keep-alive
+clients posting single-item prediction requests. Servers whose package is
+not installed are reported as skipped.
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from common import BACKEND_DIR, PROJECT_DIR, print_results, summarize
+
+HATE_SPEECH_BODY = json.dumps({'text': 'I hate all people from that country, they are the worst!'})
+DIABETES_BODY = json.dumps({
+    'pregnancies': 6, 'glucose': 180, 'blood_pressure': 95, 'skin_thickness': 35,
+    'insulin': 200, 'bmi': 35.5, 'diabetes_pedigree': 1.2, 'age': 55
+})
+REQUESTS = [
+    ('/api/predict/hate-speech', HATE_SPEECH_BODY),
+    ('/api/predict/diabetes', DIABETES_BODY),
+]
+
+# The current sync server: backend/main.py without the debug reloader
+FLASK_SCRIPT = (
+    'import sys; from app.routes import create_app; '
+    'create_app().run(host="127.0.0.1", port=int(sys.argv[1]), threaded=True)'
+)
+
+
+def server_command(name, port, workers):
+    """Command line for a server, or None if it is not installed"""
+    if name == 'flask_sync':
+        return [sys.executable, '-c', FLASK_SCRIPT, str(port)]
+    if name == 'gunicorn_sync':
+        if importlib.util.find_spec('gunicorn') is None:
+            return None
+        return [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', '4',
+                '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app.routes:create_app()']
+    if name == 'uvicorn_asgi':
+        if importlib.util.find_spec('uvicorn') is None:
+            return None
+        return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--app-dir', BACKEND_DIR,
+                '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning']
+    raise ValueError(f'Unknown server: {name}')
+
+
+SERVERS = ('flask_sync', 'gunicorn_sync', 'uvicorn_asgi')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(process, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/api/visualizations/manifest')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'server not ready after {timeout}s')
+
+
+def load_test(port, clients, duration):
+    """Closed-loop clients sending REQUESTS round-robin for `duration` seconds"""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        timings, failed = [], 0
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        i = index
+        while time.monotonic() < stop_at:
+            path, body = REQUESTS[i % len(REQUESTS)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                connection.request('POST', path, body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                ok = False
+            if ok:
+                timings.append(time.perf_counter() - start)
+            else:
+                failed += 1
+        connection.close()
+        with lock:
+            latencies.extend(timings)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = summarize(latencies) if latencies else {'runs': 0}
+    stats['requests_per_s'] = len(latencies) / elapsed
+    stats['errors'] = sum(errors)
+    return stats
+
+
+def run(servers=SERVERS, clients=16, duration=10.0, workers=None, startup_timeout=180):
+    workers = workers or os.cpu_count() or 1
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([PROJECT_DIR, BACKEND_DIR]),
+        ASGI_WORKERS=str(workers),
+    )
+
+    results = {}
+    for name in servers:
+        port = free_port()
+        command = server_command(name, port, workers)
+        if command is None:
+            results[name] = 'skipped (not installed)'
+            continue
+
+        process = subprocess.Popen(command, cwd=PROJECT_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_ready(process, port, startup_timeout)
+            load_test(port, min(clients, 4), 1.0)  # warm-up
+            results[name] = load_test(port, clients, duration)
+        except RuntimeError as e:
+            results[name] = f'failed: {e}'
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=list(SERVERS))
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=None, help='gunicorn workers / ASGI pool size')
+    args = parser.parse_args()
+    print_results('servers', run(args.servers, args.clients, args.duration, args.workers))
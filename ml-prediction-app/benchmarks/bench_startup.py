@@ -0,0 +1,42 @@
+"""Startup time: cold training versus loading persisted model artifacts, per model and for create_app()"""
+import contextlib
+import io
+import tempfile
+
+from common import print_results, summarize, time_call
+
+from app.models import DiabetesPredictor, HateSpeechDetector
+from app.registry import ModelRegistry
+from app.routes import create_app
+
+
+def run(repeat=3):
+    results = {}
+    with tempfile.TemporaryDirectory() as model_dir, contextlib.redirect_stdout(io.StringIO()):
+        registry = ModelRegistry(model_dir)
+
+        for name, model_class in (('hate_speech', HateSpeechDetector),
+                                  ('diabetes', DiabetesPredictor)):
+            cold = time_call(lambda: model_class(), repeat)
+            # First construction with a registry trains and persists the artifact
+            model_class(registry=registry)
+            warm = time_call(lambda: model_class(registry=registry), repeat)
+
+            results[f'{name}_cold_train'] = summarize(cold)
+            results[f'{name}_artifact_load'] = summarize(warm)
+            results[f'{name}_speedup'] = min(cold) / min(warm)
+    
+    # Whole app: an empty model directory (train and save) versus saved artifacts
+    cold, warm = [], []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as model_dir, contextlib.redirect_stdout(io.StringIO()):
+            cold.extend(time_call(lambda: create_app({'MODEL_DIR': model_dir}), 1))
+            warm.extend(time_call(lambda: create_app({'MODEL_DIR': model_dir}), 1))
+    results['create_app_cold'] = summarize(cold)
+    results['create_app_warm'] = summarize(warm)
+    results['create_app_speedup'] = min(cold) / min(warm)
+    return results
+
+
+if __name__ == '__main__':
+    print_results('startup', run())
@@ -0,0 +1,93 @@
+"""Dashboard chart cost versus data size: full-DataFrame rendering against the incremental statistics store
+
+Renders the four dashboard charts from data/diabetes.csv inflated to several
+sizes. The DataFrame path recomputes histograms, correlations and scatters
+every chart from all rows; the store path renders from pre-aggregated state,
+so its cost should stay flat as the data grows.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import DATA_DIR, print_results, summarize, time_call
+
+from bench_data_loading import inflate_csv
+from backend.utils.data_loader import DIABETES_COLUMNS, load_diabetes_dataset
+from backend.utils.stats_store import StatisticsStore
+from backend.utils.visualization import CHARTS, figure_to_png, new_figure, render_chart
+
+
+def render_from_dataframe(df):
+    """The charts drawn straight from every row, as before the statistics store"""
+    import seaborn as sns
+    figure, ax = new_figure((10, 6))
+    ax.hist(df['Age'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+    figure_to_png(figure)
+    figure, ax = new_figure((10, 6))
+    ax.scatter(df['BMI'], df['Glucose'], c=np.where(df['Outcome'] == 1, 'red', 'blue'), alpha=0.6)
+    figure_to_png(figure)
+    figure, ax = new_figure((8, 8))
+    ax.pie(df['Outcome'].value_counts().values, autopct='%1.1f%%')
+    figure_to_png(figure)
+    figure, ax = new_figure((10, 8))
+    sns.heatmap(df.corr(), annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax)
+    figure_to_png(figure)
+
+
+def render_from_store(store):
+    stats = store.snapshot()
+    for name in CHARTS:
+        render_chart(name, stats)
+
+
+def run(sizes=(768, 100000, 1000000), repeat=3):
+    results = {}
+    # Warm up matplotlib and seaborn imports outside the timings
+    render_from_store(StatisticsStore.from_csv(os.path.join(DATA_DIR, 'diabetes.csv')))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = os.path.join(DATA_DIR, 'diabetes.csv')
+            if size != 768:
+                path = os.path.join(tmp_dir, f'diabetes_{size}.csv')
+                inflate_csv(path, size)
+
+            start = time.perf_counter()
+            store = StatisticsStore.from_csv(path)
+            build_seconds = time.perf_counter() - start
+
+            X, y = load_diabetes_dataset(path)
+            df = pd.DataFrame(np.column_stack([X, y]).astype(np.float64), columns=DIABETES_COLUMNS)
+            results[f'rows_{size}'] = {
+                'store_build_seconds': build_seconds,
+                'store_render_ms': summarize(time_call(lambda: render_from_store(store), repeat))['median_ms'],
+                'dataframe_render_ms': summarize(time_call(lambda: render_from_dataframe(df), repeat))['median_ms'],
+                # Same cleaned rows, so only floating-point differences are expected
+                'max_correlation_error': float(np.nanmax(np.abs(store.correlation() - df.corr().to_numpy()))),
+            }
+
+    # Cost of adding one live record, whatever the store already holds
+    updates = 10000
+    records = df.to_numpy()[:updates]
+    start = time.perf_counter()
+    for record in records:
+        store.update(record)
+    results['update_per_record_us'] = (time.perf_counter() - start) / len(records) * 1e6
+
+    largest, smallest = results[f'rows_{max(sizes)}'], results[f'rows_{min(sizes)}']
+    results['store_render_growth'] = largest['store_render_ms'] / smallest['store_render_ms']
+    results['dataframe_render_growth'] = largest['dataframe_render_ms'] / smallest['dataframe_render_ms']
+    results['largest_render_speedup'] = largest['dataframe_render_ms'] / largest['store_render_ms']
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[768, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print_results('statistics store', run(tuple(args.sizes), args.repeat))
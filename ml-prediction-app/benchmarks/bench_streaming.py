@@ -0,0 +1,130 @@
+"""NDJSON streaming versus JSON batch predictions: time to first result, throughput and server peak memory per job size
+
+Posts the same hate speech messages to /api/predict/hate-speech/batch (one
+JSON document each way) and to /api/predict/hate-speech/stream (NDJSON each
+way). Each job runs against a fresh Flask server process, whose peak RSS
+(VmHWM) is read after the job. The client uploads from one thread while it
+reads results in another, as a streaming client must: the server answers
+before the upload ends, and a client that only reads once it has sent
+everything stalls as soon as the socket buffers fill.
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import threading
+import time
+
+from common import BACKEND_DIR, DATA_DIR, PROJECT_DIR, print_results
+
+from bench_servers import free_port, server_command, wait_until_ready
+
+
+def make_texts(n):
+    with open(os.path.join(DATA_DIR, 'hate_speech.csv'), encoding='utf-8', errors='replace') as f:
+        texts = [line.strip() for line in f if line.strip()]
+    # A numbered suffix keeps every message distinct
+    return [f'{texts[i % len(texts)]} {i}' for i in range(n)]
+
+
+def memory_mb(pid):
+    """(current RSS, peak RSS) of a process in MB, from /proc"""
+    values = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'VmHWM'):
+                values[key] = int(value.split()[0]) / 1024
+    return values['VmRSS'], values['VmHWM']
+
+
+def post(port, path, body, content_type, block_size=65536):
+    """(seconds to the first response byte, total seconds, response lines, status)"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    start = time.perf_counter()
+    connection.putrequest('POST', path)
+    connection.putheader('Content-Type', content_type)
+    connection.putheader('Content-Length', str(len(body)))
+    connection.endheaders()
+    # getresponse() drops connection.sock when the response will close the
+    # connection, which a streamed response does while the upload goes on
+    sock = connection.sock
+
+    def upload():
+        for offset in range(0, len(body), block_size):
+            sock.sendall(body[offset:offset + block_size])
+
+    sender = threading.Thread(target=upload, daemon=True)
+    sender.start()
+    response = connection.getresponse()
+    first_byte, lines = None, 0
+    while True:
+        block = response.read1(block_size)
+        if not block:
+            break
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        lines += block.count(b'\n')
+    total = time.perf_counter() - start
+    sender.join()
+    connection.close()
+    return first_byte, total, lines, response.status
+
+
+def measure(env, path, body, content_type, rows, startup_timeout=180):
+    port = free_port()
+    process = subprocess.Popen(server_command('flask_sync', port, 1), cwd=PROJECT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(process, port, startup_timeout)
+        idle_mb, _ = memory_mb(process.pid)
+        first_byte, total, lines, status = post(port, path, body, content_type)
+        _, peak_mb = memory_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        'status': status,
+        'first_result_ms': first_byte * 1000,
+        'seconds': total,
+        'rows_per_s': rows / total,
+        'peak_rss_mb': peak_mb,
+        'job_peak_mb': peak_mb - idle_mb,
+        # Streaming answers one line per record
+        'complete': lines == rows if path.endswith('/stream') else status == 200,
+    }
+
+
+def run(sizes=(10000, 100000)):
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([PROJECT_DIR, BACKEND_DIR]),
+        BATCH_MAX_ITEMS=str(max(sizes)),
+        HATE_SPEECH_CACHE_SIZE='0',
+    )
+    results = {}
+    for rows in sizes:
+        texts = make_texts(rows)
+        batch_body = json.dumps({'texts': texts}).encode()
+        stream_body = ''.join(json.dumps({'text': text}) + '\n' for text in texts).encode()
+        results[f'batch_{rows}'] = measure(env, '/api/predict/hate-speech/batch', batch_body,
+                                           'application/json', rows)
+        results[f'stream_{rows}'] = measure(env, '/api/predict/hate-speech/stream', stream_body,
+                                            'application/x-ndjson', rows)
+
+    small, large = min(sizes), max(sizes)
+    results['stream_job_peak_growth_mb'] = (results[f'stream_{large}']['job_peak_mb'] -
+                                            results[f'stream_{small}']['job_peak_mb'])
+    results['batch_job_peak_growth_mb'] = (results[f'batch_{large}']['job_peak_mb'] -
+                                           results[f'batch_{small}']['job_peak_mb'])
+    results['first_result_speedup'] = (results[f'batch_{large}']['first_result_ms'] /
+                                       results[f'stream_{large}']['first_result_ms'])
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    print_results('streaming predictions', run(tuple(args.sizes)))
@@ -0,0 +1,53 @@
+"""Text normalization throughput on data/hate_speech.csv against the normalizers it replaced
+
+The legacy functions are the reference copies in tests/test_text_normalization.py,
+which also checks that the outputs are identical.
+"""
+import os
+import sys
+import time
+
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from common import PROJECT_DIR, print_results
+
+from backend.utils.text_normalization import TextNormalizer
+
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'tests'))
+from test_text_normalization import legacy_clean_text, legacy_preprocess_text, load_corpus  # noqa: E402
+
+
+def throughput(fn, n_items, repeat=3):
+    best = min(_timed(fn) for _ in range(repeat))
+    return {'items': n_items, 'seconds': best, 'items_per_sec': n_items / best}
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run():
+    stop_words = set(ENGLISH_STOP_WORDS)
+    normalizer = TextNormalizer(stop_words)
+    texts = load_corpus()
+
+    results = {
+        'preprocess_legacy': throughput(lambda: [legacy_preprocess_text(t) for t in texts], len(texts)),
+        'preprocess_batch': throughput(lambda: normalizer.normalize_batch(texts), len(texts)),
+        'clean_legacy': throughput(lambda: [legacy_clean_text(t, stop_words) for t in texts], len(texts)),
+        'clean_batch': throughput(lambda: normalizer.clean_batch(texts), len(texts)),
+    }
+    results['preprocess_speedup'] = (results['preprocess_batch']['items_per_sec'] /
+                                     results['preprocess_legacy']['items_per_sec'])
+    results['clean_speedup'] = (results['clean_batch']['items_per_sec'] /
+                                results['clean_legacy']['items_per_sec'])
+    results['outputs_equivalent'] = (normalizer.normalize_batch(texts) == [legacy_preprocess_text(t) for t in texts]
+                                     and normalizer.clean_batch(texts) == [legacy_clean_text(t, stop_words)
+                                                                          for t in texts])
+    return results
+
+
+if __name__ == '__main__':
+    print_results('text normalization', run())
@@ -0,0 +1,67 @@
+"""Hate speech scoring: TfidfVectorizer.transform + predict_proba versus the compiled sparse-dot scorer"""
+import contextlib
+import io
+import os
+
+import numpy as np
+
+from common import DATA_DIR, print_results, summarize, time_call
+
+from app.models import HateSpeechDetector
+from backend.utils.data_loader import iter_text_chunks
+
+SAMPLE_TEXT = "I hate all people from that country, they are the worst!"
+
+
+def load_texts(limit=5000):
+    path = os.path.join(DATA_DIR, 'hate_speech.csv')
+    if not os.path.exists(path):
+        return [SAMPLE_TEXT] * limit
+    texts = []
+    for chunk, _ in iter_text_chunks(path, chunksize=limit):
+        texts.extend(chunk)
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+def check_identical(model, processed_texts):
+    """The compiled scorer must reproduce predict_proba exactly"""
+    expected = model.model.predict_proba(model.vectorizer.transform(processed_texts))
+    actual = model.compiled.predict_proba(processed_texts)
+    assert actual.dtype == expected.dtype and np.array_equal(actual, expected), \
+        'compiled scorer disagrees with predict_proba'
+    return len(processed_texts)
+
+
+def run(repeat=2000, batch_sizes=(100, 5000)):
+    with contextlib.redirect_stdout(io.StringIO()):
+        sklearn_model = HateSpeechDetector()
+        compiled_model = HateSpeechDetector(engine='compiled')
+
+    texts = load_texts()
+    processed_texts = compiled_model.preprocess_texts(texts)
+    sample = compiled_model.preprocess_text(SAMPLE_TEXT)
+
+    results = {
+        'identical_texts': check_identical(compiled_model, processed_texts),
+        # Scoring only: the text is already normalized
+        'sklearn_score_single': summarize(time_call(lambda: sklearn_model._predict_proba([sample]), repeat // 10)),
+        'compiled_score_single': summarize(time_call(lambda: compiled_model._predict_proba([sample]), repeat)),
+        'compiled_decision_us': min(time_call(lambda: compiled_model.compiled.decision_function(sample), repeat)) * 1e6,
+        # Full request path (normalization, scoring, interpretation)
+        'sklearn_infer': summarize(time_call(lambda: sklearn_model.infer(SAMPLE_TEXT), repeat // 10)),
+        'compiled_infer': summarize(time_call(lambda: compiled_model.infer(SAMPLE_TEXT), repeat)),
+    }
+    results['single_text_speedup'] = (results['sklearn_score_single']['median_ms'] /
+                                      results['compiled_score_single']['median_ms'])
+    for size in batch_sizes:
+        batch = texts[:size]
+        for name, model in (('sklearn', sklearn_model), ('compiled', compiled_model)):
+            best = min(time_call(lambda: model.infer_batch(batch), 3))
+            results[f'{name}_batch_{size}_texts_per_s'] = len(batch) / best
+    return results
+
+
+if __name__ == '__main__':
+    print_results('text scorer', run())
@@ -0,0 +1,45 @@
+"""Dashboard chart latency: cold rendering versus the cached and revalidated paths, and PNG versus JSON chart payloads"""
+import contextlib
+import io
+import json
+
+from common import print_results, summarize, time_call
+
+from app.routes import create_app
+from backend.utils.visualization import VisualizationCache, chart_data, create_visualizations
+
+
+def run(repeat=5):
+    cache = VisualizationCache()
+    cache.get()
+    stats = cache.store.snapshot()
+    results = {
+        'cold_render': summarize(time_call(create_visualizations, repeat)),
+        # Aggregates for client-side rendering: no matplotlib on the server
+        'cold_chart_data': summarize(time_call(lambda: json.dumps(chart_data(stats)), repeat * 20)),
+        'warm_cache_get': summarize(time_call(cache.get, repeat * 20)),
+    }
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = create_app().test_client()
+    etag = client.get('/api/visualizations').headers['ETag']
+
+    results['http_warm_200'] = summarize(time_call(
+        lambda: client.get('/api/visualizations'), repeat * 20))
+    results['http_revalidate_304'] = summarize(time_call(
+        lambda: client.get('/api/visualizations', headers={'If-None-Match': etag}), repeat * 20))
+    results['http_single_png'] = summarize(time_call(
+        lambda: client.get('/api/visualizations/age_distribution.png'), repeat * 20))
+    results['http_chart_data'] = summarize(time_call(
+        lambda: client.get('/api/visualizations/data'), repeat * 20))
+    results['warm_speedup'] = results['cold_render']['median_ms'] / results['http_warm_200']['median_ms']
+    results['cold_data_speedup'] = results['cold_render']['median_ms'] / results['cold_chart_data']['median_ms']
+    results['payload_kb'] = {
+        'png_bundle': len(client.get('/api/visualizations').data) / 1024,
+        'chart_data': len(client.get('/api/visualizations/data').data) / 1024,
+    }
+    return results
+
+
+if __name__ == '__main__':
+    print_results('visualizations', run())
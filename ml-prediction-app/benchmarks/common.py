@@ -0,0 +1,50 @@
+import os
+import statistics
+import sys
+import time
+
+# Make the backend importable the same way backend/main.py does
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BACKEND_DIR = os.path.join(PROJECT_DIR, 'backend')
+for path in (PROJECT_DIR, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+
+
+def time_call(fn, repeat=5):
+    """Run fn `repeat` times and return the individual wall times in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    """Summary statistics (in milliseconds) for a list of timings in seconds"""
+    ordered = sorted(timings)
+    return {
+        'runs': len(ordered),
+        'min_ms': ordered[0] * 1000,
+        'median_ms': statistics.median(ordered) * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def print_results(title, results):
+    print(f'\n== {title} ==')
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            details = ', '.join(
+                f'{key}={value:.3f}' if isinstance(value, float) else f'{key}={value}'
+                for key, value in stats.items()
+            )
+            print(f'{name:<32} {details}')
+        elif isinstance(stats, float):
+            print(f'{name:<32} {stats:.3f}')
+        else:
+            print(f'{name:<32} {stats}')
@@ -0,0 +1,220 @@
+"""Run the benchmark suite, save the results as JSON and compare them with a baseline
+
+    python benchmarks/run.py                                  # default suite
+    python benchmarks/run.py --only inference text_scorer    # selected scenarios
+    python benchmarks/run.py --output baseline.json          # save a baseline
+    python benchmarks/run.py --compare baseline.json         # exit 1 on regressions
+
+Every scenario is one bench_*.py module; its run() results are stored under
+the scenario name. Everything runs offline on the data in data/.
+"""
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+
+from common import PROJECT_DIR
+
+# Scenario name -> (module, run() keyword arguments)
+SCENARIOS = {
+    'startup': ('bench_startup', {}),
+    'import_time': ('bench_import_time', {}),
+    'inference': ('bench_inference', {}),
+    'forest_engine': ('bench_forest_engine', {}),
+    'text_scorer': ('bench_text_scorer', {}),
+    'text_normalization': ('bench_text_normalization', {}),
+    'visualizations': ('bench_visualizations', {}),
+    'http_test_client': ('bench_batch', {}),
+    'micro_batching': ('bench_micro_batching', {}),
+    'metrics': ('bench_metrics', {}),
+    'http_gunicorn': ('bench_servers', {'servers': ('gunicorn_sync',), 'duration': 10.0}),
+    'hot_reload': ('bench_hot_reload', {}),
+    # Slow or environment-dependent; run with --all or --only
+    'data_loading': ('bench_data_loading', {}),
+    'online_training': ('bench_online_training', {}),
+    'servers': ('bench_servers', {}),
+    'gunicorn_memory': ('bench_gunicorn_memory', {}),
+    'bulk_scoring': ('bench_bulk_scoring', {}),
+    'outliers': ('bench_outliers', {}),
+    'stats_store': ('bench_stats_store', {'sizes': (768, 100000)}),
+    'render_pool': ('bench_render_pool', {}),
+    'streaming': ('bench_streaming', {}),
+}
+DEFAULT_SCENARIOS = [
+    'startup', 'import_time', 'inference', 'forest_engine', 'text_scorer', 'text_normalization',
+    'visualizations', 'http_test_client', 'micro_batching', 'metrics', 'http_gunicorn', 'hot_reload',
+]
+
+# Result keys compared against a baseline, by suffix of the last key component
+LOWER_IS_BETTER = ('_ms', '_us', 'seconds', '_mb')
+HIGHER_IS_BETTER = ('_per_s', '_per_sec', 'speedup', '_gain')
+# Too noisy to gate on: extremes of a timing summary (the median is compared),
+# and overheads, which are differences between two noisy timings
+IGNORED_KEYS = ('min_ms', 'p99_ms', 'max_ms')
+IGNORED_PARTS = ('overhead',)
+
+
+def package_versions():
+    versions = {}
+    for name in ('numpy', 'scipy', 'pandas', 'sklearn', 'joblib', 'flask', 'matplotlib', 'gunicorn', 'uvicorn'):
+        try:
+            versions[name] = importlib.import_module(name).__version__
+        except Exception:
+            versions[name] = None
+    return versions
+
+
+def cpu_model():
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine_metadata():
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_model': cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'thread_env': {key: os.environ.get(key) for key in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')},
+        'packages': package_versions(),
+    }
+
+
+def run_suite(names):
+    results, durations = {}, {}
+    for name in names:
+        module_name, kwargs = SCENARIOS[name]
+        print(f'[{name}] running {module_name}.run() ...', flush=True)
+        start = time.perf_counter()
+        try:
+            results[name] = importlib.import_module(module_name).run(**kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            results[name] = {'error': f'{type(e).__name__}: {e}'}
+        durations[name] = time.perf_counter() - start
+    return results, durations
+
+
+def flatten(results, prefix=''):
+    """Numeric leaves of a nested result dict, keyed by dotted path"""
+    flat = {}
+    for key, value in results.items():
+        path = f'{prefix}.{key}' if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def direction(path):
+    """-1 if lower is better, +1 if higher is better, 0 if the value is not compared"""
+    leaf = path.rsplit('.', 1)[-1]
+    if leaf in IGNORED_KEYS or any(part in leaf for part in IGNORED_PARTS):
+        return 0
+    if leaf.endswith(HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(current, baseline, threshold, min_delta_ms):
+    """Rows of (path, baseline, current, relative change, regressed) for comparable values"""
+    current_flat, baseline_flat = flatten(current), flatten(baseline)
+    rows = []
+    for path in sorted(current_flat.keys() & baseline_flat.keys()):
+        sign = direction(path)
+        old, new = baseline_flat[path], current_flat[path]
+        if sign == 0 or old == 0:
+            continue
+        change = (new - old) / abs(old)
+        regressed = -sign * change > threshold
+        # Sub-resolution differences in tiny timings are noise, not regressions
+        delta_ms = abs(new - old) / (1000 if path.endswith('_us') else 1)
+        if regressed and path.endswith(('_ms', '_us')) and delta_ms < min_delta_ms:
+            regressed = False
+        rows.append((path, old, new, change, regressed))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f'\n== comparison with baseline (threshold {threshold:.0%}) ==')
+    for path, old, new, change, regressed in rows:
+        flag = 'REGRESSION' if regressed else ''
+        print(f'{path:<64} {old:>14.3f} -> {new:>14.3f} {change:>+8.1%} {flag}')
+    regressions = sum(1 for row in rows if row[4])
+    print(f'{len(rows)} values compared, {regressions} regression(s)')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the backend benchmark suite')
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument('--only', nargs='+', choices=sorted(SCENARIOS), help='scenarios to run')
+    selection.add_argument('--all', action='store_true', help='run every scenario, including the slow ones')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='relative change that counts as a regression (default 0.15)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help='ignore timing changes smaller than this many milliseconds')
+    args = parser.parse_args(argv)
+
+    names = args.only or (list(SCENARIOS) if args.all else DEFAULT_SCENARIOS)
+    metadata = machine_metadata()
+    results, durations = run_suite(names)
+    metadata['scenario_seconds'] = durations
+    report = {'metadata': metadata, 'results': results}
+
+    output = args.output or os.path.join(
+        PROJECT_DIR, 'benchmarks', 'results',
+        datetime.datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True, default=str)
+    print(f'\nResults written to {output}')
+
+    failed = [name for name, result in results.items() if isinstance(result, dict) and 'error' in result]
+    if failed:
+        print(f'Failed scenarios: {", ".join(failed)}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in ('cpu_model', 'cpu_count', 'python'):
+            if baseline['metadata'].get(key) != metadata.get(key):
+                print(f'warning: baseline {key} {baseline["metadata"].get(key)!r} differs from {metadata.get(key)!r}')
+        rows = compare(results, baseline['results'], args.threshold, args.min_delta_ms)
+        if print_comparison(rows, args.threshold):
+            return 1
+    return 2 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
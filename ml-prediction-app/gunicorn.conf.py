@@ -0,0 +1,34 @@
+"""gunicorn settings: load the models once in the master and share them with the workers
+
+    gunicorn -c gunicorn.conf.py
+
+With preload_app the master imports backend/wsgi.py (and so loads or trains
+the models) before forking. Workers then share the model memory through
+copy-on-write instead of each loading a private copy. GET /api/memory
+reports per-worker RSS, PSS and shared memory.
+"""
+import gc
+import os
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+pythonpath = ','.join([os.path.join(PROJECT_DIR, 'backend'), PROJECT_DIR])
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * (os.cpu_count() or 1) + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes', 'on')
+# Every worker starts its own chart render pool, so the render processes are
+# workers * VISUALIZATIONS_RENDER_WORKERS; the workers already render in parallel
+os.environ.setdefault('VISUALIZATIONS_RENDER_WORKERS', '1')
+# An admin reload runs in whichever worker got the request and publishes the
+# new model; the other workers pick it up through their artifact watchers
+os.environ.setdefault('MODEL_RELOAD_WATCH_INTERVAL', '2')
+
+
+def when_ready(server):
+    if preload_app:
+        # Move everything loaded so far out of the garbage collector's reach, so
+        # collections in the workers do not write to (and un-share) those pages
+        gc.collect()
+        gc.freeze()
@@ -240,20 +240,30 @@ function displayDiabetesResult(container, data, inputData) {
 }
 
 // Visualizations
+// Chart.js instances of the interactive mode, destroyed before charts are reloaded
+let vizCharts = [];
+
 async function loadVisualizations() {
     const vizContainer = document.getElementById('viz-container');
+    // Interactive mode needs Chart.js from the CDN; fall back to server images without it
+    const interactive = document.getElementById('viz-mode').value === 'interactive' && typeof Chart !== 'undefined';
     
     // Show loading
+    destroyVisualizationCharts();
     vizContainer.innerHTML = '<div class="spinner"></div><p style="text-align: center;">Loading visualizations...</p>';
     
     try {
-        const response = await fetch('/api/visualizations');
+        // Interactive charts come as a few KB of aggregates; images are listed in a
+        // tiny manifest and each one is then fetched (and HTTP-cached) on its own
+        const response = await fetch(interactive ? '/api/visualizations/data' : '/api/visualizations/manifest');
         const data = await response.json();
         
-        if (response.ok) {
-            displayVisualizations(vizContainer, data);
-        } else {
+        if (!response.ok) {
             vizContainer.innerHTML = `<div class="loading">Error loading visualizations: ${data.error}</div>`;
+        } else if (interactive) {
+            displayInteractiveVisualizations(vizContainer, data);
+        } else {
+            displayVisualizations(vizContainer, data.charts);
         }
     } catch (error) {
         console.error('Error:', error);
@@ -261,32 +271,143 @@ async function loadVisualizations() {
     }
 }
 
-function displayVisualizations(container, data) {
-    let visualizationsHTML = '';
-    
-    const vizTitles = {
-        'age_distribution': 'Age Distribution',
-        'bmi_glucose_scatter': 'BMI vs Glucose Scatter Plot',
-        'outcome_pie': 'Diabetes Outcome Distribution',
-        'correlation_heatmap': 'Feature Correlation Heatmap'
-    };
+function displayVisualizations(container, charts) {
+    if (!charts || charts.length === 0) {
+        container.innerHTML = '<div class="loading">No visualizations available.</div>';
+        return;
+    }
     
-    for (const [key, base64Image] of Object.entries(data)) {
-        if (base64Image) {
-            visualizationsHTML += `
-                <div class="viz-item animate-fade-in">
-                    <h3>${vizTitles[key] || key.replace('_', ' ').toUpperCase()}</h3>
-                    <img src="data:image/png;base64,${base64Image}" alt="${vizTitles[key] || key}">
-                </div>
-            `;
+    // Browsers load the <img> sources in parallel, so one slow chart does not block the rest
+    container.innerHTML = charts.map(chart => `
+        <div class="viz-item animate-fade-in">
+            <h3>${chart.title}</h3>
+            <img src="${chart.url}" alt="${chart.title}" loading="lazy"
+                 onerror="this.replaceWith(Object.assign(document.createElement('p'), {textContent: 'Failed to load chart.'}))">
+        </div>
+    `).join('');
+}
+
+function displayInteractiveVisualizations(container, data) {
+    if (!data.charts || data.charts.length === 0 || data.count === 0) {
+        container.innerHTML = '<div class="loading">No visualizations available.</div>';
+        return;
+    }
+    
+    container.innerHTML = data.charts.map(chart => `
+        <div class="viz-item animate-fade-in">
+            <h3>${chart.title}</h3>
+            ${chart.type === 'heatmap'
+                ? `<div class="heatmap-container" id="viz-${chart.name}"></div>`
+                : `<div class="chart-canvas"><canvas id="viz-${chart.name}"></canvas></div>`}
+        </div>
+    `).join('');
+    
+    data.charts.forEach(chart => {
+        const element = document.getElementById(`viz-${chart.name}`);
+        if (chart.type === 'heatmap') {
+            element.innerHTML = correlationTable(chart);
+        } else {
+            vizCharts.push(new Chart(element, chartConfig(chart)));
         }
+    });
+}
+
+function destroyVisualizationCharts() {
+    vizCharts.forEach(chart => chart.destroy());
+    vizCharts = [];
+}
+
+function axisTitles(x, y) {
+    return {
+        x: {title: {display: true, text: x}},
+        y: {title: {display: true, text: y}}
+    };
+}
+
+// Chart.js configuration for a histogram, scatter or pie chart of /api/visualizations/data
+function chartConfig(chart) {
+    const options = {responsive: true, maintainAspectRatio: false};
+    
+    if (chart.type === 'histogram') {
+        const edges = chart.edges;
+        return {
+            type: 'bar',
+            data: {
+                labels: chart.counts.map((_, i) => `${edges[i]}–${edges[i + 1]}`),
+                datasets: [{
+                    label: 'Frequency',
+                    data: chart.counts,
+                    backgroundColor: 'rgba(135, 206, 235, 0.7)',
+                    borderColor: '#333',
+                    borderWidth: 1,
+                    barPercentage: 1.0,
+                    categoryPercentage: 1.0
+                }]
+            },
+            options: {...options, plugins: {legend: {display: false}}, scales: axisTitles(chart.column, 'Frequency')}
+        };
     }
     
-    if (visualizationsHTML) {
-        container.innerHTML = visualizationsHTML;
-    } else {
-        container.innerHTML = '<div class="loading">No visualizations available.</div>';
+    if (chart.type === 'scatter') {
+        const colors = {'0': 'rgba(0, 0, 255, 0.6)', '1': 'rgba(255, 0, 0, 0.6)'};
+        return {
+            type: 'scatter',
+            data: {
+                datasets: Object.entries(chart.group_labels).map(([group, label]) => ({
+                    label: label,
+                    data: chart.points.filter(point => String(point[2]) === group)
+                        .map(point => ({x: point[0], y: point[1]})),
+                    backgroundColor: colors[group]
+                }))
+            },
+            options: {...options, scales: axisTitles(chart.x, chart.y)}
+        };
+    }
+    
+    const total = chart.counts.reduce((sum, count) => sum + count, 0);
+    return {
+        type: 'pie',
+        data: {
+            labels: chart.labels,
+            datasets: [{data: chart.counts, backgroundColor: ['lightgreen', 'lightcoral']}]
+        },
+        options: {
+            ...options,
+            plugins: {
+                tooltip: {
+                    callbacks: {
+                        label: context => `${context.label}: ${context.parsed} (${(100 * context.parsed / total).toFixed(1)}%)`
+                    }
+                }
+            }
+        }
+    };
+}
+
+// Diverging blue-white-red color of a correlation in [-1, 1]
+function correlationColor(value) {
+    if (value === null) {
+        return '#eee';
     }
+    const [low, mid, high] = [[59, 76, 192], [221, 221, 221], [180, 4, 38]];
+    const target = value < 0 ? low : high;
+    const weight = Math.min(Math.abs(value), 1);
+    const rgb = mid.map((channel, i) => Math.round(channel + (target[i] - channel) * weight));
+    return `rgb(${rgb.join(', ')})`;
+}
+
+function correlationTable(chart) {
+    const header = chart.columns.map(column => `<th>${column}</th>`).join('');
+    const rows = chart.matrix.map((row, i) => `
+        <tr>
+            <th>${chart.columns[i]}</th>
+            ${row.map(value => `
+                <td style="background: ${correlationColor(value)}; color: ${value !== null && Math.abs(value) > 0.6 ? '#fff' : '#333'}">
+                    ${value === null ? '' : value.toFixed(2)}
+                </td>`).join('')}
+        </tr>
+    `).join('');
+    return `<table class="heatmap-table"><thead><tr><th></th>${header}</tr></thead><tbody>${rows}</tbody></table>`;
 }
 
 // Utility functions
@@ -0,0 +1,57 @@
+import contextlib
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+
+# Make the backend importable the same way backend/main.py does
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BACKEND_DIR = os.path.join(PROJECT_DIR, 'backend')
+for path in (PROJECT_DIR, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+
+# Server processes started from the project directory; uvicorn takes the port last
+SERVER_COMMANDS = {
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+    'uvicorn': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--app-dir', 'backend', '--host', '127.0.0.1',
+                '--log-level', 'warning', '--port'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def server_process(name, env_overrides=None, timeout=180):
+    """Run a server with one worker (unless env_overrides says otherwise) and yield its port once it answers"""
+    port = free_port()
+    command = SERVER_COMMANDS[name] + ([str(port)] if name == 'uvicorn' else [])
+    env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY='1', ASGI_WORKERS='1')
+    env.update(env_overrides or {})
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            assert process.poll() is None, f'{name} exited with code {process.returncode}'
+            assert time.monotonic() < deadline, f'{name} not ready after {timeout}s'
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                connection.request('GET', '/api/visualizations/manifest')
+                if connection.getresponse().status == 200:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.2)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(30)
@@ -0,0 +1,68 @@
+"""The ASGI app called in-process, with its worker pool"""
+import asyncio
+import contextlib
+import io
+import json
+
+import pytest
+
+from asgi import PredictionASGIApp
+from backend.utils.visualization import VisualizationCache
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = PredictionASGIApp({'ASGI_WORKERS': 1})
+    yield app
+    asyncio.run(app.stop())
+
+
+def call(app, method, path, body=b'', headers=()):
+    """(status, headers, body) of one request"""
+    async def run():
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await app({'type': 'http', 'method': method, 'path': path, 'headers': list(headers)}, receive, send)
+        return messages
+
+    start, *bodies = asyncio.run(run())
+    return start['status'], dict(start['headers']), b''.join(message.get('body', b'') for message in bodies)
+
+
+def test_visualization_data(app):
+    status, headers, body = call(app, 'GET', '/api/visualizations/data')
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = VisualizationCache().get_data()
+    assert json.loads(body) == json.loads(expected.body)
+
+    status, _, body = call(app, 'GET', '/api/visualizations/data', headers=[(b'if-none-match', headers[b'etag'])])
+    assert status == 304
+    assert body == b''
+
+
+@pytest.mark.parametrize('body', [b'{"glucose": null}', b'{"glucose": true}', b'{"glucose": [1]}',
+                                  b'{"glucose": {}}', b'{"glucose": "high"}', b'[1, 2]', b'3'])
+def test_single_diabetes_record_errors_are_400(app, body):
+    status, _, response = call(app, 'POST', '/api/predict/diabetes', body)
+    assert status == 400
+    assert 'error' in json.loads(response)
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/api/predict/hate-speech', {'text': 'have a nice day'}),
+    ('/api/predict/diabetes', {'glucose': 140, 'bmi': 31.5, 'age': 45}),
+    ('/api/predict/hate-speech/batch', {'texts': ['have a nice day']}),
+    ('/api/predict/diabetes/batch', {'records': [{'glucose': 140}]}),
+])
+def test_predictions_carry_the_model_version(app, path, body):
+    status, headers, _ = call(app, 'POST', path, json.dumps(body).encode())
+    assert status == 200
+    assert headers[b'x-model-version']
@@ -0,0 +1,51 @@
+"""Micro-batcher workers follow forks and go away with their batcher"""
+import gc
+import os
+import time
+
+import pytest
+
+from app import batching
+from app.batching import MicroBatcher
+
+
+def double(items):
+    return [item * 2 for item in items]
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_collected_batcher_stops_its_worker():
+    batcher = MicroBatcher(double, name='collected')
+    assert batcher(2) == 4
+    worker = batcher._worker
+    del batcher
+    gc.collect()
+    assert wait_until(lambda: not worker.is_alive())
+    assert not any(b.name == 'collected' for b in batching._live_batchers)
+
+
+def test_closed_batcher_is_not_tracked():
+    batcher = MicroBatcher(double, name='closed')
+    batcher.close()
+    assert batcher not in batching._live_batchers
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_worker_restarts_in_forked_child():
+    batcher = MicroBatcher(double, name='forked')
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if batcher(5, timeout=5) == 10 else 1)
+        except BaseException:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert batcher(3) == 6
+    batcher.close()
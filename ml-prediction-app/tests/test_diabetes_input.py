@@ -0,0 +1,56 @@
+"""Diabetes records with missing, non-numeric or non-finite fields are client errors"""
+import contextlib
+import io
+
+import pytest
+
+from app.routes import DIABETES_FIELDS, create_app, extract_diabetes_features
+
+RECORD = {'pregnancies': 2, 'glucose': 140, 'blood_pressure': 70, 'skin_thickness': 25,
+          'insulin': 100, 'bmi': 31.5, 'diabetes_pedigree': 0.5, 'age': 45}
+BAD_GLUCOSE = [None, True, False, [140], {'value': 140}, 'high', 'nan', 'inf', 10 ** 400]
+
+
+@pytest.fixture(scope='module')
+def client():
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app({'METRICS_ENABLED': False})
+    return app.test_client()
+
+
+def test_numbers_and_numeric_strings_are_accepted():
+    record = dict(RECORD, glucose='140', bmi='31.5')
+    assert extract_diabetes_features(record) == [float(RECORD[field]) for field in DIABETES_FIELDS]
+
+
+@pytest.mark.parametrize('glucose', BAD_GLUCOSE)
+def test_bad_values_raise_value_error(glucose):
+    with pytest.raises(ValueError, match='glucose'):
+        extract_diabetes_features(dict(RECORD, glucose=glucose))
+
+
+@pytest.mark.parametrize('body', [None, [], [RECORD], 'record', 3])
+def test_non_objects_raise_value_error(body):
+    with pytest.raises(ValueError):
+        extract_diabetes_features(body)
+
+
+@pytest.mark.parametrize('glucose', BAD_GLUCOSE[:5])
+def test_single_route_answers_400(client, glucose):
+    response = client.post('/api/predict/diabetes', json=dict(RECORD, glucose=glucose))
+    assert response.status_code == 400
+    assert 'glucose' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('body', [None, [RECORD], 3])
+def test_single_route_refuses_non_objects(client, body):
+    response = client.post('/api/predict/diabetes', json=body)
+    assert response.status_code == 400
+
+
+def test_batch_route_flags_bad_records(client):
+    response = client.post('/api/predict/diabetes/batch', json={'records': [RECORD, dict(RECORD, glucose=True), None]})
+    assert response.status_code == 200
+    first, second, third = response.get_json()['results']
+    assert 'probability' in first
+    assert 'error' in second and 'error' in third
@@ -0,0 +1,56 @@
+"""The compiled forest must reproduce RandomForestClassifier.predict_proba bit for bit"""
+import contextlib
+import io
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIR
+
+from app.forest_engine import CompiledForest
+from app.models import DiabetesPredictor
+
+
+@pytest.fixture(scope='module')
+def models():
+    with contextlib.redirect_stdout(io.StringIO()):
+        sklearn_model = DiabetesPredictor(data_path=os.path.join(DATA_DIR, 'diabetes.csv'))
+        compiled_model = DiabetesPredictor(data_path=sklearn_model.data_path, engine='compiled')
+    return sklearn_model, compiled_model
+
+
+@pytest.fixture(scope='module')
+def rows(models):
+    # Perturbed training rows, so traversal reaches leaves the training data does not
+    rng = np.random.default_rng(0)
+    X = models[0].X[rng.integers(0, len(models[0].X), 5000)].astype(np.float64)
+    return X * rng.uniform(0.8, 1.2, X.shape)
+
+
+@pytest.mark.parametrize('size', [1, 7, 100, 512, 5000])
+def test_predict_proba_identical(models, rows, size):
+    forest = models[0].model
+    expected = forest.predict_proba(rows[:size])
+    actual = CompiledForest(forest).predict_proba(rows[:size])
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual, expected)
+
+
+def test_single_rows_identical(models, rows):
+    forest = models[0].model
+    compiled = CompiledForest(forest)
+    for row in rows[:200]:
+        assert np.array_equal(compiled.predict_proba(row[np.newaxis]), forest.predict_proba(row[np.newaxis]))
+
+
+def test_engines_serve_the_same_results(models, rows):
+    sklearn_model, compiled_model = models
+    batch = rows[:DiabetesPredictor.ENGINE_MAX_ROWS].tolist()
+    assert compiled_model.infer_batch(batch) == sklearn_model.infer_batch(batch)
+
+
+def test_non_finite_rows_are_left_to_sklearn(models):
+    compiled = models[1].compiled
+    assert not compiled.supports(np.array([[np.nan] * compiled.n_features]))
+    assert compiled.supports(np.zeros((1, compiled.n_features)))
@@ -0,0 +1,91 @@
+"""Out-of-core hate speech training: hold-out split, teacher agreement and resuming"""
+import contextlib
+import io
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from app.models import StreamingHateSpeechDetector
+from app.registry import ModelRegistry
+from conftest import DATA_DIR
+
+BATCH_SIZE = 500
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """2,000 unlabelled corpus lines plus 100 labelled ones"""
+    with open(os.path.join(DATA_DIR, 'hate_speech.csv'), encoding='utf-8', errors='replace') as f:
+        lines = [line.strip() for line in itertools.islice(f, 2100) if line.strip()]
+    path = tmp_path / 'corpus.csv'
+    path.write_text('\n'.join(lines[:2000] + [f'{line}\t{i % 2}' for i, line in enumerate(lines[2000:])]) + '\n',
+                    encoding='utf-8')
+    return str(path)
+
+
+class Teacher:
+    """Labels everything 1 and counts the rows it was asked about; fails on call `fail_on`"""
+
+    def __init__(self, fail_on=None):
+        self.calls = 0
+        self.rows = 0
+        self.fail_on = fail_on
+
+    def __call__(self, texts):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise RuntimeError('interrupted')
+        self.rows += len(texts)
+        return [1] * len(texts)
+
+
+def train(corpus, registry, teacher):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return StreamingHateSpeechDetector(corpus, registry=registry, batch_size=BATCH_SIZE,
+                                           checkpoint_every=1, label_fn=teacher)
+
+
+def test_held_out_sentences_are_never_trained_on(corpus):
+    detector = train(corpus, None, Teacher())
+    training, holdout = detector.split_seed_sentences()
+    held_out = {text for text, _ in holdout}
+    assert len(held_out) == len(holdout)
+    assert 0.15 < len(held_out) / len(set(detector.X)) < 0.25
+    assert {label for _, label in holdout} == {0, 1}
+
+    trained = {text for texts, _, _ in detector.iter_training_batches() for text in texts}
+    assert not trained & held_out
+    assert len(training) + sum(text in held_out for text in detector.X) == len(detector.X)
+    assert detector.accuracy == detector.holdout_accuracy()
+
+
+def test_teacher_agreement_only_counts_teacher_labels(corpus):
+    teacher = Teacher()
+    detector = train(corpus, None, teacher)
+    assert teacher.rows == 2000
+    from_teacher = [flag for _, _, flags in detector.iter_training_batches() for flag in flags]
+    assert sum(from_teacher) == 2000
+    # Every teacher label is 1, so agreement is the share of teacher rows predicted 1
+    assert 0 <= detector.teacher_agreement <= 1
+
+
+def test_resume_skips_teacher_labelling_and_matches_a_full_run(corpus, tmp_path):
+    full = train(corpus, ModelRegistry(str(tmp_path / 'full')), Teacher())
+
+    registry = ModelRegistry(str(tmp_path / 'resumed'))
+    with pytest.raises(RuntimeError, match='interrupted'):
+        train(corpus, registry, Teacher(fail_on=3))
+    checkpoint = registry.load(f'{StreamingHateSpeechDetector.ARTIFACT_NAME}_checkpoint')
+    seed_batches = -(-len(full.split_seed_sentences()[0]) // BATCH_SIZE)
+    assert checkpoint['batches_done'] == seed_batches + 2
+
+    teacher = Teacher()
+    resumed = train(corpus, registry, teacher)
+    # Only the corpus batches after the checkpoint are labelled again
+    assert teacher.calls == 2
+    np.testing.assert_array_equal(resumed.model.coef_, full.model.coef_)
+    assert resumed.rows_seen == full.rows_seen
+    assert resumed.teacher_agreement == full.teacher_agreement
+    assert registry.load(f'{StreamingHateSpeechDetector.ARTIFACT_NAME}_checkpoint') is None
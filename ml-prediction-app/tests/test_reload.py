@@ -0,0 +1,165 @@
+"""Artifact watchers follow forks, published reloads and go away with their owner"""
+import gc
+import http.client
+import importlib.util
+import json
+import os
+import shutil
+import threading
+import time
+
+import joblib
+import pytest
+
+from app import reload
+from app.registry import ModelRegistry
+from app.reload import ArtifactWatcher, ModelHolder
+from conftest import PROJECT_DIR, server_process
+
+
+class CountingHolder:
+    name = 'counting'
+
+    def __init__(self, path):
+        self.path = path
+        self.reloads = threading.Semaphore(0)
+
+    def artifact_path(self):
+        return self.path
+
+    def published_path(self):
+        return None
+
+    def reload(self):
+        self.reloads.release()
+        return True
+
+
+def touch(path):
+    with open(path, 'a'):
+        pass
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_changed_artifact_is_reloaded(tmp_path):
+    holder = CountingHolder(tmp_path / 'model.joblib')
+    touch(holder.path)
+    watcher = ArtifactWatcher([holder], 0.01)
+    touch(holder.path)
+    assert holder.reloads.acquire(timeout=5)
+    watcher.close()
+    assert watcher not in reload._live_watchers
+
+
+def test_collected_watcher_stops_its_thread(tmp_path):
+    watcher = ArtifactWatcher([CountingHolder(tmp_path / 'missing')], 0.01)
+    thread = watcher._thread
+    del watcher
+    gc.collect()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_watcher_restarts_in_forked_child(tmp_path):
+    holder = CountingHolder(tmp_path / 'model.joblib')
+    touch(holder.path)
+    watcher = ArtifactWatcher([holder], 0.01)
+    closed = ArtifactWatcher([holder], 0.01)
+    closed.close()
+    pid = os.fork()
+    if pid == 0:
+        threads = [thread.name for thread in threading.enumerate()]
+        touch(holder.path)
+        os._exit(0 if threads.count('artifact-watcher') == 1 and holder.reloads.acquire(timeout=5) else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    watcher.close()
+
+
+class FakeModel:
+    ARTIFACT_NAME = 'fake'
+
+    def __init__(self, registry, artifact=None):
+        self.registry = registry
+        self.version = ModelRegistry.version_of(artifact) if artifact else 'initial'
+
+    def holdout_accuracy(self):
+        return 1.0
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_published_reload_reaches_other_holders(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    # One holder per "worker", all serving from the same registry
+    holders = [ModelHolder('fake', FakeModel(registry), lambda artifact: FakeModel(registry, artifact))
+               for _ in range(3)]
+    watchers = [ArtifactWatcher([holder], 3600) for holder in holders[1:]]
+    tuned = registry.save('fake_tuned', 'f' * 64)
+
+    assert holders[0].reload('fake_tuned', wait=True, publish=True)
+    assert holders[0].status['published'] is True
+    assert registry.published('fake') == {'artifact': 'fake_tuned', 'version': tuned['version']}
+
+    for watcher in watchers:
+        watcher.check()
+    assert wait_until(lambda: all(holder.version == tuned['version'] for holder in holders))
+    assert holders[1].status['artifact'] == 'fake_tuned'
+
+    # A holder already serving the published version does not reload it again
+    status = holders[0].status
+    ArtifactWatcher([holders[0]], 3600).check()
+    assert holders[0].status is status
+    for watcher in watchers:
+        watcher.close()
+
+
+def test_unpublished_reload_stays_local(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    holder = ModelHolder('fake', FakeModel(registry), lambda artifact: FakeModel(registry, artifact))
+    registry.save('fake_tuned', 'f' * 64)
+    assert holder.reload('fake_tuned', wait=True)
+    assert registry.published('fake') is None
+
+
+def get_models(port):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request('GET', '/api/models')
+    return json.loads(connection.getresponse().read())
+
+
+@pytest.mark.skipif(importlib.util.find_spec('gunicorn') is None, reason='gunicorn is not installed')
+def test_admin_reload_reaches_every_gunicorn_worker(tmp_path):
+    model_dir = tmp_path / 'models'
+    shutil.copytree(os.path.join(PROJECT_DIR, 'models'), model_dir)
+    artifact = joblib.load(model_dir / 'diabetes.joblib')
+    artifact['version'] = 'published-test'
+    joblib.dump(artifact, model_dir / 'diabetes_v2.joblib')
+
+    env = {'WEB_CONCURRENCY': '2', 'MODEL_DIR': str(model_dir), 'ADMIN_TOKEN': 'test-token',
+           'MODEL_RELOAD_WATCH_INTERVAL': '0.2'}
+    with server_process('gunicorn', env) as port:
+        def worker_versions(timeout=30):
+            """{worker pid: serving diabetes version}, once both workers have answered"""
+            versions = {}
+            deadline = time.monotonic() + timeout
+            while len(versions) < 2 and time.monotonic() < deadline:
+                response = get_models(port)
+                versions[response['worker']] = response['models']['diabetes']['version']
+            assert len(versions) == 2, 'only one gunicorn worker answered'
+            return versions
+
+        assert 'published-test' not in worker_versions().values()
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        body = json.dumps({'model': 'diabetes', 'artifact': 'diabetes_v2'})
+        connection.request('POST', '/api/admin/reload?wait=1', body=body,
+                           headers={'Content-Type': 'application/json', 'X-Admin-Token': 'test-token'})
+        assert connection.getresponse().status == 200
+        assert wait_until(lambda: set(worker_versions().values()) == {'published-test'}, timeout=60)
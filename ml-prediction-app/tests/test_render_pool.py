@@ -0,0 +1,75 @@
+"""Concurrent chart renders must each produce exactly the PNG of a sequential render"""
+import contextlib
+import io
+import logging
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from werkzeug.serving import make_server
+
+from app.routes import create_app
+from backend.utils.visualization import CHARTS, ChartRenderer, RenderTimeout, load_dashboard_store, render_chart
+
+NAMES = list(CHARTS)
+CONCURRENCY = 50
+
+
+@pytest.fixture(scope='module')
+def stats():
+    return load_dashboard_store().snapshot()
+
+
+@pytest.fixture(scope='module')
+def reference(stats):
+    return {name: render_chart(name, stats) for name in NAMES}
+
+
+def render_concurrently(render):
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        return list(executor.map(lambda i: (NAMES[i % len(NAMES)], render(NAMES[i % len(NAMES)])),
+                                 range(CONCURRENCY)))
+
+
+def test_figures_in_threads(stats, reference):
+    for name, png in render_concurrently(lambda name: render_chart(name, stats)):
+        assert png == reference[name], name
+
+
+def test_process_pool(stats, reference):
+    renderer = ChartRenderer(workers=2, timeout=120)
+    try:
+        for name, png in render_concurrently(lambda name: renderer.render(name, stats)):
+            assert png == reference[name], name
+    finally:
+        renderer.shutdown()
+
+
+def test_slow_render_times_out(stats):
+    renderer = ChartRenderer(workers=1, timeout=0.05)
+    try:
+        with pytest.raises(RenderTimeout):
+            renderer.render('correlation_heatmap', stats)
+    finally:
+        renderer.shutdown()
+
+
+def test_http_requests_with_a_cold_cache(reference):
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app({'VISUALIZATIONS_RENDER_WORKERS': 2, 'METRICS_ENABLED': False})
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}/api/visualizations'
+
+    def fetch(name):
+        with urllib.request.urlopen(f'{base}/{name}.png', timeout=120) as response:
+            return response.status, response.read()
+
+    try:
+        for name, (status, png) in render_concurrently(fetch):
+            assert status == 200
+            assert png == reference[name], name
+    finally:
+        server.shutdown()
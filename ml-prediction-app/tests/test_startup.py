@@ -0,0 +1,16 @@
+"""A prediction worker must start offline, without plotting or NLTK imports"""
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR, PROJECT_DIR
+
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'plotly', 'nltk')
+
+
+def test_app_import_loads_no_heavy_modules():
+    script = 'import sys; import app.routes; print(",".join(m for m in %r if m in sys.modules))' % (HEAVY_MODULES,)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([PROJECT_DIR, BACKEND_DIR]))
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            env=env, cwd=PROJECT_DIR, check=True)
+    assert result.stdout.strip() == ''
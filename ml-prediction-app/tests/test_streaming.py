@@ -0,0 +1,117 @@
+"""NDJSON streaming routes under the Werkzeug server, gunicorn and the ASGI app"""
+import contextlib
+import http.client
+import importlib.util
+import io
+import json
+import logging
+import socket
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from app.routes import create_app
+from conftest import server_process
+
+TEXTS = ['have a nice day', 'I hate you all', 'see you tomorrow']
+DIABETES_RECORD = {'pregnancies': 2, 'glucose': 140, 'blood_pressure': 70, 'skin_thickness': 25,
+                   'insulin': 100, 'bmi': 31.5, 'diabetes_pedigree': 0.5, 'age': 45}
+
+
+@contextlib.contextmanager
+def werkzeug_server():
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app({'METRICS_ENABLED': False})
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server.server_port
+    finally:
+        server.shutdown()
+
+
+@pytest.fixture(scope='module', params=['werkzeug', 'gunicorn', 'uvicorn'])
+def port(request):
+    if request.param == 'werkzeug':
+        server = werkzeug_server()
+    elif importlib.util.find_spec(request.param) is None:
+        pytest.skip(f'{request.param} is not installed')
+    else:
+        server = server_process(request.param)
+    with server as port:
+        yield port
+
+
+def post(port, path, body, **kwargs):
+    """(status, headers, body) of a POST"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    connection.request('POST', path, body=body, headers={'Content-Type': 'application/x-ndjson'}, **kwargs)
+    response = connection.getresponse()
+    return response.status, response.headers, response.read()
+
+
+def ndjson(records):
+    return ''.join(json.dumps(record) + '\n' for record in records).encode()
+
+
+def parse(body):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+def test_hate_speech_stream(port):
+    body = ndjson(TEXTS[:2] + [{'text': TEXTS[2]}]) + b'\n{not json\n'
+    status, headers, response = post(port, '/api/predict/hate-speech/stream', body)
+    assert status == 200
+    assert headers['Content-Type'].startswith('application/x-ndjson')
+    assert headers['X-Model-Version']
+    results = parse(response)
+    assert [result['row'] for result in results] == [0, 1, 2, 3]
+    assert all('prediction' in result for result in results[:3])
+    assert results[3] == {'row': 3, 'error': 'Invalid JSON'}
+
+
+def test_chunked_upload(port):
+    blocks = [ndjson(TEXTS)[:7], ndjson(TEXTS)[7:]]
+    status, _, response = post(port, '/api/predict/hate-speech/stream', iter(blocks), encode_chunked=True)
+    assert status == 200
+    assert [result['row'] for result in parse(response)] == [0, 1, 2]
+
+
+def test_rows_stay_in_order_across_growing_chunks(port):
+    texts = [f'{TEXTS[i % len(TEXTS)]} {i}' for i in range(500)]
+    status, _, response = post(port, '/api/predict/hate-speech/stream', ndjson(texts))
+    assert status == 200
+    results = parse(response)
+    assert [result['row'] for result in results] == list(range(500))
+    assert [result['text'] for result in results] == texts
+
+
+def test_diabetes_stream(port):
+    body = ndjson([DIABETES_RECORD, dict(DIABETES_RECORD, glucose='high')])
+    status, _, response = post(port, '/api/predict/diabetes/stream', body)
+    assert status == 200
+    first, second = parse(response)
+    assert first['row'] == 0 and 'probability' in first
+    assert second['row'] == 1 and 'error' in second
+
+
+def test_empty_body_is_a_json_400(port):
+    status, headers, response = post(port, '/api/predict/hate-speech/stream', b'')
+    assert status == 400
+    assert headers['Content-Type'] == 'application/json'
+    assert 'error' in json.loads(response)
+
+
+def test_truncated_body_is_a_json_400(port, request):
+    if request.node.callspec.params['port'] == 'uvicorn':
+        pytest.skip('uvicorn closes a half-closed connection before the app can answer')
+    with socket.create_connection(('127.0.0.1', port), timeout=60) as sock:
+        sock.sendall(b'POST /api/predict/hate-speech/stream HTTP/1.1\r\nHost: localhost\r\n'
+                     b'Content-Type: application/x-ndjson\r\nContent-Length: 1000\r\n\r\n')
+        sock.shutdown(socket.SHUT_WR)
+        response = http.client.HTTPResponse(sock)
+        response.begin()
+        assert response.status == 400
+        assert 'error' in json.loads(response.read())
@@ -0,0 +1,87 @@
+"""TextNormalizer must reproduce the normalizers it replaced, one text or a batch at a time
+
+The legacy functions are verbatim copies of HateSpeechDetector.preprocess_text and
+DataPreprocessor.clean_text before the shared TextNormalizer. NLTK's word_tokenize is
+called with preserve_line=True so no punkt download is needed; the text it sees has no
+sentence punctuation left, so sentence splitting would not change the result.
+"""
+import os
+import random
+import re
+
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from conftest import DATA_DIR
+
+from backend.utils.text_normalization import TextNormalizer
+
+word_tokenize = pytest.importorskip('nltk.tokenize').word_tokenize
+
+
+def legacy_preprocess_text(text):
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = ' '.join(text.split())
+    return text
+
+
+def legacy_clean_text(text, stop_words):
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'@\w+|#\w+', '', text)
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = ' '.join(text.split())
+    if stop_words:
+        words = word_tokenize(text, preserve_line=True)
+        text = ' '.join([word for word in words if word not in stop_words])
+    return text
+
+
+def load_corpus():
+    with open(os.path.join(DATA_DIR, 'hate_speech.csv'), encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f]
+
+
+def edge_cases(seed=42):
+    """Unicode soup plus hand-picked cases the byte-level batch path must get right"""
+    rng = random.Random(seed)
+    soup = ''.join(chr(rng.randrange(1, 0x30000)) for _ in range(50000))
+    cases = [soup[i:i + 40] for i in range(0, len(soup), 40)]
+    cases = [c for c in cases if not any(0xd800 <= ord(ch) < 0xe000 for ch in c)]
+    cases += ['', ' ', '  a  b  ', 'İstanbul', 'Kelvin', 'a\xa0b　c', 'x\x1cy',
+              'I cannot believe it, gonna wanna', 'wanna', 'gotta go @user #tag http://t.co/x',
+              'email@host.com www.example.org', 'café naïve']
+    return cases
+
+
+@pytest.fixture(scope='module')
+def texts():
+    return load_corpus() + edge_cases()
+
+
+def test_normalize_matches_preprocess_text(texts):
+    normalizer = TextNormalizer()
+    expected = [legacy_preprocess_text(text) for text in texts]
+    assert normalizer.normalize_batch(texts) == expected
+    assert [normalizer.normalize(text) for text in texts] == expected
+
+
+@pytest.mark.parametrize('stop_words', [set(ENGLISH_STOP_WORDS), set()], ids=['stopwords', 'no-stopwords'])
+def test_clean_matches_clean_text(texts, stop_words):
+    normalizer = TextNormalizer(stop_words)
+    expected = [legacy_clean_text(text, stop_words) for text in texts]
+    assert normalizer.clean_batch(texts) == expected
+    assert [normalizer.clean(text) for text in texts] == expected
+
+
+def test_batch_keeps_series_index_and_non_strings():
+    normalizer = TextNormalizer()
+    series = pd.Series(['Hello, World!', None, 42, 'a\x00b'], index=[10, 11, 12, 13])
+    result = normalizer.normalize_batch(series)
+    assert list(result.index) == [10, 11, 12, 13]
+    # A text holding the batch separator falls back to one call per text
+    assert list(result) == ['hello world', '', '', 'ab']
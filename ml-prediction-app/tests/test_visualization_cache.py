@@ -0,0 +1,67 @@
+"""A refresh while a cached resource is being built must not leave stale data cached"""
+import base64
+import json
+
+from backend.utils import visualization
+from backend.utils.stats_store import StatisticsStore
+from backend.utils.visualization import VisualizationCache
+
+RECORD = [2, 140, 70, 25, 100, 31.5, 0.5, 45, 1]
+
+
+def make_store(records=10):
+    store = StatisticsStore()
+    for _ in range(records):
+        store.update(RECORD)
+    return store
+
+
+class VersionRenderer:
+    """Renders a chart as the data version it was drawn from, calling `during` on the first render"""
+
+    def __init__(self, during):
+        self.during = during
+
+    def render(self, name, stats):
+        during, self.during = self.during, None
+        if during:
+            during()
+        return str(stats['version']).encode()
+
+
+def update_and_refresh(store, cache):
+    store.update(RECORD)
+    cache.refresh()
+
+
+def test_chart_data_built_across_a_refresh_is_not_cached(monkeypatch):
+    store = make_store()
+    cache = VisualizationCache(store=store)
+    cache.refresh()
+    build = visualization.chart_data
+    calls = []
+
+    def chart_data_with_refresh(stats):
+        calls.append(stats['version'])
+        if len(calls) == 1:
+            update_and_refresh(store, cache)
+        return build(stats)
+
+    monkeypatch.setattr(visualization, 'chart_data', chart_data_with_refresh)
+    stale = cache.get_data()
+    assert cache._chart_data is None
+    fresh = cache.get_data()
+    assert json.loads(fresh.body)['version'] == store.version != json.loads(stale.body)['version']
+    assert cache.get_data() is fresh
+
+
+def test_bundle_built_across_a_refresh_is_not_cached():
+    store = make_store()
+    cache = VisualizationCache(store=store)
+    cache.renderer = VersionRenderer(lambda: update_and_refresh(store, cache))
+    cache.get()
+    assert cache._bundle is None
+    fresh = cache.get()
+    assert cache.get() is fresh
+    expected = base64.b64encode(str(store.version).encode()).decode()
+    assert set(json.loads(fresh.body).values()) == {expected}